@@ -1,27 +1,29 @@
 import csv
-import os
-import subprocess
-from collections import defaultdict
-from sdcclient import IbmAuthHelper, SdMonitorClient
+import time
+import load_runner
+import metric_frame
+import run_guard
+import run_store
+import sysdig_client
+from sysdig_cache import CachedClient
+from sysdig_fetcher import build_metrics_query, fetch, fetch_all
+from sysdig_filters import namespace_filter, status_code_filter
 
-# Add the monitoring instance information that is required for authentication
-URL = "https://ca-tor.monitoring.cloud.ibm.com"
-APIKEY = os.environ['IBMCLOUD_API_KEY']
-GUID = "b92c514a-ca21-4548-b3f0-4d6391bab407"
-ibm_headers = IbmAuthHelper.get_headers(URL, APIKEY, GUID)
-# Instantiate the Python client
-sdclient = SdMonitorClient(sdc_url=URL, custom_headers=ibm_headers)
+sdclient = CachedClient(sysdig_client.get_client())
 
+# Namespace of the AcmeAir deployment under test
+namespace = 'acmeair-g2'
 
 standard_metrics = {
     "sysdig_container_net_http_request_time" : {"group": "avg"},
+    "sysdig_container_net_http_request_count" : {"group": "sum"},
 }
 status_code_metrics = {
     "sysdig_container_net_http_statuscode_request_count": {"group": "avg"},
 }
 metrics_to_collect = {
-    "kube_namespace_name = 'acmeair-g2'": standard_metrics,
-    "kube_namespace_name = 'acmeair-g2' and net_http_statuscode in ('503', '502', '500', '400', '401', '403')": status_code_metrics,
+    namespace_filter([namespace]): standard_metrics,
+    status_code_filter([namespace]): status_code_metrics,
 }
 
 run_parameters = {
@@ -32,89 +34,83 @@ run_parameters = {
 
 default_csv_header = ['acmeair-bookingservice','acmeair-customerservice','acmeair-flightservice','acmeair-authservice','acmeair-mainservice','timestamp']
 
-# Write samples to a CSV file named output/<metric>.csv for metric
-def write_csv(test_name, metric, samples):
+# Write rows to a CSV file named output/<metric>.csv for metric
+def write_csv(test_name, metric, header, rows):
     with open(f'output/configuration1/{metric}_{test_name}_.csv', 'w', newline='') as csvfile:
-        if (len(samples) == 0):
-            fieldnames = default_csv_header
-        else:
-            fieldnames = list(samples[0].keys())
+        if (len(rows) == 0):
+            header = default_csv_header
 
-        print(fieldnames)
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+        print(header)
+        writer = csv.writer(csvfile)
 
-        writer.writeheader()
-        for sample in samples:
-            writer.writerow(sample)
+        writer.writerow(header)
+        writer.writerows(rows)
 
-# Preprocesses metric results and writes them a CSV file
+# Writes the column of the given metric to a CSV file
 # in the output folder
-def write_metric_result(test_name, metric, index, res):
-    samples = res['data']
-
-    processed_samples = defaultdict(dict)
-    processed_samples_with_timestamp = []
-
-    for sample in samples:
-        data = sample['d']
-        processed_samples[sample['t']][data[0]] = data[index + 1]
-
-    for timestamp, values in processed_samples.items():
-        values['timestamp'] = timestamp
-        processed_samples_with_timestamp.append(values)
-
-    write_csv(test_name, metric, processed_samples_with_timestamp)
-
-# Preprocesses Sysdig metric results and write a CSV file
-# with the metric results for each metric.
-def write_result(test_name, metrics_to_collect, res):
-    for i, metric in enumerate(metrics_to_collect):
-        write_metric_result(test_name, metric, i, res)
+def write_metric_result(test_name, metric, frame):
+    header, rows = metric_frame.to_rows(frame, metric)
+    write_csv(test_name, metric, header, rows)
+
+# Identifier of this run in the binary run store
+run_id = time.strftime('%Y%m%d-%H%M%S')
+
+# Also write the results as one CSV file per metric
+write_csv_output = True
+
+# Preprocesses Sysdig metric results and appends them to the run store under
+# `run` (run_id by default), and to a CSV file for each metric unless
+# `csv_output` (write_csv_output by default) is False.
+# The result is reshaped once into a columnar frame that every metric reads.
+def write_result(test_name, metrics_to_collect, res, run = None, csv_output = None):
+    frame = metric_frame.from_result(res, metrics_to_collect)
+    run_store.append_frame(run or run_id, test_name, frame)
+    if write_csv_output if csv_output is None else csv_output:
+        for metric in metrics_to_collect:
+            write_metric_result(test_name, metric, frame)
 
 # Performs a JMeter load test with the given parameters
 def load_test(log_file = 'output_logs.txt', thread_count = 60, duration = 600, ramp = 30, delay = 0):
-    subprocess.call(
-        [
-            f'./apache-jmeter-5.6.2/bin/jmeter -n -t ./AcmeAir-microservices-mpJwt.jmx -DusePureIDs=true  -j logs/{log_file} -JTHREAD={thread_count} -JUSER=999 -JDURATION={duration} -JRAMP={ramp} -JDELAY=0'
-        ],
-        shell=True,
-    )
-
-# Pulls the list of provided metrics from Sysdig for the given time range
-def get_metrics(test_name, metrics_to_collect, filter, start = -600, end = 0):
-    # Specify the ID for keys, and ID with aggregation for values
-    metrics = [{"id": "kube_workload_name"}] + [{"id": metric, "aggregations": aggregations} for metric, aggregations in metrics_to_collect.items()]
+    load_runner.load_test(log_file, thread_count, duration, ramp, delay)
 
-    # Sampling time:
-    #  - for time series: sampling is equal to the "width" of each data point (expressed in seconds)
-    #  - for aggregated data (similar to bar charts, pie charts, tables, etc.): sampling is equal to 0
-    sampling = 10
+# Sampling time:
+#  - for time series: sampling is equal to the "width" of each data point (expressed in seconds)
+#  - for aggregated data (similar to bar charts, pie charts, tables, etc.): sampling is equal to 0
+sampling = 10
 
-    if (start < 0 and (start / (-sampling)) > 600):
-        # Fail because we can't pull more than 600 samples at a time from Sysdig
-        print(f"Last {start} divided by sampling {sampling} can not be greater than 600: Last is too big")
-        return
+# Pulls the list of provided metrics from Sysdig for the given time range.
+# Windows longer than 600 samples are split and pulled concurrently.
+def get_metrics(test_name, metrics_to_collect, filter, start = -600, end = 0):
+    metrics = build_metrics_query(metrics_to_collect)
 
     # Load data
-    ok, res = sdclient.get_data(metrics, start, end, sampling, filter=filter)
+    ok, res = fetch(sdclient, metrics, filter, start, end, sampling)
 
     if ok:
         write_result(test_name, metrics_to_collect, res)
     else:
         print(f"Failed to pull metrics: {res}")
 
-def get_all_metrics(name, start, end):
-    for filter, metrics_group in metrics_to_collect.items():
-        get_metrics(name, metrics_group, filter, start, end)
+# Pulls every group of metrics at once, one concurrent query per filter
+# (see write_result for `run` and `csv_output`)
+def get_all_metrics(name, start, end, run = None, csv_output = None):
+    queries = {filter: build_metrics_query(metrics_group) for filter, metrics_group in metrics_to_collect.items()}
+    results = fetch_all(sdclient, queries, start, end, sampling)
+
+    for filter, (ok, res) in results.items():
+        if ok:
+            write_result(name, metrics_to_collect[filter], res, run, csv_output)
+        else:
+            print(f"Failed to pull metrics: {res}")
+
+# Pulls the metrics of a finished scenario over its absolute time range
+def collect_metrics(name, parameters, start, end):
+    get_all_metrics(name, start = start, end = end)
 
+# Scenarios run back to back, the metrics of a scenario being pulled
+# while the next one is already running
 def main():
-    for name, parameters in run_parameters.items():
-        thread_count = parameters['thread_count']
-        duration = parameters['duration']
-        ramp = parameters['ramp']
-        delay = parameters['delay']
-        load_test(thread_count = thread_count, duration = duration, ramp = ramp, delay = delay)
-        get_all_metrics(name, start = -duration, end = 0)
+    load_runner.run_scenarios(run_parameters, collect = collect_metrics, guard = run_guard.RunGuard)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
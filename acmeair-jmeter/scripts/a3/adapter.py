@@ -1,281 +1,402 @@
 import csv
-import os
-import statistics
+import sys
+import threading
 import time
 import openshift as oc
 from collections import defaultdict
-from sdcclient import IbmAuthHelper, SdMonitorClient
-
-# Add the monitoring instance information that is required for authentication
-URL = "https://ca-tor.monitoring.cloud.ibm.com"
-APIKEY = os.environ['IBMCLOUD_API_KEY']
-GUID = "b92c514a-ca21-4548-b3f0-4d6391bab407"
-ibm_headers = IbmAuthHelper.get_headers(URL, APIKEY, GUID)
-# Instantiate the Python client
-sdclient = SdMonitorClient(sdc_url=URL, custom_headers=ibm_headers)
-
-metric_types = {
-    'latency': 'sysdig_container_net_http_request_time',
-    'error_rate': 'sysdig_container_net_http_statuscode_request_count',
-    "cpu_used": "sysdig_container_cpu_used_percent",
-    "memory_used": "sysdig_container_memory_used_percent",
-}
+
+import scripts_path
+import executor
+import metric_frame
+import quantities
+import rollout
+import sysdig_client
+from sysdig_cache import CachedClient
+from sysdig_fetcher import NAMESPACE_WORKLOAD_KEYS, WORKLOAD_KEYS, build_metrics_query, fetch, fetch_all
+import sysdig_filters
+import forecast
+import instrumentation
+import planner
+import policy
+from window_store import WindowStore
+
+# Phase timings and API usage of every iteration of the MAPE loop
+mape_metrics = instrumentation.Instrumentation()
+
+# Only the calls reaching Sysdig (not served by the cache) are counted
+sdclient = CachedClient(instrumentation.InstrumentedClient(sysdig_client.get_client(), mape_metrics))
+
+# Cluster API, counting selector and apply calls
+cluster = instrumentation.InstrumentedOpenShift(oc, mape_metrics)
+
+metric_types = policy.metric_types
 standard_metrics = {
     "sysdig_container_net_http_request_time" : {"group": "avg"},
+    "sysdig_container_net_http_request_count" : {"group": "sum"},
     "sysdig_container_cpu_used_percent" : {"group": "avg"},
     "sysdig_container_memory_used_percent" : {"group": "avg"},
 }
 status_code_metrics = {
     "sysdig_container_net_http_statuscode_request_count": {"group": "avg"},
 }
-metrics_to_collect = {
-    "kube_namespace_name = 'acmeair-g2'": standard_metrics,
-    "kube_namespace_name = 'acmeair-g2' and net_http_statuscode in ('503', '502', '500', '400', '401', '403')": status_code_metrics,
-}
 
-configurations = {
-    'c1': { 'cpu': '250m', 'memory': '250Mi', 'pod_count': 1},
-    'c2': { 'cpu': '250m', 'memory': '500Mi', 'pod_count': 1},
-    'c3': { 'cpu': '250m', 'memory': '500Mi', 'pod_count': 2},
-}
+# Metric groups to pull for the given namespaces, by Sysdig filter
+def build_metrics_to_collect(namespaces):
+    return {
+        sysdig_filters.namespace_filter(namespaces): standard_metrics,
+        sysdig_filters.status_code_filter(namespaces): status_code_metrics,
+    }
 
-configuration_maps = {
-    '250mx250Mix1': 'c1',
-    '250mx500Mix1': 'c2',
-    '250mx500Mix2': 'c3',
-}
+# Namespace adapted by main(), see fanout.py to adapt several at once
+namespace = 'acmeair-g2'
+metrics_to_collect = build_metrics_to_collect([namespace])
 
 service_list = ['acmeair-bookingservice','acmeair-customerservice','acmeair-flightservice','acmeair-authservice','acmeair-mainservice']
 
-# Preprocesses metric results and writes them a CSV file
-# in the output folder
-def group_metric_result(index, res):
-    samples = res['data']
-
-    processed_samples = defaultdict(list)
+# Reshapes Sysdig metric results into a timestamp x service x metric frame
+# that every metric of the group reads from. Results grouped by namespace and
+# workload (key_count 2) are keyed by 'namespace/workload'.
+def group_metrics_by_service(metrics_to_collect, res, key_count = 1):
+    return metric_frame.from_result(res, metrics_to_collect, key_count)
 
-    for sample in samples:
-        data = sample['d']
-        processed_samples[data[0]].append(data[index + 1])
-
-    return dict(processed_samples)
-
-# Preprocesses Sysdig metric results and write a CSV file
-# with the metric results for each metric.
-def group_metrics_by_service(metrics_to_collect, res):
-    by_service = defaultdict()
-    for i, metric in enumerate(metrics_to_collect):
-        by_service[metric] = group_metric_result(i, res)
-
-    return dict(by_service)
+# Sampling time:
+#  - for time series: sampling is equal to the "width" of each data point (expressed in seconds)
+#  - for aggregated data (similar to bar charts, pie charts, tables, etc.): sampling is equal to 0
+sampling = 10
 
 # Pulls the list of provided metrics from Sysdig for the given time range
 def get_metrics(metrics_group, filter, start = -600, end = 0):
-    # Specify the ID for keys, and ID with aggregation for values
-    metrics = [{"id": "kube_workload_name"}] + [{"id": metric, "aggregations": aggregations} for metric, aggregations in metrics_group.items()]
-
-    # Sampling time:
-    #  - for time series: sampling is equal to the "width" of each data point (expressed in seconds)
-    #  - for aggregated data (similar to bar charts, pie charts, tables, etc.): sampling is equal to 0
-    sampling = 10
-
-    if (start < 0 and (start / (-sampling)) > 600):
-        # Fail because we can't pull more than 600 samples at a time from Sysdig
-        print(f"Last {start} divided by sampling {sampling} can not be greater than 600: Last is too big")
-        return
+    metrics = build_metrics_query(metrics_group)
 
     # Load data
-    ok, res = sdclient.get_data(metrics, start, end, sampling, filter=filter)
+    ok, res = fetch(sdclient, metrics, filter, start, end, sampling)
 
     if ok:
         return group_metrics_by_service(metrics_group, res)
     else:
         print(f"Failed to pull metrics: {res}")
 
-def get_all_metrics(start, end):
-    res = {}
-    for filter, metrics_group in metrics_to_collect.items():
-        res = res | get_metrics(metrics_group, filter, start, end)
-
-    return res
-
-def compute_mean_by_service(metrics, dim, services):
-    values = defaultdict(list) | metrics[metric_types[dim]]
-    mean_by_service = {}
-    for service in services:
-        mean = 0
-        if (len(values[service]) == 0):
-            mean = 0
-        else:
-            mean = statistics.mean(values[service])
-        mean_by_service[service] = mean
-
-    return mean_by_service
-
-latency_weight = 0.65
-error_rate_weight = 0.35
-
-def latency_to_preference(latency):
-    if latency < 1000:
-        return 1
-    if 1000 <= latency < 3000:
-        return 0.5
-    if 3000 <= latency < 5000:
-        return 0.2
-    if latency > 5000:
-        return 0
-
-def rate_error_count_to_preference(rate_error_count):
-    if rate_error_count < 1:
-        return 1
-    if 1 <= rate_error_count < 3:
-        return 0.5
-    if rate_error_count > 3:
-        return 0
-
-def compute_utility_function_by_service(means_by_services):
-    utility_by_service = {}
-    for service, values in means_by_services.items():
-        wP, pP = latency_weight, latency_to_preference(values['latency'])
-        wE, pE = error_rate_weight, rate_error_count_to_preference(values['error_rate'])
-        utility = (wP * pP) + (wE * pE)
-        utility_by_service[service] = utility
-
-    return utility_by_service
-
-def find_next_configuration(cur_cpu, cur_memory, cur_pod_count, down_scale = False):
-    config_key = f'{cur_cpu}x{cur_memory}x{cur_pod_count}'
-    if config_key in configuration_maps:
-        current_config = configuration_maps[f'{cur_cpu}x{cur_memory}x{cur_pod_count}']
-    else:
-        current_config = None
-
-    next_configuration = None
-    if down_scale == False:
-        if current_config == 'c1':
-            next_configuration = configurations['c2']
-        elif current_config == 'c2':
-            next_configuration = configurations['c3']
-        else:
-            next_configuration = { 'cpu': '250m' , 'memory': '500Mi' , 'pod_count': cur_pod_count*2 }
-
-        if next_configuration and  next_configuration != current_config:
-            print('Upscaling....')
+# Pulls every group of metrics concurrently, one query per filter.
+# Given `namespaces`, every query covers all of them and the services of the
+# frame are keyed by 'namespace/workload' (see metric_frame.split_keys).
+def get_all_metrics(start, end, namespaces = None):
+    if namespaces is None:
+        groups, keys = metrics_to_collect, WORKLOAD_KEYS
     else:
-        if current_config == 'c1':
-            next_configuration = None
-        elif current_config == 'c2':
-            next_configuration = configurations['c1']
-        elif current_config == 'c3':
-            next_configuration = configurations['c2']
+        groups, keys = build_metrics_to_collect(namespaces), NAMESPACE_WORKLOAD_KEYS
+    queries = {filter: build_metrics_query(metrics_group, keys) for filter, metrics_group in groups.items()}
+    results = fetch_all(sdclient, queries, start, end, sampling)
+
+    frames = []
+    for filter, (ok, filter_res) in results.items():
+        if ok:
+            frames.append(group_metrics_by_service(groups[filter], filter_res, len(keys)))
         else:
-            next_configuration = { 'cpu': '250m' , 'memory': '500Mi' , 'pod_count': cur_pod_count/2 }
-
-        if next_configuration and next_configuration != current_config:
-            print('Downscaling....')
+            print(f"Failed to pull metrics: {filter_res}")
 
-    return next_configuration
+    return metric_frame.join(frames)
 
+def compute_mean_by_service(metrics, dim, services):
+    return metrics.means(metric_types[dim], services)
 
-def plan(service, down_scale = False):
-    obj = oc.selector(f'deployment.apps/{service}').object()
-    limits = obj.model['spec']['template']['spec']['containers'][0]['resources']['limits']
-    current_cpu, current_memory = limits['cpu'], limits['memory']
-    current_pod_count = obj.model['spec']['replicas']
+def plan(service, down_scale = False, obj = None):
+    if obj is None:
+        obj = cluster.selector(f'deployment.apps/{service}').object()
+    current_cpu, current_memory, current_pod_count = executor.current_configuration(obj)
 
     # print(f'Current configuration for service {service}')
     # print(f'current cpu: {current_cpu}')
     # print(f'current memory: {current_memory}')
     # print(f'current pod count: {current_pod_count}')
 
-    return find_next_configuration(current_cpu, current_memory, current_pod_count, down_scale)
-
-def apply_resources(obj, plan):
-    obj.model['spec']['template']['spec']['containers'][0]['resources']['requests']['memory'] = plan["memory"]
-    obj.model['spec']['template']['spec']['containers'][0]['resources']['limits']['memory'] = plan["memory"]
-    obj.model['spec']['template']['spec']['containers'][0]['resources']['requests']['cpu'] = plan["cpu"]
-    obj.model['spec']['template']['spec']['containers'][0]['resources']['limits']['cpu'] = plan["cpu"]
-    obj.model['spec']['replicas'] = plan["pod_count"]
-    obj.apply()
-
-def execute(service, execution_plan):
-    obj = oc.selector(f'deployment.apps/{service}').object()
+    return policy.find_next_configuration(current_cpu, current_memory, current_pod_count, down_scale)
 
-    print(f"Executing adaption for service {service} - new configuration: {execution_plan}")
+# Applies the execution plans (service -> plan) in parallel to the deployments
+# of a snapshot and reports how long each one took
+def execute_all(execution_plans, objects, state = None):
+    state = state or default_state
+    for service, execution_plan in execution_plans.items():
+        print(f"Executing adaption for service {service} - new configuration: {execution_plan}")
 
-    apply_resources(obj, execution_plan)
+    latencies = executor.execute_plans(execution_plans, objects, executor.apply_resources)
 
-    print("Adaptation completed")
-
-    return
+    for service, latency in latencies.items():
+        if isinstance(latency, Exception):
+            print(f"Adaptation failed for service {service}: {latency}")
+        else:
+            state.current_configurations[service] = execution_plans[service]
+            state.stable_since.pop(service, None)
+            print(f"Adaptation completed for service {service} in {latency:.2f}s")
 
+    return latencies
 
-def initialize_services(service_list, configuration):
+def initialize_services(service_list, configuration, state = None):
     print("Initializing resources for all services")
-    for service in service_list:
-        execute(service, configuration)
-
-def adapt(start, end):
-    metrics_grouped_by_service = get_all_metrics(start, end)
+    objects = executor.snapshot(service_list, cluster)
+    execute_all({service: configuration for service in service_list}, objects, state)
+
+# 'model' jumps directly to the configuration predicted by the performance
+# model once it has learnt enough about a service, 'step' only moves along
+# c1 -> c2 -> c3
+planner_mode = 'model'
+
+# Performance model of every service, learnt from the recorded adaptation
+# cycles. It is shared by the control loops of all the namespaces, which run
+# replicas of the same services, and only used under model_lock.
+performance_model = planner.PerformanceModel()
+model_lock = threading.Lock()
+
+# Records the metric means of a service for the performance model once per
+# adaptation cycle: at the first tick after its configuration is stable
+# whose window only holds samples of that configuration
+def record_observations(means_by_service, state = None):
+    state = state or default_state
+    observations = {}
+    for service, means in means_by_service.items():
+        stable_since = state.stable_since.get(service)
+        if stable_since is None or service not in state.current_configurations:
+            continue
+        timestamps = state.window_store.timestamps(metric_types['latency'], service)
+        if len(timestamps) == 0 or timestamps[0] < stable_since:
+            continue
+        del state.stable_since[service]
+
+        configuration = state.current_configurations[service]
+        observation = {
+            'timestamp': int(time.time()),
+            'cpu': configuration['cpu'],
+            'memory': configuration['memory'],
+            'pod_count': configuration['pod_count'],
+            'request_rate': means['request_rate'],
+            'latency': means['latency'],
+            'error_rate': means['error_rate'],
+        }
+        observations[service] = observation
+
+    with model_lock:
+        for service, observation in observations.items():
+            performance_model.add(service, observation['cpu'], observation['memory'], observation['pod_count'], observation['request_rate'], observation['latency'], observation['error_rate'])
+        if observations:
+            planner.record(observations)
+
+# Turns the configuration chosen by the performance model into an execution plan.
+# Returns None when the model has no choice, or when its choice is the current
+# configuration or goes the opposite way of the requested scaling: the
+# step planner is used instead.
+def model_plan(service, down_scale, obj, choice):
+    if choice is None:
+        return None
+
+    cpu, memory, pod_count = executor.current_configuration(obj)
+    current_cost = quantities.configuration_cost({'cpu': cpu, 'memory': memory, 'pod_count': pod_count})
+    choice_cost = quantities.configuration_cost(policy.configurations[choice])
+    if choice_cost == current_cost or (choice_cost > current_cost) == down_scale:
+        return None
+
+    print(f"Model planner: moving service {service} to {choice}")
+    return policy.configurations[choice]
+
+# Scale services up ahead of a utility breach projected `forecast_horizon`
+# seconds ahead from the trend of the last `forecast_window` seconds
+predictive_scaling = True
+forecast_horizon = 120
+forecast_window = 300
+forecast_method = 'holt'
+
+# State of the control loop of one namespace: sliding windows of the metrics
+# of its services, fed incrementally at every tick, the configuration
+# currently applied to every service, and since when the services not
+# recorded yet for the performance model are stable.
+#
+# `refresh` (start, end) -> WindowStore replaces the fetch of monitor(), e.g.
+# to consume the batches of the shared monitor of fanout.py.
+class ControlState:
+    def __init__(self, namespace, services, metrics = None, refresh = None):
+        self.namespace = namespace
+        self.services = services
+        self.metrics = metrics or instrumentation.Instrumentation(
+            f'output/mape_metrics_{namespace}.jsonl', f'output/mape_metrics_{namespace}.prom')
+        self.refresh = refresh
+        self.window_store = WindowStore(window=60)
+        self.forecast_store = WindowStore(window=forecast_window)
+        self.current_configurations = {}
+        self.stable_since = {}
+
+    # Adds a frame of the services of the namespace to the windows
+    def ingest(self, frame, now):
+        self.window_store.ingest(frame)
+        self.window_store.expire(now)
+        self.forecast_store.ingest(frame)
+        self.forecast_store.expire(now)
+
+# State of the namespace adapted by main()
+default_state = ControlState(namespace, service_list, mape_metrics)
+window_store = default_state.window_store
+forecast_store = default_state.forecast_store
+current_configurations = default_state.current_configurations
+
+# Updates the window stores with the samples they do not have yet
+def monitor(start, end, state = None):
+    state = state or default_state
+    if state.refresh is not None:
+        return state.refresh(start, end)
+
+    now = int(time.time())
+    metrics = get_all_metrics(state.window_store.fetch_start(start, now), end)
+    state.ingest(metrics, now + end)
+
+    return state.window_store
+
+# Forecasts the means of every service forecast_horizon seconds ahead.
+# The request rate is extrapolated from its trend. Latency and error rate are
+# predicted at that request rate by the performance model when it knows the
+# service, and extrapolated from their own trend otherwise.
+def forecast_means(means_by_service, state = None):
+    state = state or default_state
+    forecasts = {}
+    for service, means in means_by_service.items():
+        forecasted = dict(means)
+        for dim in ('request_rate', 'latency', 'error_rate'):
+            metric = metric_types[dim]
+            value = forecast.forecast(state.forecast_store.timestamps(metric, service), state.forecast_store.values(metric, service), forecast_horizon, forecast_method)
+            if value is not None:
+                forecasted[dim] = value / (10 ** 6) if dim == 'latency' else value
+
+        with model_lock:
+            if performance_model.ready(service) and service in state.current_configurations:
+                configuration = state.current_configurations[service]
+                latency, error_rate = performance_model.predict(
+                    service, forecasted['request_rate'],
+                    quantities.parse_cpu(configuration['cpu']), quantities.parse_memory(configuration['memory']), configuration['pod_count'],
+                )
+                forecasted['latency'], forecasted['error_rate'] = float(latency), float(error_rate)
+
+        forecasts[service] = forecasted
+
+    return forecasts
+
+# Returns the list of adapted services
+def adapt(start, end, state = None):
+    state = state or default_state
+    state.metrics.phase('monitor')
+    window_store = monitor(start, end, state)
+
+    state.metrics.phase('analyze')
 
     # Get services
-    services = []
-    for _, metrics in metrics_grouped_by_service.items():
-        for service, _ in metrics.items():
-            if service not in services and service in service_list:
-                services.append(service)
+    services = [service for service in window_store.services() if service in state.services]
 
+    # Compute the mean of every metric by service, any of them may be scored
+    # by the utility function
     means_by_service = defaultdict(dict)
+    for dim in metric_types:
+        mean_by_service = compute_mean_by_service(window_store, dim, services)
+        for service in services:
+            # Latency in ms
+            means_by_service[service][dim] = mean_by_service[service] / (10 ** 6) if dim == 'latency' else mean_by_service[service]
+    cpu_used_mean_by_service = {service: means_by_service[service]['cpu_used'] for service in services}
+    request_rate_mean_by_service = {service: means_by_service[service]['request_rate'] for service in services}
 
-    # Compute latency mean by service
-    latency_mean_by_service = compute_mean_by_service(metrics_grouped_by_service, 'latency', services)
-    for service in services:
-        means_by_service[service]['latency'] = (latency_mean_by_service[service] / (10 ** 6))
-
-    # Compute error rate mean by service
-    error_rate_mean_by_service = compute_mean_by_service(metrics_grouped_by_service, 'error_rate', services)
-    for service in services:
-        means_by_service[service]['error_rate'] = error_rate_mean_by_service[service]
+    record_observations(means_by_service, state)
 
-    cpu_used_mean_by_service = compute_mean_by_service(metrics_grouped_by_service, 'cpu_used', services)
-    for service in services:
-        means_by_service[service]['cpu_used'] = error_rate_mean_by_service[service]
-
-    should_wait = False
     # Compute utility function by service
-    utilities_by_service = compute_utility_function_by_service(means_by_service)
+    utilities_by_service = policy.compute_utility_function_by_service(means_by_service)
     for service in services:
         print(f"\n\nAttempting to adapt service {service}")
-        utility = utilities_by_service[service]
-        print(f'\nUtiliy value: {utility}')
-
-        if utility == 1 and cpu_used_mean_by_service[service] < 5:
-            execution_plan = plan(service, down_scale=True)
-            if execution_plan:
-                execute(service, execution_plan)
-                should_wait = True
-            continue
-        elif utility < 0.7:
-            execution_plan = plan(service)
-            if execution_plan:
-                execute(service, execution_plan)
-                should_wait = True
-            continue
-        else:
-            continue
+        print(f'\nUtiliy value: {utilities_by_service[service]}')
+    down_scale_by_service = policy.scaling_decisions(utilities_by_service, cpu_used_mean_by_service)
+
+    # Plan for the load expected by the time the new configuration is rolled out
+    request_rates = dict(request_rate_mean_by_service)
+    if predictive_scaling:
+        forecasts = forecast_means(means_by_service, state)
+        forecast_utilities = policy.compute_utility_function_by_service(forecasts)
+        for service in services:
+            request_rates[service] = max(request_rates[service], forecasts[service]['request_rate'])
+            if forecast_utilities[service] >= policy.upscale_utility_threshold:
+                continue
+            if service not in down_scale_by_service:
+                print(f"Forecast utility of service {service} in {forecast_horizon}s: {forecast_utilities[service]}, upscaling ahead")
+                down_scale_by_service[service] = False
+            elif down_scale_by_service[service]:
+                # Do not release capacity that the forecast load needs
+                del down_scale_by_service[service]
+
+    # Plan from a single read of all the deployments to adapt,
+    # then apply the plans in parallel
+    state.metrics.phase('plan')
+    objects = executor.snapshot(list(down_scale_by_service), cluster)
+    model_choices = {}
+    if planner_mode == 'model':
+        with model_lock:
+            model_choices = planner.choose_configurations(
+                performance_model, policy.utility_function,
+                {service: request_rates[service] for service in down_scale_by_service},
+                policy.configurations, policy.upscale_utility_threshold, means_by_service,
+            )
+
+    execution_plans = {}
+    for service, down_scale in down_scale_by_service.items():
+        execution_plan = model_plan(service, down_scale, objects[service], model_choices.get(service))
+        if execution_plan is None:
+            execution_plan = plan(service, down_scale, objects[service])
+        if execution_plan:
+            execution_plans[service] = execution_plan
+
+    state.metrics.phase('execute')
+    latencies = execute_all(execution_plans, objects, state)
+
+    return [service for service, latency in latencies.items() if not isinstance(latency, Exception)]
+
+# Maximum time to wait for services to be stable at startup and after an adaptation
+startup_timeout = 180
+adaptation_timeout = 360
+
+# Also wait for the latency of the adapted services to settle after their rollout
+wait_for_metrics = True
+
+# Waits until the deployments of the given services are rolled out and,
+# optionally, their latency has settled, for at most `timeout` seconds.
+# Their metrics are observed for the performance model from then on.
+def wait_until_stable(services, timeout, state = None):
+    state = state or default_state
+    start = time.time()
+    rollout.wait_for_rollout(services, cluster, timeout)
+    if wait_for_metrics:
+        remaining = timeout - (time.time() - start)
+        if remaining > 0:
+            rollout.wait_for_settle(lambda: monitor(-60, 0, state), services, metric_types['latency'], remaining)
+    print(f"Services stable after {time.time() - start:.0f}s")
+    for service in services:
+        state.stable_since[service] = time.time()
 
-    return should_wait
+# Applies configuration `name` to every service and waits for it to roll out
+def configure(name):
+    initialize_services(service_list, policy.configurations[name])
+    wait_until_stable(service_list, startup_timeout)
 
+# Runs the adaptation loop, or with `configure <name>` only applies a
+# configuration to every service (see sweep.py)
 def main():
-    initialize_services(service_list, configurations['c1'])
-    time.sleep(180)
+    if len(sys.argv) > 2 and sys.argv[1] == 'configure':
+        configure(sys.argv[2])
+        return
+
+    performance_model.load()
+    initialize_services(service_list, policy.configurations['c1'])
+    wait_until_stable(service_list, startup_timeout)
     while True:
         print("Starting adaptation loop")
-        should_wait = adapt(start = -60, end = 0)
-        if should_wait == True:
-            time.sleep(360)
+        mape_metrics.start_tick()
+        adapted_services = adapt(start = -60, end = 0)
+        mape_metrics.count('adapted_services', len(adapted_services))
+
+        mape_metrics.phase('wait')
+        if adapted_services:
+            wait_until_stable(adapted_services, adaptation_timeout)
         else:
             time.sleep(10)
+        mape_metrics.end_tick()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,4 +1,5 @@
-import subprocess
+import scripts_path
+import load_runner
 
 run_parameters = {
     "TEST_LOW_LOAD": {"thread_count": 150, "duration": 900, "ramp": 25, "delay": 0},
@@ -8,21 +9,12 @@ run_parameters = {
 
 # Performs a JMeter load test with the given parameters
 def load_test(log_file='output_logs.txt', thread_count=60, duration=600, ramp=30, delay=0):
-    subprocess.call(
-        [
-            f'./apache-jmeter-5.6.2/bin/jmeter -n -t ./AcmeAir-microservices-mpJwt.jmx -DusePureIDs=true  -j logs/{log_file} -JTHREAD={thread_count} -JUSER=999 -JDURATION={duration} -JRAMP={ramp} -JDELAY=0'
-        ],
-        shell=True,
-    )
+    load_runner.load_test(log_file, thread_count, duration, ramp, delay)
 
 
+# Scenarios may set "workers" to spread their threads across several JMeter processes
 def main():
-    for name, parameters in run_parameters.items():
-        thread_count = parameters['thread_count']
-        duration = parameters['duration']
-        ramp = parameters['ramp']
-        delay = parameters['delay']
-        load_test(thread_count=thread_count, duration=duration, ramp=ramp, delay=delay)
+    load_runner.run_scenarios(run_parameters)
 
 
 if __name__ == '__main__':
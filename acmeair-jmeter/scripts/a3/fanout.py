@@ -0,0 +1,130 @@
+import sys
+import threading
+import time
+
+import scripts_path
+import adapter
+import metric_frame
+import policy
+
+# Namespaces of the AcmeAir replicas under test, all adapted from this process
+namespaces = ['acmeair-g1', 'acmeair-g2', 'acmeair-g3']
+
+# Services adapted in every namespace
+services = adapter.service_list
+
+# Seconds between two batches of the shared monitor
+monitor_interval = 10
+
+# Batches kept for a control loop that does not consume them, e.g. while it
+# waits for a rollout: enough to refill its forecast window
+max_pending = adapter.forecast_window // monitor_interval
+
+# Fetches the metrics of all the namespaces in a single batch of queries
+# (grouped by namespace and workload) every `interval` seconds, instead of
+# every control loop polling Sysdig on its own.
+#
+# Every batch is split by namespace and queued for the control loop of the
+# namespace, which ingests the queued frames into its own windows when it
+# refreshes: the windows are only ever touched by the thread of their loop.
+class SharedMonitor:
+    def __init__(self, states, interval = monitor_interval, window = 60):
+        self.states = {state.namespace: state for state in states}
+        self.interval = interval
+        self.window = window
+        self.pending = {namespace: [] for namespace in self.states}
+        self.last_timestamp = None
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+
+        for state in states:
+            state.refresh = lambda start, end, state = state: self.refresh(state)
+
+    # Fetches one batch: the samples since the last batch (included, as
+    # Sysdig may have updated it since), or the whole window at first
+    def poll(self):
+        now = int(time.time())
+        start = -self.window if self.last_timestamp is None else min(max(-self.window, self.last_timestamp - now), 0)
+
+        adapter.mape_metrics.start_tick()
+        adapter.mape_metrics.phase('monitor')
+        frame = adapter.get_all_metrics(start, 0, list(self.states))
+        adapter.mape_metrics.end_tick()
+
+        if len(frame.timestamps):
+            self.last_timestamp = int(frame.timestamps[-1])
+        frames = metric_frame.split_keys(frame)
+
+        with self.condition:
+            for namespace, pending in self.pending.items():
+                pending.append((frames.get(namespace, metric_frame.empty_frame()), now))
+                del pending[:-max_pending]
+            self.condition.notify_all()
+
+    def run(self):
+        while not self.stopped.is_set():
+            started = time.time()
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Failed to pull metrics: {e}")
+            self.stopped.wait(max(self.interval - (time.time() - started), 0))
+
+    def stop(self):
+        self.stopped.set()
+        with self.condition:
+            self.condition.notify_all()
+
+    # Ingests the batches queued for the namespace of `state`, waiting for the
+    # next one when there is none. Returns the window store of the namespace.
+    def refresh(self, state):
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending[state.namespace] or self.stopped.is_set(), timeout=2 * self.interval)
+            batches, self.pending[state.namespace] = self.pending[state.namespace], []
+
+        for frame, now in batches:
+            state.ingest(frame, now)
+
+        return state.window_store
+
+# MAPE loop of one namespace. Runs in its own thread, in the project of its
+# namespace (openshift contexts are per thread), and is paced by the batches
+# of the shared monitor.
+def control_loop(state, stopped):
+    with adapter.cluster.project(state.namespace):
+        adapter.initialize_services(state.services, policy.configurations['c1'], state)
+        adapter.wait_until_stable(state.services, adapter.startup_timeout, state)
+        while not stopped.is_set():
+            print(f"Starting adaptation loop of namespace {state.namespace}")
+            state.metrics.start_tick()
+            adapted_services = adapter.adapt(start = -60, end = 0, state = state)
+            state.metrics.count('adapted_services', len(adapted_services))
+
+            state.metrics.phase('wait')
+            if adapted_services:
+                adapter.wait_until_stable(adapted_services, adapter.adaptation_timeout, state)
+            state.metrics.end_tick()
+
+# Adapts the services of several namespaces from one process, e.g.
+# python a3/fanout.py acmeair-g1 acmeair-g2
+def main():
+    selected = sys.argv[1:] or namespaces
+
+    adapter.performance_model.load()
+    states = [adapter.ControlState(namespace, services) for namespace in selected]
+    monitor = SharedMonitor(states)
+
+    threads = [threading.Thread(target=monitor.run, daemon=True)]
+    threads += [threading.Thread(target=control_loop, args=(state, monitor.stopped), daemon=True) for state in states]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while any(thread.is_alive() for thread in threads[1:]):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("Stopping the control loops")
+    monitor.stop()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+
+# Smoothing factors of the level and the trend of Holt's method
+ALPHA = 0.5
+BETA = 0.3
+
+# Minimum number of samples needed to extrapolate a trend
+MIN_SAMPLES = 3
+
+# Holt's linear trend method (double exponential smoothing) over evenly
+# spaced values. Returns the final (level, trend per step).
+def holt(values, alpha = ALPHA, beta = BETA):
+    level, trend = values[0], values[1] - values[0]
+    for value in values[1:]:
+        previous_level = level
+        level = alpha * value + (1 - alpha) * (level + trend)
+        trend = beta * (level - previous_level) + (1 - beta) * trend
+
+    return level, trend
+
+# Least squares line through the samples. Returns (slope, intercept).
+def linear_trend(timestamps, values):
+    slope, intercept = np.polyfit(np.asarray(timestamps, dtype=float), np.asarray(values, dtype=float), 1)
+    return slope, intercept
+
+# Forecasts the value of a series `horizon` seconds after its last sample,
+# never below 0. Returns None when the series is too short.
+# `method` is 'holt' (samples are assumed evenly spaced) or 'linear'.
+def forecast(timestamps, values, horizon, method = 'holt'):
+    if len(values) < MIN_SAMPLES:
+        return None
+
+    if method == 'linear':
+        slope, intercept = linear_trend(timestamps, values)
+        return max(slope * (timestamps[-1] + horizon) + intercept, 0)
+
+    step = (timestamps[-1] - timestamps[0]) / (len(timestamps) - 1)
+    level, trend = holt(values)
+    return max(level + trend * horizon / step, 0) if step > 0 else max(level, 0)
@@ -0,0 +1,210 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+import numpy as np
+
+METRICS_FILE = 'output/mape_metrics.jsonl'
+# Prometheus text format, e.g. for the textfile collector of node_exporter
+PROMETHEUS_FILE = 'output/mape_metrics.prom'
+
+# Timings and API usage of the MAPE loop of the adapter.
+#
+# Every loop iteration is a tick made of consecutive phases (monitor,
+# analyze, plan, execute, wait): phase() ends the current phase and starts
+# the next one. Counters (API calls, bytes fetched, ...) are added to the
+# current tick from any thread. end_tick() appends the tick as a JSON line
+# to `path` and rewrites the cumulative totals in `prometheus_path`.
+class Instrumentation:
+    def __init__(self, path = METRICS_FILE, prometheus_path = PROMETHEUS_FILE):
+        self.path = path
+        self.prometheus_path = prometheus_path
+        self.tick = None
+        self.current_phase = None
+        self.phase_start = None
+        self.phase_totals = defaultdict(lambda: [0, 0.0])
+        self.last_phases = {}
+        self.counter_totals = defaultdict(float)
+        self.tick_count = 0
+        self.lock = threading.Lock()
+
+    def start_tick(self):
+        with self.lock:
+            self.tick = {'timestamp': time.time(), 'phases': {}, 'counters': defaultdict(float)}
+            self.tick_start = time.perf_counter()
+            self.current_phase = None
+
+    def end_phase(self):
+        if self.current_phase is None:
+            return
+        duration = time.perf_counter() - self.phase_start
+        self.tick['phases'][self.current_phase] = self.tick['phases'].get(self.current_phase, 0) + duration
+        self.phase_totals[self.current_phase][0] += 1
+        self.phase_totals[self.current_phase][1] += duration
+        self.last_phases[self.current_phase] = duration
+        self.current_phase = None
+
+    def phase(self, name):
+        with self.lock:
+            if self.tick is None:
+                return
+            self.end_phase()
+            self.current_phase = name
+            self.phase_start = time.perf_counter()
+
+    def count(self, name, value = 1):
+        with self.lock:
+            self.counter_totals[name] += value
+            if self.tick is not None:
+                self.tick['counters'][name] += value
+
+    def end_tick(self):
+        with self.lock:
+            if self.tick is None:
+                return None
+            self.end_phase()
+            tick, self.tick = self.tick, None
+            tick['duration'] = time.perf_counter() - self.tick_start
+            self.tick_count += 1
+
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(tick) + '\n')
+        self.write_prometheus()
+
+        return tick
+
+    def write_prometheus(self):
+        with self.lock:
+            lines = [
+                '# HELP adapter_ticks_total Iterations of the MAPE loop.',
+                '# TYPE adapter_ticks_total counter',
+                f'adapter_ticks_total {self.tick_count}',
+                '# HELP adapter_phase_seconds Time spent in every phase of the MAPE loop.',
+                '# TYPE adapter_phase_seconds summary',
+            ]
+            for phase, (count, total) in self.phase_totals.items():
+                lines.append(f'adapter_phase_seconds_sum{{phase="{phase}"}} {total}')
+                lines.append(f'adapter_phase_seconds_count{{phase="{phase}"}} {count}')
+            lines += ['# HELP adapter_last_phase_seconds Duration of every phase in the last tick.', '# TYPE adapter_last_phase_seconds gauge']
+            for phase, duration in self.last_phases.items():
+                lines.append(f'adapter_last_phase_seconds{{phase="{phase}"}} {duration}')
+            lines += ['# HELP adapter_events_total API calls and bytes of the MAPE loop.', '# TYPE adapter_events_total counter']
+            for name, value in self.counter_totals.items():
+                lines.append(f'adapter_events_total{{event="{name}"}} {value}')
+
+        # Written aside and renamed so a scraper never reads half a file
+        with open(self.prometheus_path + '.tmp', 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(self.prometheus_path + '.tmp', self.prometheus_path)
+
+# Counts the get_data calls that reach Sysdig and the bytes they return
+class InstrumentedClient:
+    def __init__(self, client, instrumentation):
+        self.client = client
+        self.instrumentation = instrumentation
+        self.hooked = False
+
+    def count_bytes(self, response, *args, **kwargs):
+        self.instrumentation.count('sysdig_bytes', len(response.content))
+
+    def get_data(self, *args, **kwargs):
+        if not self.hooked:
+            # Response sizes are read from the requests session of sdcclient
+            http = getattr(self.client, 'http', None)
+            if http is not None:
+                http.hooks['response'].append(self.count_bytes)
+            self.hooked = True
+
+        self.instrumentation.count('sysdig_get_data_calls')
+        return self.client.get_data(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+# Counts the selector and apply calls made to the cluster through the openshift module
+class InstrumentedOpenShift:
+    def __init__(self, client, instrumentation):
+        self.client = client
+        self.instrumentation = instrumentation
+
+    def selector(self, *args, **kwargs):
+        self.instrumentation.count('openshift_selector_calls')
+        return InstrumentedSelector(self.client.selector(*args, **kwargs), self.instrumentation)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+class InstrumentedSelector:
+    def __init__(self, selector, instrumentation):
+        self.selector = selector
+        self.instrumentation = instrumentation
+
+    def objects(self, *args, **kwargs):
+        return [InstrumentedObject(obj, self.instrumentation) for obj in self.selector.objects(*args, **kwargs)]
+
+    def object(self, *args, **kwargs):
+        return InstrumentedObject(self.selector.object(*args, **kwargs), self.instrumentation)
+
+    def __getattr__(self, name):
+        return getattr(self.selector, name)
+
+class InstrumentedObject:
+    def __init__(self, obj, instrumentation):
+        self.obj = obj
+        self.instrumentation = instrumentation
+
+    def apply(self, *args, **kwargs):
+        self.instrumentation.count('openshift_apply_calls')
+        return self.obj.apply(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.obj, name)
+
+# p50/p99 of every phase and of the whole tick, and the mean counters per
+# tick, over the ticks recorded in a metrics file
+def report(path = METRICS_FILE):
+    with open(path) as f:
+        ticks = [json.loads(line) for line in f if line.strip()]
+    if len(ticks) == 0:
+        return {}
+
+    durations = defaultdict(list)
+    for tick in ticks:
+        durations['tick'].append(tick['duration'])
+        for phase, duration in tick['phases'].items():
+            durations[phase].append(duration)
+
+    counters = defaultdict(float)
+    for tick in ticks:
+        for name, value in tick['counters'].items():
+            counters[name] += value
+
+    return {
+        'ticks': len(ticks),
+        'phases': {
+            phase: {'p50': float(np.percentile(values, 50)), 'p99': float(np.percentile(values, 99)), 'share': sum(values) / sum(durations['tick'])}
+            for phase, values in durations.items()
+        },
+        'counters_per_tick': {name: value / len(ticks) for name, value in counters.items()},
+    }
+
+def format_report(summary):
+    lines = [f"{summary['ticks']} ticks", f"{'phase':<12}{'p50 (s)':>10}{'p99 (s)':>10}{'share':>8}"]
+    for phase, values in summary['phases'].items():
+        lines.append(f"{phase:<12}{values['p50']:>10.3f}{values['p99']:>10.3f}{values['share'] * 100:>7.1f}%")
+    for name, value in summary['counters_per_tick'].items():
+        lines.append(f"{name}: {value:.1f} per tick")
+    return '\n'.join(lines)
+
+# Prints the timing report of a run, e.g.
+# python a3/instrumentation.py output/mape_metrics.jsonl
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else METRICS_FILE
+    summary = report(path)
+    print(format_report(summary) if summary else f"No tick recorded in {path}")
+
+if __name__ == '__main__':
+    main()
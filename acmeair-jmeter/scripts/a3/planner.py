@@ -0,0 +1,187 @@
+import csv
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+
+import scripts_path
+import compute_utility_function
+from quantities import configuration_cost, parse_cpu, parse_memory
+
+HISTORY_FILE = 'output/adaptation_history.csv'
+HISTORY_FIELDS = ['timestamp', 'service', 'cpu', 'memory', 'pod_count', 'request_rate', 'latency', 'error_rate']
+
+# Observations, and distinct configurations among them, needed before the
+# model of a service is trusted: with a single configuration the load per
+# core and per GiB move together and cannot be told apart
+MIN_OBSERVATIONS = 6
+MIN_CONFIGURATIONS = 2
+
+# Ridge regularization of the least squares fits
+REGULARIZATION = 1e-3
+
+# Model inputs: the load per core and per GiB of a configuration
+def features(request_rate, cpu, memory, pod_count):
+    request_rate, cpu, memory, pod_count = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (request_rate, cpu, memory, pod_count)))
+    load_per_core = request_rate / (cpu / 1000 * pod_count)
+    load_per_gib = request_rate / (memory / 1024 * pod_count)
+
+    return np.stack([np.ones_like(load_per_core), load_per_core, load_per_core ** 2, load_per_gib], axis=-1)
+
+# Per-service performance model learnt from past adaptation cycles.
+#
+# Latency and error rate are fitted as quadratic functions of the load per
+# core plus a linear term of the load per GiB, so the effect of cpu, memory
+# and replicas can be predicted for configurations never observed at that
+# request rate.
+class PerformanceModel:
+    def __init__(self, min_observations = MIN_OBSERVATIONS, min_configurations = MIN_CONFIGURATIONS):
+        self.min_observations = min_observations
+        self.min_configurations = min_configurations
+        self.observations = defaultdict(list)
+        self.coefficients = {}
+
+    # Records one cycle: a service running a configuration saw these metric means
+    def add(self, service, cpu, memory, pod_count, request_rate, latency, error_rate):
+        self.observations[service].append((parse_cpu(cpu), parse_memory(memory), float(pod_count), request_rate, latency, error_rate))
+        self.coefficients.pop(service, None)
+
+    def ready(self, service):
+        observations = self.observations[service]
+        return (
+            len(observations) >= self.min_observations
+            and len({observation[:3] for observation in observations}) >= self.min_configurations
+        )
+
+    def fit(self, service):
+        if service not in self.coefficients:
+            observations = np.array(self.observations[service], dtype=float)
+            cpu, memory, pod_count, request_rate = observations[:, 0], observations[:, 1], observations[:, 2], observations[:, 3]
+            x = features(request_rate, cpu, memory, pod_count)
+            y = observations[:, 4:6]
+            # Ridge regression: (X'X + lI)^-1 X'y for latency and error rate at once
+            gram = x.T @ x + REGULARIZATION * np.eye(x.shape[1])
+            self.coefficients[service] = np.linalg.solve(gram, x.T @ y)
+
+        return self.coefficients[service]
+
+    # Predicted (latency, error_rate) arrays of a service for arrays of
+    # request rates and configurations (millicores, MiB, replicas)
+    def predict(self, service, request_rate, cpu, memory, pod_count):
+        predictions = features(request_rate, cpu, memory, pod_count) @ self.fit(service)
+        predictions = np.maximum(predictions, 0)
+
+        return predictions[..., 0], predictions[..., 1]
+
+    def load(self, path = HISTORY_FILE):
+        if not os.path.exists(path):
+            return
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                self.add(
+                    row['service'], row['cpu'], row['memory'], row['pod_count'],
+                    float(row['request_rate']), float(row['latency']), float(row['error_rate']),
+                )
+
+# Appends the observations of a cycle (service -> dict of HISTORY_FIELDS) to the history file
+def record(observations, path = HISTORY_FILE):
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=HISTORY_FIELDS)
+        if new_file:
+            writer.writeheader()
+        for service, observation in observations.items():
+            writer.writerow({'service': service, **observation})
+
+# Metrics the performance model predicts for a configuration
+PREDICTED_METRICS = ('latency', 'error_rate')
+
+# Picks, in a single move, the configuration of every service: the cheapest
+# of `configurations` (name -> configuration) whose predicted utility reaches
+# `threshold` at the current request rate, or the best one when none does.
+#
+# All services x configurations are predicted and scored at once. Services
+# whose model is not ready yet are left out of the result. Metrics of the
+# utility function the model does not predict (e.g. cpu_used) are scored at
+# their current value in `means_by_service` (service -> metric -> mean),
+# the same for every configuration.
+def choose_configurations(model, utility_function, request_rates, configurations, threshold, means_by_service = None):
+    services = [service for service in request_rates if model.ready(service)]
+    if len(services) == 0:
+        return {}
+
+    names = list(configurations)
+    cpu = np.array([parse_cpu(configurations[name]['cpu']) for name in names])
+    memory = np.array([parse_memory(configurations[name]['memory']) for name in names])
+    pod_count = np.array([configurations[name]['pod_count'] for name in names], dtype=float)
+    costs = [configuration_cost(configurations[name]) for name in names]
+
+    latency = np.empty((len(services), len(names)))
+    error_rate = np.empty((len(services), len(names)))
+    for i, service in enumerate(services):
+        latency[i], error_rate[i] = model.predict(service, request_rates[service], cpu, memory, pod_count)
+
+    values = {'latency': latency, 'error_rate': error_rate, 'request_rate': np.array([[request_rates[service]] * len(names) for service in services])}
+    for metric in utility_function.missing(values):
+        if means_by_service is not None and all(metric in means_by_service.get(service, {}) for service in services):
+            values[metric] = np.array([[means_by_service[service][metric]] * len(names) for service in services])
+
+    _, chosen = compute_utility_function.rank(utility_function, values, threshold, costs)
+
+    return {service: names[index] for service, index in zip(services, chosen)}
+
+# Replays a recorded history: every observation is predicted by a model fitted
+# on the observations before it only. Reports the mean absolute errors and how
+# often the predicted utility falls on the same side of the threshold as the
+# observed one.
+def evaluate(utility_function, threshold, path = HISTORY_FILE, min_observations = MIN_OBSERVATIONS):
+    recorded = PREDICTED_METRICS + ('request_rate',)
+    missing = utility_function.missing(recorded)
+    if missing:
+        raise ValueError(f"The history only records {', '.join(recorded)}, the utility function also scores {', '.join(missing)}")
+
+    model = PerformanceModel(min_observations)
+    latency_errors, error_rate_errors, agreements = [], [], []
+
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            service = row['service']
+            request_rate, latency, error_rate = float(row['request_rate']), float(row['latency']), float(row['error_rate'])
+
+            if model.ready(service):
+                predicted_latency, predicted_error_rate = model.predict(
+                    service, request_rate, parse_cpu(row['cpu']), parse_memory(row['memory']), float(row['pod_count']),
+                )
+                latency_errors.append(abs(float(predicted_latency) - latency))
+                error_rate_errors.append(abs(float(predicted_error_rate) - error_rate))
+
+                utilities = utility_function.score({
+                    'latency': [float(predicted_latency), latency],
+                    'error_rate': [float(predicted_error_rate), error_rate],
+                    'request_rate': [request_rate, request_rate],
+                })
+                agreements.append((utilities[0] >= threshold) == (utilities[1] >= threshold))
+
+            model.add(service, row['cpu'], row['memory'], row['pod_count'], request_rate, latency, error_rate)
+
+    if len(agreements) == 0:
+        return None
+
+    return {
+        'predictions': len(agreements),
+        'latency_mae': float(np.mean(latency_errors)),
+        'error_rate_mae': float(np.mean(error_rate_errors)),
+        'threshold_agreement': float(np.mean(agreements)),
+    }
+
+# Evaluates the performance model offline against a recorded history, e.g.
+# python a3/planner.py output/adaptation_history.csv
+def main():
+    import policy
+
+    path = sys.argv[1] if len(sys.argv) > 1 else HISTORY_FILE
+    print(evaluate(policy.utility_function, policy.upscale_utility_threshold, path))
+
+if __name__ == '__main__':
+    main()
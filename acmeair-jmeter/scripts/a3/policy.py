@@ -0,0 +1,107 @@
+import scripts_path
+import compute_utility_function
+
+# Adaptation policy of the adapter: the configuration ladder, the utility
+# function and the decisions taken from them. Importing it has no side
+# effect, so offline tools (simulator.py) use the same decisions as the
+# control loop without a cluster or Sysdig.
+
+configurations = {
+    'c1': { 'cpu': '250m', 'memory': '250Mi', 'pod_count': 1},
+    'c2': { 'cpu': '250m', 'memory': '500Mi', 'pod_count': 1},
+    'c3': { 'cpu': '250m', 'memory': '500Mi', 'pod_count': 2},
+}
+
+configuration_maps = {
+    '250mx250Mix1': 'c1',
+    '250mx500Mix1': 'c2',
+    '250mx500Mix2': 'c3',
+}
+
+# Metrics whose means the adapter computes for every service, and their Sysdig ids
+metric_types = {
+    'latency': 'sysdig_container_net_http_request_time',
+    'error_rate': 'sysdig_container_net_http_statuscode_request_count',
+    "cpu_used": "sysdig_container_cpu_used_percent",
+    "memory_used": "sysdig_container_memory_used_percent",
+    "request_rate": "sysdig_container_net_http_request_count",
+}
+
+latency_weight = 0.65
+error_rate_weight = 0.35
+
+# Preference curves of the utility function, over the means of any metric of
+# metric_types (latency in ms). See compute_utility_function for the curves.
+utility_spec = {
+    'latency': {'weight': latency_weight, 'curve': 'step', 'thresholds': [1000, 3000, 5000], 'preferences': [1, 0.5, 0.2, 0]},
+    'error_rate': {'weight': error_rate_weight, 'curve': 'step', 'thresholds': [1, 3], 'preferences': [1, 0.5, 0]},
+}
+utility_function = compute_utility_function.from_spec(utility_spec, metric_types)
+
+def latency_to_preference(latency):
+    _, curve = utility_function.preferences['latency']
+    return float(curve(latency))
+
+def rate_error_count_to_preference(rate_error_count):
+    _, curve = utility_function.preferences['error_rate']
+    return float(curve(rate_error_count))
+
+# Scores all services in a single vectorized call
+def compute_utility_function_by_service(means_by_services):
+    services = list(means_by_services)
+    if len(services) == 0:
+        return {}
+
+    values = {metric: [means_by_services[service][metric] for service in services] for metric in utility_function.preferences}
+    utilities = utility_function.score(values)
+
+    return {service: float(utility) for service, utility in zip(services, utilities)}
+
+def find_next_configuration(cur_cpu, cur_memory, cur_pod_count, down_scale = False):
+    config_key = f'{cur_cpu}x{cur_memory}x{cur_pod_count}'
+    if config_key in configuration_maps:
+        current_config = configuration_maps[f'{cur_cpu}x{cur_memory}x{cur_pod_count}']
+    else:
+        current_config = None
+
+    next_configuration = None
+    if down_scale == False:
+        if current_config == 'c1':
+            next_configuration = configurations['c2']
+        elif current_config == 'c2':
+            next_configuration = configurations['c3']
+        else:
+            next_configuration = { 'cpu': '250m' , 'memory': '500Mi' , 'pod_count': cur_pod_count*2 }
+
+        if next_configuration and  next_configuration != current_config:
+            print('Upscaling....')
+    else:
+        if current_config == 'c1':
+            next_configuration = None
+        elif current_config == 'c2':
+            next_configuration = configurations['c1']
+        elif current_config == 'c3':
+            next_configuration = configurations['c2']
+        else:
+            next_configuration = { 'cpu': '250m' , 'memory': '500Mi' , 'pod_count': cur_pod_count/2 }
+
+        if next_configuration and next_configuration != current_config:
+            print('Downscaling....')
+
+    return next_configuration
+
+# Services are adapted when their utility drops below upscale_utility_threshold,
+# or when it is 1 and their cpu usage is below downscale_cpu_threshold
+upscale_utility_threshold = 0.7
+downscale_cpu_threshold = 5
+
+# Services to scale (service -> down_scale) given their utility and mean cpu usage
+def scaling_decisions(utilities_by_service, cpu_used_mean_by_service):
+    down_scale_by_service = {}
+    for service, utility in utilities_by_service.items():
+        if utility == 1 and cpu_used_mean_by_service[service] < downscale_cpu_threshold:
+            down_scale_by_service[service] = True
+        elif utility < upscale_utility_threshold:
+            down_scale_by_service[service] = False
+
+    return down_scale_by_service
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Helpers shared with the load test scripts (Sysdig access, metric frames,
+# quantities, deployment patches) live in the parent scripts folder. Modules
+# of this folder import this one before any of them.
+SCRIPTS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
@@ -0,0 +1,334 @@
+import argparse
+import contextlib
+import csv
+import heapq
+import io
+import itertools
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import scripts_path
+import acmeair_model
+import compute_utility_function
+import latency_breakdown
+import load_profile
+import metric_frame
+import quantities
+import run_store
+import policy as adapter_policy
+
+REQUEST_COUNT = 'sysdig_container_net_http_request_count'
+REQUEST_TIME = 'sysdig_container_net_http_request_time'
+
+# Mean time (seconds) a request keeps a slot of its service busy, when it is
+# not calibrated from a trace
+SERVICE_TIME = 0.05
+
+# Requests waiting longer than that (seconds) time out and count as errors
+TIMEOUT = 30
+
+# Memory (MiB) a pod uses at rest and per request in flight: a pod running
+# past its memory limit fails the requests in excess
+BASE_MEMORY = acmeair_model.BASE_MEMORY
+MEMORY_PER_REQUEST = 2
+
+# Seconds between the apply() of a deployment and the end of its rollout, and
+# for the latency to settle afterwards (see adapter.wait_until_stable)
+ROLLOUT_DELAY = 60
+SETTLE_TIME = 30
+
+# Seconds the adapter sleeps after a tick that adapted nothing, width of the
+# window its means are computed over, and longest wait for the adapted
+# services to be stable (adapter.adaptation_timeout)
+TICK_INTERVAL = 10
+WINDOW = 60
+ADAPTATION_TIMEOUT = 360
+
+# Share of the requests of the JMX plan served by every service
+SERVICE_MIX = {
+    service: sum(1 for sampler_service in latency_breakdown.SAMPLER_SERVICES.values() if sampler_service == service) / len(latency_breakdown.SAMPLER_SERVICES)
+    for service in acmeair_model.SERVICES
+}
+
+SIMULATION_FILE = 'output/simulation_{name}.csv'
+
+# A recorded trace: the request rate (req/s) of every service at the
+# timestamps of the trace, a {service: rates} dict over shared timestamps
+def trace_from_frame(frame, services = acmeair_model.SERVICES):
+    return frame.timestamps.astype(float), {
+        service: np.nan_to_num(frame.series(REQUEST_COUNT, service)) if service in frame.service_index else np.zeros(len(frame.timestamps))
+        for service in services
+    }
+
+# A trace spreading the rates of a load profile (see load_profile.py) over
+# the services like the JMX plan does
+def trace_from_profile(timestamps, rates, mix = SERVICE_MIX):
+    return np.asarray(timestamps, dtype=float), {service: np.asarray(rates, dtype=float) * share for service, share in mix.items()}
+
+# Frame of a metric of a scenario, see run_store.load_frame. A driver CSV
+# output of REQUEST_COUNT stands for the scenario: the file of the metric is
+# read next to it, no samples when the driver did not write one.
+def load_frame(source, scenario, metric):
+    if source.endswith('.csv'):
+        source = source.replace(REQUEST_COUNT, metric)
+        if not os.path.exists(source):
+            return metric_frame.empty_frame([metric])
+    return run_store.load_frame(source, metric, scenario)
+
+# Trace of a recorded scenario, see load_frame
+def load_trace(source, scenario = None):
+    return trace_from_frame(load_frame(source, scenario, REQUEST_COUNT))
+
+# Service time of every service from a frame of REQUEST_TIME (ns): the
+# latency at low load, taken as a low percentile of the recorded latencies
+def calibrate(frame, percentile = 5):
+    service_times = {}
+    for service in frame.services:
+        values = frame.series(REQUEST_TIME, service)
+        values = values[~np.isnan(values)]
+        if len(values):
+            service_times[service] = float(np.percentile(values, percentile)) / 10 ** 9
+    return service_times
+
+# Steady-state response of a service to a request rate, as a fluid queue over
+# `dt` seconds with `backlog` requests waiting from the previous step.
+#
+# The service has one slot per acmeair_model.MILLICORES_PER_REQUEST millicores
+# of every pod, each serving a request in `service_time`. Below saturation
+# the wait is the M/M/c approximation of Sakasegawa, above it the backlog
+# grows and the requests waiting longer than TIMEOUT are dropped.
+# Returns (backlog, latency in ms, errors/s, cpu used %, memory used %).
+def respond(rate, resources, backlog, dt, service_time):
+    slots, memory, pod_count = resources
+    capacity = slots / service_time
+
+    served = min(rate * dt + backlog, capacity * dt)
+    backlog += rate * dt - served
+    dropped = max(backlog - TIMEOUT * capacity, 0)
+    backlog -= dropped
+
+    utilization = min(rate / capacity, 0.99)
+    wait = service_time * utilization ** (math.sqrt(2 * (slots + 1)) - 1) / (slots * (1 - utilization))
+    latency = service_time + wait + backlog / capacity
+
+    # Requests in flight per pod (Little's law) beyond the memory limit fail
+    memory_used = BASE_MEMORY + rate * latency / pod_count * MEMORY_PER_REQUEST
+    memory_errors = rate * max(memory_used - memory, 0) / memory_used
+
+    return backlog, latency * 1000, dropped / dt + memory_errors, min(served / dt / capacity, 1) * 100, min(memory_used / memory, 1) * 100
+
+# Metrics of policy.metric_types returned by respond, after the backlog
+RESPONSE_METRICS = ('latency', 'error_rate', 'cpu_used', 'memory_used')
+
+# (slots, memory limit in MiB, pods) of a configuration, see respond
+def resources(configuration):
+    pod_count = max(int(configuration['pod_count']), 1)
+    slots = max(int(quantities.parse_cpu(configuration['cpu']) / acmeair_model.MILLICORES_PER_REQUEST), 1) * pod_count
+    return slots, quantities.parse_memory(configuration['memory']), pod_count
+
+# Sets the adapter policy (thresholds, configuration ladder, utility spec)
+# of policy.py for the duration of a simulation
+@contextlib.contextmanager
+def applied(policy):
+    fields = ('upscale_utility_threshold', 'downscale_cpu_threshold', 'configurations', 'configuration_maps', 'utility_function')
+    saved = {field: getattr(adapter_policy, field) for field in fields}
+    try:
+        for field in ('upscale_utility_threshold', 'downscale_cpu_threshold'):
+            if field in policy:
+                setattr(adapter_policy, field, policy[field])
+        if 'configurations' in policy:
+            adapter_policy.configurations = policy['configurations']
+            adapter_policy.configuration_maps = {
+                f"{configuration['cpu']}x{configuration['memory']}x{configuration['pod_count']}": name
+                for name, configuration in policy['configurations'].items()
+            }
+        if 'utility_spec' in policy:
+            adapter_policy.utility_function = compute_utility_function.from_spec(policy['utility_spec'], adapter_policy.metric_types)
+        yield
+    finally:
+        for field, value in saved.items():
+            setattr(adapter_policy, field, value)
+
+# Replays a trace through the decision logic of the adapter under `policy`
+# (see applied) in simulated time.
+#
+# Events are the ticks of the adapter loop and the end of the rollouts it
+# starts. Between two events the services respond to the recorded rates
+# sample by sample. At every tick the means of the last WINDOW seconds are
+# scored by policy.compute_utility_function_by_service, the services to
+# scale picked by policy.scaling_decisions and their next configuration by
+# policy.find_next_configuration. Like adapter.main(), the loop then waits
+# for the rollouts and the latency to settle, or sleeps TICK_INTERVAL.
+# The predictive scaling and the model planner are not simulated.
+#
+# Returns a summary of the run: mean utility, share of samples below the
+# upscale threshold, mean cost of the deployment, errors and adaptations.
+def simulate(trace, policy = None, service_times = None, rollout_delay = ROLLOUT_DELAY, settle_time = SETTLE_TIME):
+    policy = policy or {}
+    timestamps, rates = trace
+    services = list(rates)
+    service_times = {service: (service_times or {}).get(service, SERVICE_TIME) for service in services}
+    dt = float(np.median(np.diff(timestamps))) if len(timestamps) > 1 else TICK_INTERVAL
+
+    with applied(policy), contextlib.redirect_stdout(io.StringIO()):
+        initial = adapter_policy.configurations['c1']
+        applied_configurations = {service: initial for service in services}
+        targets = dict(applied_configurations)
+        backlogs = {service: 0.0 for service in services}
+        parsed = {}
+        recorded = {service: np.zeros((len(timestamps), len(RESPONSE_METRICS))) for service in services}
+        costs = np.zeros(len(timestamps))
+        adaptations = 0
+
+        # (time, order, kind, service, configuration), order keeps the heap stable
+        order = itertools.count()
+        events = [(timestamps[0] + TICK_INTERVAL, next(order), 'tick', None, None)]
+        sample = 0
+
+        while sample < len(timestamps):
+            event_time, _, kind, service, configuration = heapq.heappop(events)
+
+            # Services respond to the samples up to the event
+            while sample < len(timestamps) and timestamps[sample] <= event_time:
+                for name in services:
+                    key = tuple(applied_configurations[name].values())
+                    if key not in parsed:
+                        parsed[key] = resources(applied_configurations[name]), quantities.configuration_cost(applied_configurations[name])
+                    backlogs[name], *values = respond(rates[name][sample], parsed[key][0], backlogs[name], dt, service_times[name])
+                    recorded[name][sample] = values
+                    costs[sample] += parsed[key][1]
+                sample += 1
+
+            if kind == 'rollout':
+                applied_configurations[service] = configuration
+                continue
+
+            first = np.searchsorted(timestamps, event_time - WINDOW, side='right')
+            if first >= sample:
+                heapq.heappush(events, (event_time + TICK_INTERVAL, next(order), 'tick', None, None))
+                continue
+            means_by_service = {}
+            for name in services:
+                means_by_service[name] = dict(zip(RESPONSE_METRICS, recorded[name][first:sample].mean(axis=0)))
+                means_by_service[name]['request_rate'] = float(rates[name][first:sample].mean())
+
+            utilities = adapter_policy.compute_utility_function_by_service(means_by_service)
+            decisions = adapter_policy.scaling_decisions(utilities, {name: means['cpu_used'] for name, means in means_by_service.items()})
+            adapted = 0
+            for name, down_scale in decisions.items():
+                current = targets[name]
+                next_configuration = adapter_policy.find_next_configuration(current['cpu'], current['memory'], current['pod_count'], down_scale)
+                if next_configuration and next_configuration != current and next_configuration['pod_count'] >= 1:
+                    targets[name] = next_configuration
+                    heapq.heappush(events, (event_time + rollout_delay, next(order), 'rollout', name, next_configuration))
+                    adapted += 1
+
+            adaptations += adapted
+            wait = min(rollout_delay + settle_time, ADAPTATION_TIMEOUT) if adapted else TICK_INTERVAL
+            heapq.heappush(events, (event_time + wait, next(order), 'tick', None, None))
+
+        utilities = np.array([
+            adapter_policy.utility_function.score({**dict(zip(RESPONSE_METRICS, recorded[name].T)), 'request_rate': np.asarray(rates[name], dtype=float)})
+            for name in services
+        ])
+        violations = (utilities < adapter_policy.upscale_utility_threshold).mean()
+
+    return {
+        'utility': float(utilities.mean()),
+        'violations': float(violations),
+        'cost': float(costs.mean()),
+        'errors': float(sum(recorded[name][:, 1].sum() for name in services) * dt),
+        'adaptations': adaptations,
+    }
+
+# Trace shared by the jobs of a sweep, sent once to every worker process
+sweep_trace = None
+sweep_service_times = None
+
+def init_sweep(trace, service_times):
+    global sweep_trace, sweep_service_times
+    sweep_trace, sweep_service_times = trace, service_times
+
+def run_policy(policy):
+    return {**policy, **simulate(sweep_trace, policy, sweep_service_times)}
+
+# Every combination of the values of a grid, e.g.
+# {'upscale_utility_threshold': [0.6, 0.7], 'downscale_cpu_threshold': [5, 10]}
+def policies(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+# Simulates every policy of a grid over a trace across `processes` worker
+# processes. Returns the summaries ordered by decreasing utility, then cost.
+def sweep(trace, grid, service_times = None, processes = None):
+    jobs = policies(grid)
+    with ProcessPoolExecutor(max_workers=processes, initializer=init_sweep, initargs=(trace, service_times)) as pool:
+        results = list(pool.map(run_policy, jobs, chunksize=max(len(jobs) // (4 * (processes or os.cpu_count() or 1)), 1)))
+
+    return sorted(results, key=lambda result: (-result['utility'], result['cost']))
+
+def write_results(results, path):
+    fields = list(results[0]) if results else []
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fields)
+        writer.writeheader()
+        for result in results:
+            writer.writerow({field: result[field] if not isinstance(result[field], dict) else repr(result[field]) for field in fields})
+
+# Thresholds tried by default
+default_grid = {
+    'upscale_utility_threshold': [0.5, 0.6, 0.7, 0.8, 0.9],
+    'downscale_cpu_threshold': [1, 5, 10, 20, 40],
+}
+
+# Trace and service times to replay: a recorded scenario, whose service
+# times are calibrated from its latencies, or a load profile (see
+# load_profile.py) spread over the services
+def load_source(source, scenario = None):
+    if source == 'profile':
+        if scenario is None:
+            raise ValueError("A load profile needs the path of its CSV file, or diurnal")
+        timestamps, rates = load_profile.diurnal_profile() if scenario == 'diurnal' else load_profile.read_profile(scenario)
+        return trace_from_profile(timestamps, rates), None
+
+    service_times = calibrate(load_frame(source, scenario, REQUEST_TIME))
+    if len(service_times) == 0:
+        print(f"No latencies recorded, assuming a service time of {SERVICE_TIME}s")
+    return load_trace(source, scenario), service_times
+
+# Sweeps the thresholds of the adapter over a recorded run or a load profile, e.g.
+# python a3/simulator.py <run id> TEST_HIGH_LOAD
+# python a3/simulator.py output/configuration1/sysdig_container_net_http_request_count_TEST_HIGH_LOAD_.csv
+# python a3/simulator.py profile input/day.csv
+# python a3/simulator.py profile diurnal
+def main(args = None):
+    parser = argparse.ArgumentParser(description="Sweeps the thresholds of the adapter over a recorded run or a load profile")
+    parser.add_argument('source', help="run id, driver CSV output of the request counts, or 'profile'")
+    parser.add_argument('scenario', nargs='?', help="scenario of the run, or CSV file (or 'diurnal') of the profile")
+    args = parser.parse_args(args)
+    source, scenario = args.source, args.scenario
+    if source == 'profile' and scenario is None:
+        parser.error("profile needs the path of a load profile CSV file, or diurnal")
+
+    trace, service_times = load_source(source, scenario)
+    if len(trace[0]) < 2:
+        print(f"No request rates recorded for {source} {scenario or ''}")
+        return
+
+    start = time.perf_counter()
+    results = sweep(trace, default_grid, service_times)
+    elapsed = time.perf_counter() - start
+    simulated = (trace[0][-1] - trace[0][0]) * len(results)
+    print(f"Simulated {len(results)} policies over {trace[0][-1] - trace[0][0]:.0f}s of trace in {elapsed:.1f}s ({simulated / elapsed:.0f}x real time)")
+
+    name = os.path.splitext(os.path.basename(scenario or source))[0]
+    write_results(results, SIMULATION_FILE.format(name=name))
+    for result in results[:5]:
+        print(result)
+
+if __name__ == '__main__':
+    main()
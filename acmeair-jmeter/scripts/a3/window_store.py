@@ -0,0 +1,120 @@
+import math
+from collections import deque
+
+# Sliding window over the samples of one metric of one service.
+# Keeps a running sum and count so the mean costs O(1), and optionally an
+# exponentially weighted moving average with the given alpha.
+class SeriesWindow:
+    def __init__(self, window, alpha = None):
+        self.window = window
+        self.alpha = alpha
+        self.samples = deque()
+        self.sum = 0.0
+        self.ewma = None
+
+    def __len__(self):
+        return len(self.samples)
+
+    def add(self, timestamp, value):
+        if value is None or math.isnan(value):
+            return
+
+        if self.samples and timestamp <= self.samples[-1][0]:
+            if timestamp < self.samples[-1][0]:
+                # Already ingested
+                return
+            # Sysdig may still be filling the most recent sample: replace it
+            _, previous = self.samples.pop()
+            self.sum -= previous
+
+        self.samples.append((timestamp, value))
+        self.sum += value
+        if self.alpha is not None:
+            self.ewma = value if self.ewma is None else self.alpha * value + (1 - self.alpha) * self.ewma
+
+    # Drops the samples older than the window ending at `now`
+    def expire(self, now):
+        while self.samples and self.samples[0][0] <= now - self.window:
+            _, value = self.samples.popleft()
+            self.sum -= value
+        if not self.samples:
+            self.sum = 0.0
+
+    def mean(self):
+        return self.sum / len(self.samples) if self.samples else 0
+
+    def values(self):
+        return [value for _, value in self.samples]
+
+    def timestamps(self):
+        return [timestamp for timestamp, _ in self.samples]
+
+# Per-service, per-metric sliding windows fed incrementally with the
+# MetricFrames pulled at every tick of the adaptation loop.
+#
+# Only the samples newer than the last ingested one are added and expired
+# samples are dropped, so a tick costs O(new samples) whatever the window
+# length.
+class WindowStore:
+    def __init__(self, window = 60, alpha = None):
+        self.window = window
+        self.alpha = alpha
+        self.series = {}
+        self.last_timestamp = None
+
+    def get(self, metric, service):
+        key = (metric, service)
+        if key not in self.series:
+            self.series[key] = SeriesWindow(self.window, self.alpha)
+        return self.series[key]
+
+    # Relative start of the next fetch: only the samples since the last
+    # ingested one (included, as it may have been updated since)
+    def fetch_start(self, start, now):
+        if self.last_timestamp is None:
+            return start
+        return min(max(start, self.last_timestamp - now), 0)
+
+    def ingest(self, frame):
+        if len(frame.timestamps) == 0:
+            return
+
+        first = 0
+        if self.last_timestamp is not None:
+            first = int((frame.timestamps < self.last_timestamp).sum())
+        timestamps = frame.timestamps[first:].tolist()
+
+        for m, metric in enumerate(frame.metrics):
+            for s, service in enumerate(frame.services):
+                series = self.get(metric, service)
+                for timestamp, value in zip(timestamps, frame.values[first:, s, m].tolist()):
+                    series.add(timestamp, value)
+
+        if timestamps:
+            self.last_timestamp = max(self.last_timestamp or 0, timestamps[-1])
+
+    def expire(self, now):
+        for series in self.series.values():
+            series.expire(now)
+
+    # Services with at least one sample in the window
+    def services(self):
+        services = []
+        for (_, service), series in self.series.items():
+            if len(series) and service not in services:
+                services.append(service)
+        return services
+
+    # Mean of the given metric for every service, 0 when there is no sample
+    def means(self, metric, services):
+        return {service: self.series[(metric, service)].mean() if (metric, service) in self.series else 0 for service in services}
+
+    # EWMA of the given metric for every service, None when disabled or without sample
+    def ewmas(self, metric, services):
+        return {service: self.series[(metric, service)].ewma if (metric, service) in self.series else None for service in services}
+
+    def values(self, metric, service):
+        return self.series[(metric, service)].values() if (metric, service) in self.series else []
+
+    def timestamps(self, metric, service):
+        return self.series[(metric, service)].timestamps() if (metric, service) in self.series else []
@@ -0,0 +1,11 @@
+# Capacity model of the AcmeAir deployment shared by the local stand-in
+# (mock_acmeair.py) and the adapter simulator (a3/simulator.py)
+
+SERVICES = ['acmeair-bookingservice', 'acmeair-customerservice', 'acmeair-flightservice', 'acmeair-authservice', 'acmeair-mainservice']
+
+# Millicores a request keeps busy while it is served: a pod with a 250m
+# limit serves 10 requests at once, the others queue
+MILLICORES_PER_REQUEST = 25
+
+# Memory used by a pod, in MiB
+BASE_MEMORY = 150
@@ -0,0 +1,162 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import jmeter_stream
+import load_runner
+import sweep
+
+# Service level objective a probe must meet: p95 latency in ms and error rate
+# as a fraction of the requests
+slo = {'p95': 3000, 'error_rate': 0.05}
+
+# Probes measure once their ramp is over, and last at most probe_duration
+probe_duration = 300
+probe_ramp = 10
+# A probe is only judged once it measured that many samples
+min_samples = 200
+# A probe under the SLO by that margin for hold_time seconds passes early
+margin = 0.2
+hold_time = 60
+check_interval = 5
+# Seconds to let the services recover between two probes
+cooldown = 30
+
+# Thread counts explored: doubled from initial_threads until the SLO breaks,
+# then bisected until the knee is known within `resolution` threads
+initial_threads = 50
+max_threads = 2000
+resolution = 25
+
+# Flush results as they come so the probe can judge them live
+probe_properties = {'jmeter.save.saveservice.autoflush': 'true'}
+
+# 'over' when the measured samples breach the SLO, 'under' when they meet it
+# by `margin`, None while too few samples were measured to tell
+def judge(snapshot, slo = slo, margin = margin, min_samples = min_samples):
+    if snapshot['count'] < min_samples:
+        return None
+    if snapshot['p95'] > slo['p95'] or snapshot['error_rate'] > slo['error_rate']:
+        return 'over'
+    if snapshot['p95'] <= slo['p95'] * (1 - margin) and snapshot['error_rate'] <= slo['error_rate'] * (1 - margin):
+        return 'under'
+    return None
+
+# Feeds `stats` with the samples of a results file taken from `measure_from`
+# (epoch ms) on, so the ramp does not count
+def measure(results_path, stats, measure_from, stop):
+    for timestamp, label, elapsed, success in jmeter_stream.parse_results(jmeter_stream.follow(results_path, stop=stop)):
+        if timestamp >= measure_from:
+            stats.add_sample(timestamp, label, elapsed, success)
+
+# Runs `thread_count` threads and stops JMeter as soon as the SLO is clearly
+# breached, or clearly met for hold_time seconds. A probe that runs to its end
+# is judged on everything it measured.
+# Returns ('over' or 'under', TOTAL snapshot of the measured samples).
+def probe(name, thread_count, duration = probe_duration, ramp = probe_ramp):
+    results_file = f'{name}.jtl'
+    if os.path.exists(f'logs/{results_file}'):
+        os.remove(f'logs/{results_file}')
+
+    finished = threading.Event()
+    stats = jmeter_stream.LiveStats()
+    process = load_runner.start_load_test(f'{name}.log', thread_count, duration, ramp, 0, results_file, properties=probe_properties)
+    measure_from = (time.time() + ramp) * 1000
+    watcher = threading.Thread(target=measure, args=(f'logs/{results_file}', stats, measure_from, finished.is_set), daemon=True)
+    watcher.start()
+
+    verdict, under_since = None, None
+    while process.poll() is None:
+        time.sleep(check_interval)
+        current = judge(stats.snapshot()['TOTAL'])
+        if current == 'over':
+            verdict = 'over'
+            break
+        if current == 'under':
+            under_since = under_since or time.time()
+            if time.time() - under_since >= hold_time:
+                verdict = 'under'
+                break
+        else:
+            under_since = None
+
+    if process.poll() is None:
+        load_runner.stop_test()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    finished.set()
+    watcher.join()
+    snapshot = stats.snapshot()['TOTAL']
+    if verdict is None:
+        verdict = 'over' if judge(snapshot, margin=0, min_samples=1) != 'under' else 'under'
+
+    print(f"Probe {name}: {thread_count} threads, {snapshot['throughput']:.1f} req/s, p95 {snapshot['p95'] or 0:.0f} ms, "
+          f"errors {snapshot['error_rate'] * 100:.2f}% -> {verdict}")
+    return verdict, snapshot
+
+# Searches the highest thread count meeting the SLO. Returns
+# (thread count, snapshot) of the knee, (None, None) when even
+# initial_threads breaks the SLO.
+def search(tag):
+    probes = {}
+
+    def run(thread_count):
+        if thread_count not in probes:
+            if probes:
+                time.sleep(cooldown)
+            probes[thread_count] = probe(f'CAPACITY_{tag}_T{thread_count}', thread_count)
+        return probes[thread_count][0] == 'under'
+
+    low, high = None, initial_threads
+    while run(high):
+        low = high
+        if high >= max_threads:
+            return high, probes[high][1]
+        high = min(high * 2, max_threads)
+
+    if low is None:
+        return None, None
+
+    while high - low > resolution:
+        middle = (low + high) // 2
+        if run(middle):
+            low = middle
+        else:
+            high = middle
+
+    return low, probes[low][1]
+
+# Finds the knee of every configuration of a3/policy.py and writes the report
+# to output/capacity_<date>.json
+def capacity_search(configurations = ['c1', 'c2', 'c3']):
+    report = {}
+    for configuration in configurations:
+        sweep.apply_configuration(configuration)
+        thread_count, snapshot = search(configuration)
+        report[configuration] = {
+            'thread_count': thread_count,
+            'throughput': snapshot['throughput'] if snapshot else None,
+            'p95': snapshot['p95'] if snapshot else None,
+            'error_rate': snapshot['error_rate'] if snapshot else None,
+        }
+        print(f"Knee of {configuration}: {report[configuration]}")
+
+    with open(time.strftime('output/capacity_%Y%m%d-%H%M%S.json'), 'w') as f:
+        json.dump({'slo': slo, 'knees': report}, f, indent=2)
+
+    return report
+
+# python capacity_search.py [configuration ...]
+def main():
+    configurations = sys.argv[1:] or ['c1', 'c2', 'c3']
+    capacity_search(configurations)
+
+if __name__ == '__main__':
+    main()
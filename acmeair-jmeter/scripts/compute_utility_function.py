@@ -0,0 +1,96 @@
+import numpy as np
+
+# Preference curves map metric values to a preference between 0 and 1.
+# They take NumPy arrays of any shape (e.g. services x candidate configurations)
+# and return an array of the same shape.
+
+# Step curve: preferences[i] below thresholds[i], preferences[-1] from thresholds[-1] on.
+# There must be one more preference than thresholds.
+def step(thresholds, preferences):
+    thresholds = np.asarray(thresholds, dtype=float)
+    preferences = np.asarray(preferences, dtype=float)
+    if len(preferences) != len(thresholds) + 1:
+        raise ValueError('A step curve needs one more preference than thresholds')
+
+    return lambda values: preferences[np.searchsorted(thresholds, values, side='right')]
+
+# Piecewise-linear curve through the (points[i], preferences[i]) points,
+# constant before the first and after the last point
+def piecewise_linear(points, preferences):
+    points = np.asarray(points, dtype=float)
+    preferences = np.asarray(preferences, dtype=float)
+
+    return lambda values: np.interp(values, points, preferences)
+
+# Sigmoid curve worth 0.5 at `midpoint`. A positive steepness makes the
+# preference decrease as the value grows (e.g. latency), a negative one
+# makes it increase.
+def sigmoid(midpoint, steepness):
+    return lambda values: 1 / (1 + np.exp(steepness * (np.asarray(values, dtype=float) - midpoint)))
+
+curves = {
+    'step': step,
+    'piecewise_linear': piecewise_linear,
+    'sigmoid': sigmoid,
+}
+
+# Weighted sum of the preferences of several metrics
+class UtilityFunction:
+    # `preferences` is a dict of metric -> (weight, curve)
+    def __init__(self, preferences):
+        self.preferences = preferences
+
+    # Metrics of the function that are not among `metrics`
+    def missing(self, metrics):
+        return [metric for metric in self.preferences if metric not in metrics]
+
+    # Scores metric values given as a dict of metric -> array. All arrays must
+    # have the same shape, which is the shape of the returned utilities.
+    def score(self, values):
+        missing = self.missing(values)
+        if missing:
+            raise ValueError(f"The utility function needs values of {', '.join(missing)}, only {', '.join(values)} were given")
+
+        utility = None
+        for metric, (weight, curve) in self.preferences.items():
+            weighted = weight * curve(np.asarray(values[metric], dtype=float))
+            utility = weighted if utility is None else utility + weighted
+
+        return utility
+
+# Builds a UtilityFunction from a declarative spec such as
+# {'latency': {'weight': 0.65, 'curve': 'step', 'thresholds': [1000, 3000, 5000], 'preferences': [1, 0.5, 0.2, 0]}}
+# Given the `metrics` its callers can supply, a spec with curves on other
+# metrics is rejected.
+def from_spec(spec, metrics = None):
+    if metrics is not None:
+        unknown = [metric for metric in spec if metric not in metrics]
+        if unknown:
+            raise ValueError(f"The utility spec has curves on {', '.join(unknown)}, which is not one of {', '.join(metrics)}")
+
+    preferences = {}
+    for metric, curve_spec in spec.items():
+        arguments = {key: value for key, value in curve_spec.items() if key not in ('weight', 'curve')}
+        preferences[metric] = (curve_spec['weight'], curves[curve_spec['curve']](**arguments))
+
+    return UtilityFunction(preferences)
+
+# Ranks candidate configurations for every service.
+#
+# `values` is a dict of metric -> services x candidates array of (predicted)
+# metric values and `costs` an optional array of one cost per candidate.
+# Returns the services x candidates utilities and, for every service, the
+# index of the cheapest candidate reaching `threshold`, or of the candidate
+# with the highest utility when none does.
+def rank(utility, values, threshold, costs = None):
+    utilities = np.atleast_2d(utility.score(values))
+    candidate_count = utilities.shape[1]
+    costs = np.zeros(candidate_count) if costs is None else np.asarray(costs, dtype=float)
+
+    # Candidates that do not reach the threshold cost more than any candidate that does
+    effective_costs = np.where(utilities >= threshold, costs, np.inf)
+    cheapest = np.argmin(effective_costs, axis=1)
+    best = np.argmax(utilities, axis=1)
+    reaches_threshold = np.isfinite(effective_costs.min(axis=1))
+
+    return utilities, np.where(reaches_threshold, cheapest, best)
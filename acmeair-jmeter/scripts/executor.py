@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Number of deployments patched at the same time
+MAX_WORKERS = 5
+
+# Reads the deployments of all the given services in a single selector call.
+# `client` is the openshift module, or any stand-in exposing selector().
+# Returns a dict of service -> deployment APIObject.
+def snapshot(services, client):
+    if len(services) == 0:
+        return {}
+
+    objects = client.selector([f'deployment.apps/{service}' for service in services]).objects()
+    return {obj.name(): obj for obj in objects}
+
+# Current (cpu limit, memory limit, replicas) of a deployment
+def current_configuration(obj):
+    limits = obj.model['spec']['template']['spec']['containers'][0]['resources']['limits']
+    return limits['cpu'], limits['memory'], obj.model['spec']['replicas']
+
+# Sets the cpu and memory requests and limits and the replicas of a deployment
+# to those of an execution plan, and applies it
+def apply_resources(obj, plan):
+    resources = obj.model['spec']['template']['spec']['containers'][0]['resources']
+    for kind in ('requests', 'limits'):
+        resources[kind]['cpu'] = plan['cpu']
+        resources[kind]['memory'] = plan['memory']
+    obj.model['spec']['replicas'] = plan['pod_count']
+    obj.apply()
+
+# Applies an execution plan to a single deployment with `apply(obj, plan)`.
+# Returns the time spent applying it, in seconds.
+def timed_apply(apply, obj, plan):
+    start = time.perf_counter()
+    apply(obj, plan)
+    return time.perf_counter() - start
+
+# Applies the execution plans (service -> plan) to the deployments of the
+# snapshot in parallel.
+# Returns a dict of service -> apply latency in seconds, or the exception
+# raised while applying the plan of that service.
+def execute_plans(plans, objects, apply, max_workers = MAX_WORKERS):
+    if len(plans) == 0:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {service: executor.submit(timed_apply, apply, objects[service], plan) for service, plan in plans.items()}
+
+        latencies = {}
+        for service, future in futures.items():
+            try:
+                latencies[service] = future.result()
+            except Exception as e:
+                latencies[service] = e
+
+    return latencies
@@ -0,0 +1,135 @@
+import asyncio
+import sys
+import time
+
+import executor
+import jmeter_stream
+import metric_frame
+import mock_acmeair
+import rollout
+from sysdig_fetcher import build_metrics_query, fetch_all
+from sysdig_filters import namespace_filter, status_code_filter
+
+# Queries of an adapter tick, as built by a3/adapter.py get_all_metrics
+standard_metrics = {
+    "sysdig_container_net_http_request_time": {"group": "avg"},
+    "sysdig_container_net_http_request_count": {"group": "sum"},
+    "sysdig_container_cpu_used_percent": {"group": "avg"},
+    "sysdig_container_memory_used_percent": {"group": "avg"},
+}
+status_code_metrics = {
+    "sysdig_container_net_http_statuscode_request_count": {"group": "avg"},
+}
+metrics_to_collect = {
+    namespace_filter([mock_acmeair.NAMESPACE]): standard_metrics,
+    status_code_filter([mock_acmeair.NAMESPACE]): status_code_metrics,
+}
+
+def percentiles(durations):
+    durations = sorted(durations)
+    return {
+        'count': len(durations),
+        'p50_ms': durations[len(durations) // 2] * 1000,
+        'p99_ms': durations[min(len(durations) - 1, int(len(durations) * 0.99))] * 1000,
+    }
+
+# Drives the mock backend with `connections` keep-alive connections sending
+# the requests of the JMX plan in a loop for `duration` seconds.
+# Returns the throughput and the client-side latency percentiles.
+def benchmark_http(host, port, connections = 200, duration = 10):
+    def request(method, path, form = None):
+        head = f'{method} {path} HTTP/1.1\r\nHost: mock\r\n'
+        if form is None:
+            return (head + '\r\n').encode('ascii')
+        return (head + f'Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(form)}\r\n\r\n{form}').encode('ascii')
+
+    requests = [
+        request('POST', '/auth/login', 'login=uid1%40email.com&password=password'),
+        request('GET', '/customer/byid/uid1@email.com'),
+        request('POST', '/flight/queryflights', 'fromAirport=CDG&toAirport=JFK&oneWay=false'),
+        request('GET', '/booking/byuser/uid1@email.com'),
+    ]
+    stats = jmeter_stream.SamplerStats()
+
+    async def client(deadline):
+        reader, writer = await asyncio.open_connection(host, port)
+        i = 0
+        while time.monotonic() < deadline:
+            start = time.monotonic()
+            writer.write(requests[i % len(requests)])
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            elapsed = time.monotonic() - start
+            stats.add(int(start * 1000), elapsed * 1000, status.split()[1] == b'200')
+            i += 1
+        writer.close()
+
+    async def run():
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(client(deadline) for _ in range(connections)))
+
+    start = time.monotonic()
+    asyncio.run(run())
+    snapshot = stats.snapshot()
+    snapshot['throughput'] = snapshot['count'] / (time.monotonic() - start)
+    return snapshot
+
+# Times the monitor path of an adapter tick (fetch, reshape, means) against
+# a monitoring client
+def benchmark_monitor(client, ticks = 100, start = -600, end = 0, sampling = 10):
+    queries = {filter: build_metrics_query(metrics_group) for filter, metrics_group in metrics_to_collect.items()}
+    durations = []
+    for _ in range(ticks):
+        tick_start = time.perf_counter()
+        results = fetch_all(client, queries, start, end, sampling)
+        frames = [metric_frame.from_result(res, metrics_to_collect[filter]) for filter, (ok, res) in results.items() if ok]
+        frame = metric_frame.join(frames)
+        for metric in frame.metrics:
+            frame.means(metric)
+        durations.append(time.perf_counter() - tick_start)
+
+    return percentiles(durations)
+
+# Times the execute path of an adapter tick (snapshot, parallel apply) and
+# the rollout wait against an openshift stand-in
+def benchmark_execute(openshift, ticks = 20, services = mock_acmeair.SERVICES):
+    configurations = [{'cpu': '250m', 'memory': '500Mi', 'pod_count': 2}, {'cpu': '250m', 'memory': '250Mi', 'pod_count': 1}]
+    durations, rollouts = [], []
+    for tick in range(ticks):
+        tick_start = time.perf_counter()
+        objects = executor.snapshot(services, openshift)
+        executor.execute_plans({service: configurations[tick % 2] for service in services}, objects, executor.apply_resources)
+        durations.append(time.perf_counter() - tick_start)
+
+        rollout_start = time.perf_counter()
+        rollout.wait_for_rollout(services, openshift, timeout=60, poll_interval=0.1)
+        rollouts.append(time.perf_counter() - rollout_start)
+
+    return {'execute': percentiles(durations), 'rollout': percentiles(rollouts)}
+
+# Measures the overhead of the harness itself against the mock backend:
+# python harness_benchmark.py [connections] [seconds]
+def main():
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    duration = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    backend = mock_acmeair.MockBackend(latency=0.005, rollout_delay=0.5)
+    loop, server = mock_acmeair.start(backend, port=0)
+    port = server.sockets[0].getsockname()[1]
+
+    print(f"HTTP: {benchmark_http('127.0.0.1', port, connections, duration)}")
+    print(f"Monitor tick: {benchmark_monitor(mock_acmeair.FakeMonitorClient(backend))}")
+    print(f"Execute tick: {benchmark_execute(mock_acmeair.FakeOpenShift(backend))}")
+
+    mock_acmeair.stop(loop, server)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+import csv
+import math
+import os
+import re
+import sys
+import threading
+import time
+
+# Matches the lines written by the JMeter Summariser, e.g.
+# summary +   3369 in 00:00:30 =  111.9/s Avg:  1361 Min:    31 Max: 24904 Err:  2582 (76.64%) Active: 150 Started: 150 Finished: 0
+SUMMARY_PATTERN = re.compile(
+    r'summary (?P<kind>[+=])\s+(?P<count>\d+) in (?P<elapsed>[\d:]+) =\s+(?P<throughput>[\d.]+)/s'
+    r' Avg:\s+(?P<avg>\d+) Min:\s+(?P<min>\d+) Max:\s+(?P<max>\d+) Err:\s+(?P<errors>\d+) \((?P<error_rate>[\d.]+)%\)'
+    r'(?: Active: (?P<active>\d+) Started: (?P<started>\d+) Finished: (?P<finished>\d+))?'
+)
+
+# Follows a file that is still being written, like `tail -f`.
+# Yields complete lines as they are appended. Once `stop()` returns True the
+# rest of the file is read and the generator ends.
+def follow(path, poll_interval = 1, stop = None):
+    while not os.path.exists(path):
+        if stop and stop():
+            return
+        time.sleep(poll_interval)
+
+    with open(path, newline='') as f:
+        pending = ''
+        while True:
+            line = f.readline()
+            if line:
+                pending += line
+                if pending.endswith('\n'):
+                    yield pending
+                    pending = ''
+                continue
+
+            if stop and stop():
+                if pending:
+                    yield pending
+                return
+            time.sleep(poll_interval)
+
+# Parses a Summariser line. Returns None for any other line.
+def parse_summary(line):
+    match = SUMMARY_PATTERN.search(line)
+    if match is None:
+        return None
+
+    hours, minutes, seconds = (int(part) for part in match['elapsed'].split(':'))
+    summary = {
+        'kind': match['kind'],
+        'count': int(match['count']),
+        'elapsed': hours * 3600 + minutes * 60 + seconds,
+        'throughput': float(match['throughput']),
+        'avg': int(match['avg']),
+        'min': int(match['min']),
+        'max': int(match['max']),
+        'errors': int(match['errors']),
+        'error_rate': float(match['error_rate']) / 100,
+    }
+    if match['active'] is not None:
+        summary['active'] = int(match['active'])
+
+    return summary
+
+# Columns of a JTL results file read by parse_results
+RESULT_FIELDS = ('timeStamp', 'label', 'elapsed', 'success')
+
+# Parses the lines of a JTL (CSV) results file. The first line must be the
+# header written by JMeter (jmeter.save.saveservice.print_field_names=true).
+# Yields (timestamp in ms, label, elapsed in ms, success) for every sample.
+# Partial or malformed rows (e.g. a line still being written) are skipped.
+# A header lacking one of RESULT_FIELDS is reported and nothing is yielded,
+# so the threads following a results file end instead of dying on it.
+def parse_results(lines):
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    missing = [field for field in RESULT_FIELDS if field not in header]
+    if missing:
+        print(f"Results file lacks the {', '.join(missing)} column(s), not reading it", file=sys.stderr)
+        return
+
+    timestamp, label, elapsed, success = (header.index(field) for field in RESULT_FIELDS)
+    for row in reader:
+        if len(row) < len(header):
+            continue
+        try:
+            sample = int(row[timestamp]), row[label], int(row[elapsed]), row[success] == 'true'
+        except ValueError:
+            continue
+        yield sample
+
+# Quantile sketch with a bounded relative error (DDSketch).
+#
+# Values are counted in logarithmic buckets, so memory depends on the range
+# of the values (a few hundred buckets for 1ms..1h at 1% accuracy), never on
+# the number of samples.
+class QuantileSketch:
+    def __init__(self, relative_accuracy = 0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def quantile(self, q):
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return 0
+
+        seen = self.zero_count
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+
+# Running statistics of a single sampler
+class SamplerStats:
+    def __init__(self, relative_accuracy = 0.01):
+        self.count = 0
+        self.errors = 0
+        self.total_elapsed = 0
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, timestamp, elapsed, success):
+        self.count += 1
+        self.total_elapsed += elapsed
+        if not success:
+            self.errors += 1
+        if self.first_timestamp is None:
+            self.first_timestamp = timestamp
+        self.last_timestamp = max(self.last_timestamp or timestamp, timestamp + elapsed)
+        self.sketch.add(elapsed)
+
+    def snapshot(self):
+        duration = (self.last_timestamp - self.first_timestamp) / 1000 if self.count else 0
+        return {
+            'count': self.count,
+            'throughput': self.count / duration if duration > 0 else 0,
+            'error_rate': self.errors / self.count if self.count else 0,
+            'avg': self.total_elapsed / self.count if self.count else 0,
+            'p50': self.sketch.quantile(0.50),
+            'p95': self.sketch.quantile(0.95),
+            'p99': self.sketch.quantile(0.99),
+        }
+
+# Live client-side statistics of a run: per sampler (Login, QueryFlight, ...)
+# and overall ('TOTAL') from the results file, and the latest Summariser
+# interval from the JMeter log. Safe to read while the run feeds it.
+class LiveStats:
+    def __init__(self, relative_accuracy = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self.samplers = {}
+        self.total = SamplerStats(relative_accuracy)
+        self.last_summary = None
+        self.last_total_summary = None
+        self.lock = threading.Lock()
+
+    def add_sample(self, timestamp, label, elapsed, success):
+        with self.lock:
+            if label not in self.samplers:
+                self.samplers[label] = SamplerStats(self.relative_accuracy)
+            self.samplers[label].add(timestamp, elapsed, success)
+            self.total.add(timestamp, elapsed, success)
+
+    def add_summary(self, summary):
+        with self.lock:
+            if summary['kind'] == '+':
+                self.last_summary = summary
+            else:
+                self.last_total_summary = summary
+
+    def snapshot(self):
+        with self.lock:
+            snapshot = {label: stats.snapshot() for label, stats in self.samplers.items()}
+            snapshot['TOTAL'] = self.total.snapshot()
+            return snapshot
+
+# Feeds `stats` with the lines of a JMeter log file as they are written
+def watch_log(log_path, stats, stop = None, poll_interval = 1):
+    for line in follow(log_path, poll_interval, stop):
+        summary = parse_summary(line)
+        if summary:
+            stats.add_summary(summary)
+
+# Feeds `stats` with the samples of a JTL results file as they are written
+def watch_results(results_path, stats, stop = None, poll_interval = 1):
+    for timestamp, label, elapsed, success in parse_results(follow(results_path, poll_interval, stop)):
+        stats.add_sample(timestamp, label, elapsed, success)
+
+# Follows the log and/or results file of a run in background threads.
+# Returns the LiveStats being fed and the started threads.
+def watch(log_path = None, results_path = None, stop = None, poll_interval = 1, stats = None):
+    stats = stats or LiveStats()
+    threads = []
+    if log_path:
+        threads.append(threading.Thread(target=watch_log, args=(log_path, stats, stop, poll_interval), daemon=True))
+    if results_path:
+        threads.append(threading.Thread(target=watch_results, args=(results_path, stats, stop, poll_interval), daemon=True))
+    for thread in threads:
+        thread.start()
+
+    return stats, threads
+
+def format_snapshot(snapshot):
+    lines = [f"{'sampler':<28}{'count':>9}{'req/s':>9}{'err %':>8}{'avg':>8}{'p50':>8}{'p95':>8}{'p99':>8}"]
+    for label, values in snapshot.items():
+        p50, p95, p99 = (values[q] or 0 for q in ('p50', 'p95', 'p99'))
+        lines.append(
+            f"{label:<28}{values['count']:>9}{values['throughput']:>9.1f}{values['error_rate'] * 100:>8.2f}"
+            f"{values['avg']:>8.0f}{p50:>8.0f}{p95:>8.0f}{p99:>8.0f}"
+        )
+    return '\n'.join(lines)
+
+# Prints live statistics of a run every `interval` seconds, e.g.
+# python jmeter_stream.py logs/output_logs.txt logs/TEST_LOW_LOAD.jtl
+def main():
+    log_path = sys.argv[1] if len(sys.argv) > 1 else 'logs/output_logs.txt'
+    results_path = sys.argv[2] if len(sys.argv) > 2 else None
+    interval = 10
+
+    stats, _ = watch(log_path, results_path)
+    while True:
+        time.sleep(interval)
+        if stats.last_summary:
+            summary = stats.last_summary
+            print(f"summary: {summary['throughput']}/s avg {summary['avg']} ms, errors {summary['error_rate'] * 100:.2f}%")
+        if results_path:
+            print(format_snapshot(stats.snapshot()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+import csv
+import os
+import sys
+
+import numpy as np
+
+import run_store
+
+REQUEST_TIME = 'sysdig_container_net_http_request_time'
+
+# Width in seconds of the common time grid, the Sysdig sampling of the drivers
+GRID = 10
+
+# Service backing every sampler of the JMX plan
+SAMPLER_SERVICES = {
+    'Login': 'acmeair-authservice',
+    'View Profile Information': 'acmeair-customerservice',
+    'Update Customer': 'acmeair-customerservice',
+    'QueryFlight': 'acmeair-flightservice',
+    'BookFlight': 'acmeair-bookingservice',
+    'List Bookings': 'acmeair-bookingservice',
+    'Cancel Booking': 'acmeair-bookingservice',
+}
+
+# Offset separating the services in combined service * SERVICE_STRIDE + timestamp
+# keys, far above any epoch timestamp in seconds
+SERVICE_STRIDE = 10 ** 12
+
+BREAKDOWN_FIELDS = ['timestamp', 'service', 'requests', 'client_ms', 'server_ms', 'network_queue_ms', 'server_share']
+
+# Reads the (timestamp in ms, label, elapsed in ms) columns of a JTL file in a single pass
+def read_jtl(path):
+    timestamps, labels, elapsed = [], [], []
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=str), np.empty(0)
+
+        timestamp, label, elapsed_column = (header.index(field) for field in ('timeStamp', 'label', 'elapsed'))
+        for row in reader:
+            if len(row) < len(header):
+                continue
+            timestamps.append(row[timestamp])
+            labels.append(row[label])
+            elapsed.append(row[elapsed_column])
+
+    return np.array(timestamps, dtype=np.int64), np.array(labels), np.array(elapsed, dtype=float)
+
+# Client latency of every service on the time grid: samples are mapped to the
+# service of their sampler and binned by the cell they started in.
+# Returns (cell timestamps, service indexes, request counts, mean latency in
+# ms), sorted by service then timestamp. Samplers not in sampler_services are
+# left out.
+def client_grid(timestamps, labels, elapsed, services, grid = GRID, sampler_services = SAMPLER_SERVICES):
+    names, label_codes = np.unique(labels, return_inverse=True)
+    service_index = {service: i for i, service in enumerate(services)}
+    label_services = np.array([service_index.get(sampler_services.get(name), -1) for name in names], dtype=np.int64)
+    service_codes = label_services[label_codes] if len(labels) else np.empty(0, dtype=np.int64)
+
+    keep = service_codes >= 0
+    cells = timestamps[keep] // 1000 // grid * grid
+    keys, inverse = np.unique(service_codes[keep] * SERVICE_STRIDE + cells, return_inverse=True)
+    counts = np.bincount(inverse, minlength=len(keys))
+    sums = np.bincount(inverse, weights=elapsed[keep], minlength=len(keys))
+
+    return keys % SERVICE_STRIDE, keys // SERVICE_STRIDE, counts, sums / np.maximum(counts, 1)
+
+# Server latency of every service as (timestamps, service indexes, latency in
+# ms) sorted by service then timestamp, from a frame of REQUEST_TIME in ns
+def server_series(frame, services):
+    if len(frame) == 0 or REQUEST_TIME not in frame.metric_index:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0)
+
+    columns = [frame.service_index[service] for service in services if service in frame.service_index]
+    indexes = np.array([i for i, service in enumerate(services) if service in frame.service_index], dtype=np.int64)
+    matrix = frame.metric(REQUEST_TIME)[:, columns]
+
+    # Service-major flattening keeps the result sorted by service then timestamp
+    values = matrix.T.ravel()
+    timestamps = np.tile(frame.timestamps, len(columns))
+    service_codes = np.repeat(indexes, len(frame.timestamps))
+    keep = ~np.isnan(values)
+    order = np.lexsort((timestamps[keep], service_codes[keep]))
+
+    return timestamps[keep][order], service_codes[keep][order], values[keep][order] / 10 ** 6
+
+# Sort-merge (as-of) join of two sorted key arrays: index in `right` of the
+# last key at or before every key of `left`, -1 when there is none within
+# `tolerance`. Runs in O((n + m) log m) with no Python loop.
+def asof_join(left, right, tolerance):
+    indexes = np.searchsorted(right, left, side='right') - 1
+    matched = indexes >= 0
+    matched[matched] &= left[matched] - right[indexes[matched]] < tolerance
+
+    return np.where(matched, indexes, -1)
+
+# Joins the client and server latency of every service on the time grid and
+# splits the client latency in server time and network/queueing time (the
+# rest: JMeter, network, ingress and queueing before the service counts it).
+#
+# Note Sysdig averages all the requests a service served, including the calls
+# of other services, so the split is an estimate per grid cell.
+# Returns a dict of BREAKDOWN_FIELDS -> arrays, one element per matched cell.
+def breakdown(jtl_path, frame, grid = GRID, sampler_services = SAMPLER_SERVICES):
+    services = sorted(set(sampler_services.values()))
+    client_t, client_s, requests, client_ms = client_grid(*read_jtl(jtl_path), services, grid, sampler_services)
+    server_t, server_s, server_ms = server_series(frame, services)
+
+    indexes = asof_join(client_s * SERVICE_STRIDE + client_t, server_s * SERVICE_STRIDE + server_t, grid)
+    matched = indexes >= 0
+    server = server_ms[indexes[matched]]
+    client = client_ms[matched]
+
+    return {
+        'timestamp': client_t[matched],
+        'service': np.array(services)[client_s[matched]] if len(services) else np.empty(0, dtype=str),
+        'requests': requests[matched],
+        'client_ms': client,
+        'server_ms': server,
+        'network_queue_ms': client - server,
+        'server_share': np.divide(server, client, out=np.zeros_like(server), where=client > 0),
+    }
+
+# Request-weighted means of a breakdown for every service
+def summarize(cells):
+    summary = {}
+    for service in np.unique(cells['service']):
+        rows = cells['service'] == service
+        weights = cells['requests'][rows]
+        client = np.average(cells['client_ms'][rows], weights=weights)
+        server = np.average(cells['server_ms'][rows], weights=weights)
+        summary[str(service)] = {
+            'requests': int(weights.sum()),
+            'client_ms': float(client),
+            'server_ms': float(server),
+            'network_queue_ms': float(client - server),
+            'server_share': float(server / client) if client > 0 else 0,
+        }
+
+    return summary
+
+def write_breakdown(cells, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(BREAKDOWN_FIELDS)
+        writer.writerows(zip(*(cells[field].tolist() for field in BREAKDOWN_FIELDS)))
+
+# python latency_breakdown.py logs/TEST_LOW_LOAD.jtl output/sysdig_container_net_http_request_time_TEST_LOW_LOAD_.csv
+# python latency_breakdown.py logs/TEST_LOW_LOAD.jtl <run id> TEST_LOW_LOAD
+def main():
+    jtl_path = sys.argv[1]
+    frame = run_store.load_frame(sys.argv[2], REQUEST_TIME, sys.argv[3] if len(sys.argv) > 3 else None)
+
+    cells = breakdown(jtl_path, frame)
+    name = os.path.splitext(os.path.basename(jtl_path))[0]
+    write_breakdown(cells, f'output/latency_breakdown_{name}.csv')
+
+    print(f"{'service':<28}{'requests':>10}{'client ms':>11}{'server ms':>11}{'net/queue':>11}{'server %':>10}")
+    for service, values in summarize(cells).items():
+        print(f"{service:<28}{values['requests']:>10}{values['client_ms']:>11.1f}{values['server_ms']:>11.1f}"
+              f"{values['network_queue_ms']:>11.1f}{values['server_share'] * 100:>10.1f}")
+
+if __name__ == '__main__':
+    main()
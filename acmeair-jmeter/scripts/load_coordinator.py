@@ -0,0 +1,157 @@
+import csv
+import os
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+import jmeter_stream
+import load_runner
+
+# Load generators of a distributed run, one per line (host, weight, directory).
+# hosts.csv lists the AcmeAir host under test, not the load generators.
+#
+# Workers on LOCAL_HOSTS are JMeter processes of this machine. Others are
+# started over ssh in `directory`, a copy of this scripts folder (JMeter,
+# JMX plans and hosts.csv) on the remote host. Every worker gets a share of
+# the threads and of the user ids proportional to its weight.
+WORKERS_FILE = 'workers.csv'
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1')
+
+# Seconds between two aggregated snapshots printed during a run
+REPORT_INTERVAL = 30
+
+def read_workers(path = WORKERS_FILE):
+    with open(path, newline='') as f:
+        return [
+            {'host': row['host'], 'weight': float(row.get('weight') or 1), 'directory': row.get('directory') or '.'}
+            for row in csv.DictReader(f)
+        ]
+
+def is_local(worker):
+    return worker['host'] in LOCAL_HOSTS
+
+# Splits `total` into integer shares proportional to `weights` (largest
+# remainder), summing to `total`
+def split_weighted(total, weights):
+    quotas = [total * weight / sum(weights) for weight in weights]
+    shares = [int(quota) for quota in quotas]
+    by_remainder = sorted(range(len(weights)), key=lambda i: quotas[i] - shares[i], reverse=True)
+    for i in by_remainder[:total - sum(shares)]:
+        shares[i] += 1
+    return shares
+
+# Runs a shell command in the directory of a remote worker
+def ssh_command(worker, command):
+    return ['ssh', worker['host'], f"cd {shlex.quote(worker['directory'])} && {command}"]
+
+# Starts the JMeter process of a worker, after removing the log and results
+# files of a previous run (JMeter appends to an existing results file, and
+# they must be gone before their lines are followed)
+def start_worker(worker, worker_name, command):
+    files = [f'logs/{worker_name}.log', f'logs/{worker_name}.jtl']
+    if is_local(worker):
+        for path in files:
+            if os.path.exists(path):
+                os.remove(path)
+        return subprocess.Popen(command)
+
+    subprocess.run(ssh_command(worker, f"mkdir -p logs && rm -f {' '.join(files)}"))
+    return subprocess.Popen(ssh_command(worker, shlex.join(command)))
+
+# Lines of the results file of a worker as they are written: followed on disk
+# for a local worker, through `tail -F` over ssh for a remote one. `stop()`
+# ends the stream. Returns (lines, close) where close() ends a remote tail.
+def follow_results(worker, results_file, stop):
+    if is_local(worker):
+        return jmeter_stream.follow(f'logs/{results_file}', stop=stop), lambda: None
+
+    tail = subprocess.Popen(
+        ssh_command(worker, f"exec tail -n +1 -F logs/{shlex.quote(results_file)}"),
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    return tail.stdout, tail.terminate
+
+# Copies the log and results files of a remote worker to logs/
+def fetch_results(worker, worker_name):
+    if is_local(worker):
+        return True
+    remote = [f"{worker['host']}:{worker['directory']}/logs/{worker_name}{extension}" for extension in ('.log', '.jtl')]
+    return subprocess.run(['scp', '-q', *remote, 'logs/']).returncode == 0
+
+# Runs a scenario of run_parameters across `workers` (see read_workers) and
+# waits for all of them to end. Returns the (start, end) epoch timestamps of
+# the run, starting at the synchronized start of the threads.
+#
+# Every worker gets its share of the threads and a disjoint slice of the user
+# ids, and starts its threads at the same time (START_AT) whatever its ssh
+# and JVM startup time. Their samples are aggregated live into a single
+# jmeter_stream.LiveStats, printed every REPORT_INTERVAL seconds, and their
+# results files merged in logs/<name>.jtl once they ended.
+def run_scenario(name, parameters, workers, jmx = load_runner.JMX_PLAN, properties = None, report_interval = REPORT_INTERVAL):
+    weights = [worker['weight'] for worker in workers]
+    shares = split_weighted(parameters['thread_count'], weights)
+    active = [(worker, threads) for worker, threads in zip(workers, shares) if threads > 0]
+    slices = load_runner.user_slices(split_weighted(load_runner.USER_COUNT, [worker['weight'] for worker, _ in active]))
+    start_at = int(time.time()) + load_runner.START_LEAD
+
+    processes = []
+    for i, ((worker, threads), (first_user, last_user)) in enumerate(zip(active, slices)):
+        worker_name = f'{name}_worker{i}'
+        worker_properties = {**(properties or {}), 'USER_MIN': first_user, 'USER': last_user, 'START_AT': start_at}
+        command = load_runner.jmeter_command(
+            f'{worker_name}.log', threads, parameters['duration'], parameters['ramp'], parameters.get('delay', 0),
+            f'{worker_name}.jtl', jmx, worker_properties,
+        )
+        print(f"Starting {threads} threads on {worker['host']} for users {first_user}..{last_user}")
+        processes.append((worker, worker_name, start_worker(worker, worker_name, command)))
+
+    stats = jmeter_stream.LiveStats()
+    ended = lambda: all(process.poll() is not None for _, _, process in processes)
+    streams = [follow_results(worker, f'{worker_name}.jtl', ended) for worker, worker_name, _ in processes]
+
+    def aggregate(lines):
+        for timestamp, label, elapsed, success in jmeter_stream.parse_results(lines):
+            stats.add_sample(timestamp, label, elapsed, success)
+
+    threads = [threading.Thread(target=aggregate, args=(lines,), daemon=True) for lines, _ in streams]
+    for thread in threads:
+        thread.start()
+
+    last_report = time.time()
+    while not ended():
+        time.sleep(1)
+        if time.time() - last_report >= report_interval:
+            print(jmeter_stream.format_snapshot({'TOTAL': stats.snapshot()['TOTAL']}))
+            last_report = time.time()
+    end = int(time.time())
+
+    # Remote tails are stopped once they had time to send the last samples
+    time.sleep(1)
+    for _, close in streams:
+        close()
+    for thread in threads:
+        thread.join()
+
+    fetched = [worker_name for worker, worker_name, _ in processes if fetch_results(worker, worker_name)]
+    if len(fetched) < len(processes):
+        print(f"Failed to fetch the results of {len(processes) - len(fetched)} workers")
+    load_runner.merge_results([f'{worker_name}.jtl' for worker_name in fetched], f'{name}.jtl')
+    print(jmeter_stream.format_snapshot(stats.snapshot()))
+
+    return start_at, end
+
+# Runs a single scenario across the workers of a workers file, e.g.
+# python load_coordinator.py TEST_HIGH_LOAD 1200 900 60 workers.csv
+def main():
+    name = sys.argv[1]
+    parameters = {'thread_count': int(sys.argv[2]), 'duration': int(sys.argv[3]), 'ramp': int(sys.argv[4]), 'delay': 0}
+    workers = read_workers(sys.argv[5] if len(sys.argv) > 5 else WORKERS_FILE)
+
+    start, end = run_scenario(name, parameters, workers)
+    print(f"Scenario {name} ran from {start} to {end}, results in logs/{name}.jtl")
+
+if __name__ == '__main__':
+    main()
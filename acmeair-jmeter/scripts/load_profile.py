@@ -0,0 +1,182 @@
+import csv
+import math
+import os
+import re
+import sys
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+import load_runner
+
+REQUEST_COUNT = 'sysdig_container_net_http_request_count'
+
+# Seconds of replay between two points of the replayed schedule
+SEGMENT = 30
+
+# Response time (seconds) expected of a sample and headroom used to size the
+# thread count of a profile by Little's law
+RESPONSE_TIME = 0.5
+HEADROOM = 1.5
+
+# Lowest rate (req/s) of a schedule: a Constant Throughput Timer at 0 does
+# not throttle at all
+MIN_RATE = 0.1
+
+# Derived plans are written next to the run outputs. Their relative data files
+# (hosts.csv, Airports.csv) are rewritten to still point at this folder.
+PROFILE_JMX = 'output/profile_{name}.jmx'
+
+# Milliseconds since the threads of the run started: the synchronized start
+# of a multi-worker run (START_AT), or the start of the test
+ELAPSED_MS = "${__time(,)} - (${__P(START_AT,0)} * 1000 > ${TESTSTART.MS} ? ${__P(START_AT,0)} * 1000 : ${TESTSTART.MS})"
+
+# Reads a load profile: a CSV of (timestamp in seconds, rate in req/s) rows,
+# with or without a header. Returns the timestamps and rates ordered by time.
+def read_profile(path):
+    timestamps, rates = [], []
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            try:
+                timestamps.append(float(row[0]))
+                rates.append(float(row[1]))
+            except (IndexError, ValueError):
+                continue
+
+    order = np.argsort(timestamps, kind='stable')
+    return np.array(timestamps)[order], np.array(rates)[order]
+
+def write_profile(path, timestamps, rates):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp', 'rate'])
+        writer.writerows(zip(np.asarray(timestamps).tolist(), np.asarray(rates).tolist()))
+
+# Load profile recorded by Sysdig: the request rate summed over `services`
+# (all of them by default) at every timestamp of a frame of REQUEST_COUNT,
+# see run_store.load_frame.
+# Services calling each other count their calls too, scale it accordingly.
+def profile_from_frame(frame, services = None):
+    services = [service for service in (services or frame.services) if service in frame.service_index]
+    if len(frame) == 0 or len(services) == 0:
+        return np.empty(0), np.empty(0)
+
+    columns = [frame.service_index[service] for service in services]
+    return frame.timestamps.astype(float), np.nansum(frame.metric(REQUEST_COUNT)[:, columns], axis=1)
+
+# Synthetic day of traffic: a diurnal curve between `low` and `high` req/s
+# peaking at `peak_hour`, with (hour, extra req/s, minutes) spikes on top
+def diurnal_profile(low = 5, high = 60, peak_hour = 14, spikes = ((10, 40, 15), (20, 30, 10)), step = 60):
+    timestamps = np.arange(0, 24 * 3600, step, dtype=float)
+    hours = timestamps / 3600
+    rates = low + (high - low) * (1 + np.cos((hours - peak_hour) / 24 * 2 * np.pi)) / 2
+    for hour, extra, minutes in spikes:
+        rates += extra * (np.abs(hours - hour) * 60 < minutes / 2)
+    return timestamps, rates
+
+# Compresses a profile into `duration` seconds of replay: the shape is kept,
+# time runs span / duration times faster. The replay is resampled to one
+# point per `segment` seconds, the mean of the recorded rates falling into
+# the segment (interpolated when none does), scaled by `rate_scale` to fit
+# the capacity of the deployment under test.
+# Returns the replay times (seconds) and rates (req/s) of the points.
+def compress(timestamps, rates, duration, segment = SEGMENT, rate_scale = 1):
+    span = timestamps[-1] - timestamps[0]
+    replay = (timestamps - timestamps[0]) * (duration / span if span > 0 else 0)
+
+    count = max(int(math.ceil(duration / segment)), 1)
+    bins = np.minimum((replay // segment).astype(int), count - 1)
+    sums = np.bincount(bins, weights=rates, minlength=count)
+    counts = np.bincount(bins, minlength=count)
+
+    times = np.minimum((np.arange(count) + 0.5) * segment, duration)
+    means = np.interp(times, replay, rates)
+    means[counts > 0] = sums[counts > 0] / counts[counts > 0]
+
+    return times, np.maximum(means * rate_scale, MIN_RATE)
+
+# Threads needed to sustain the peak rate of a schedule. By Little's law the
+# number of requests in flight is the arrival rate times the response time.
+def thread_count(rates, response_time = RESPONSE_TIME, headroom = HEADROOM):
+    return max(int(math.ceil(max(rates) * response_time * headroom)), 1)
+
+# JEXL script of the rate (samples per minute) of a schedule at the elapsed
+# time of the run: linear between two points, flat before the first and after
+# the last one. Time is only read once per evaluation.
+def schedule_expression(times, rates):
+    expression = f'{rates[-1] * 60:.2f}'
+    for i in reversed(range(len(times) - 1)):
+        start, end = times[i] * 1000, times[i + 1] * 1000
+        slope = (rates[i + 1] - rates[i]) * 60 / (end - start)
+        expression = f'(e < {end:.0f} ? {rates[i] * 60:.2f} + (e - {start:.0f}) * ({slope:.6g}) : {expression})'
+
+    return f'var e = {ELAPSED_MS}; e < {times[0] * 1000:.0f} ? {rates[0] * 60:.2f} : {expression}'
+
+# Derives a plan from `jmx` whose throughput follows the schedule: a shared
+# Constant Throughput Timer over the thread group, whose target is evaluated
+# again before every sample.
+#
+# The Throughput Shaping Timer of jmeter-plugins would read the same schedule
+# from a load_profile property, but the plugins are not part of the JMeter
+# shipped here.
+def derive_plan(times, rates, path, jmx = load_runner.JMX_PLAN):
+    with open(jmx) as f:
+        plan = f.read()
+
+    # The timer is the first child of the thread group, indented like the others
+    def insert_timer(match):
+        indent, inner = match[2], match[2] + '  '
+        timer = (
+            f'{indent}<ConstantThroughputTimer guiclass="TestBeanGUI" testclass="ConstantThroughputTimer" testname="Load profile" enabled="true">\n'
+            # Rate shared by all the active threads of the thread group
+            f'{inner}<intProp name="calcMode">4</intProp>\n'
+            f'{inner}<stringProp name="throughput">{escape("${__jexl3(" + schedule_expression(times, rates) + ",)}")}</stringProp>\n'
+            f'{indent}</ConstantThroughputTimer>\n'
+            f'{indent}<hashTree/>\n'
+        )
+        return match[1] + timer + match[2]
+
+    plan, inserted = re.subn(r'(</ThreadGroup>\s*<hashTree>[ \t]*\n)([ \t]*)', insert_timer, plan, count=1)
+    if inserted == 0:
+        raise ValueError(f"No thread group to throttle in {jmx}")
+
+    directory = os.path.dirname(path)
+    plan = re.sub(
+        r'(<stringProp name="filename">)([^<]+)(</stringProp>)',
+        lambda match: match[1] + (match[2] if os.path.isabs(match[2]) else os.path.relpath(match[2], directory)) + match[3],
+        plan,
+    )
+    with open(path, 'w') as f:
+        f.write(plan)
+
+# Replays a profile in `duration` seconds as scenario `name` (see
+# load_runner.run_scenarios for `collect`). Returns the schedule replayed.
+def run_profile(name, timestamps, rates, duration, rate_scale = 1, collect = None, jmx = load_runner.JMX_PLAN, workers = 1):
+    times, schedule = compress(timestamps, rates, duration, SEGMENT, rate_scale)
+    path = PROFILE_JMX.format(name=name)
+    derive_plan(times, schedule, path, jmx)
+
+    parameters = {'thread_count': thread_count(schedule), 'duration': duration, 'ramp': SEGMENT, 'delay': 0, 'workers': workers}
+    print(f"Replaying {name} in {duration}s: {schedule.min():.1f} to {schedule.max():.1f} req/s with {parameters['thread_count']} threads")
+    load_runner.run_scenarios({name: parameters}, collect, path)
+
+    return times, schedule
+
+# Replays a recorded profile, or a synthetic day, time-compressed, e.g.
+# python load_profile.py input/day.csv 1800 0.5
+# python load_profile.py diurnal 1800
+def main():
+    source = sys.argv[1]
+    duration = int(sys.argv[2]) if len(sys.argv) > 2 else 1800
+    rate_scale = float(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    if source == 'diurnal':
+        timestamps, rates = diurnal_profile()
+    else:
+        timestamps, rates = read_profile(source)
+    name = 'PROFILE_' + os.path.splitext(os.path.basename(source))[0].upper()
+
+    run_profile(name, timestamps, rates, duration, rate_scale)
+
+if __name__ == '__main__':
+    main()
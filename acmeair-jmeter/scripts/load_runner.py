@@ -0,0 +1,248 @@
+import csv
+import heapq
+import os
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jmeter_stream
+
+JMETER = './apache-jmeter-5.6.2/bin/jmeter'
+JMX_PLAN = './AcmeAir-microservices-mpJwt.jmx'
+
+# Seconds to wait after a scenario ends before pulling its metrics,
+# so Sysdig has time to ingest the last samples
+METRICS_DELAY = 30
+
+# UDP port a non-GUI JMeter listens on for shutdown commands
+# (jmeterengine.nongui.port). Workers are given their own free port from it on.
+SHUTDOWN_PORT = 4445
+
+# Seconds between two Summariser lines of a guarded run
+GUARD_SUMMARY_INTERVAL = 10
+
+# Users uid0@email.com .. uid<USER_COUNT - 1>@email.com of the AcmeAir
+# database, drawn at random by the plans between USER_MIN and USER
+USER_COUNT = 1000
+
+# Seconds between starting the processes of a multi-process run and the
+# synchronized start of their threads (START_AT), covering the JVM startup
+START_LEAD = 15
+
+# Builds the JMeter command line for a non-GUI run with the given parameters.
+# Extra JMeter properties can be passed as a dict in `properties`, e.g.
+# USER_MIN and USER to draw the users from a slice of the user ids, or
+# START_AT (epoch seconds) to start the threads at a given time.
+def jmeter_command(log_file = 'output_logs.txt', thread_count = 60, duration = 600, ramp = 30, delay = 0, results_file = None, jmx = JMX_PLAN, properties = None):
+    command = [
+        JMETER, '-n', '-t', jmx, '-DusePureIDs=true', '-j', f'logs/{log_file}',
+        f'-JTHREAD={thread_count}', f'-JDURATION={duration}', f'-JRAMP={ramp}', f'-JDELAY={delay}',
+    ]
+    if results_file:
+        command += ['-l', f'logs/{results_file}']
+    for key, value in {'USER_MIN': 0, 'USER': USER_COUNT - 1, **(properties or {})}.items():
+        command.append(f'-J{key}={value}')
+
+    return command
+
+# Starts a JMeter load test with the given parameters without waiting for it
+# to end. Returns the JMeter process.
+def start_load_test(log_file = 'output_logs.txt', thread_count = 60, duration = 600, ramp = 30, delay = 0, results_file = None, jmx = JMX_PLAN, properties = None):
+    return subprocess.Popen(jmeter_command(log_file, thread_count, duration, ramp, delay, results_file, jmx, properties))
+
+# Performs a JMeter load test with the given parameters and waits for it to end
+def load_test(log_file = 'output_logs.txt', thread_count = 60, duration = 600, ramp = 30, delay = 0, results_file = None, jmx = JMX_PLAN, properties = None):
+    return start_load_test(log_file, thread_count, duration, ramp, delay, results_file, jmx, properties).wait()
+
+# Asks a running non-GUI JMeter to end its test. 'Shutdown' lets the threads
+# finish their current sample, 'StopTestNow' stops them at once.
+def stop_test(command = 'Shutdown', port = SHUTDOWN_PORT, host = 'localhost'):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+        s.sendto(command.encode('ascii'), (host, port))
+
+# `count` UDP ports free for the shutdown listeners of JMeter processes,
+# from `first` on
+def free_ports(count, first = SHUTDOWN_PORT):
+    ports, port = [], first
+    while len(ports) < count:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            try:
+                s.bind(('', port))
+                ports.append(port)
+            except OSError:
+                pass
+        port += 1
+    return ports
+
+# Splits a thread count between `workers` JMeter processes
+def split_threads(thread_count, workers):
+    share, remainder = divmod(thread_count, workers)
+    return [share + 1 if i < remainder else share for i in range(workers)]
+
+# Splits the user ids into consecutive, disjoint (first, last) slices of the
+# given sizes, so concurrent workers never log in as the same user
+def user_slices(sizes):
+    slices, first = [], 0
+    for size in sizes:
+        slices.append((first, first + size - 1))
+        first += size
+    return slices
+
+# Starts `workers` JMeter processes sharing the thread count of a scenario,
+# so a single big scenario is not capped by what one JVM can drive.
+# Each worker writes its own log and results file under logs/, a single
+# worker writes logs/<name>.log and logs/<name>.jtl. Both are removed first:
+# JMeter appends to an existing results file, and nothing should read the
+# log of a previous run.
+# Several workers draw their users from disjoint slices of the user ids and
+# start their threads together, START_LEAD seconds after being started.
+# Every worker listens for shutdown commands on its own port.
+# Returns a list of (process, results_file, shutdown port).
+def start_workers(name, thread_count, duration, ramp, delay = 0, workers = 1, jmx = JMX_PLAN, properties = None):
+    shares = [threads for threads in split_threads(thread_count, workers) if threads > 0]
+    slices = user_slices(split_threads(USER_COUNT, len(shares)))
+    ports = free_ports(len(shares))
+    start_at = int(time.time()) + START_LEAD
+
+    processes = []
+    for i, (threads, (first_user, last_user), port) in enumerate(zip(shares, slices, ports)):
+        worker_name = name if workers == 1 else f'{name}_worker{i}'
+        results_file = f'{worker_name}.jtl'
+        for path in (f'logs/{worker_name}.log', f'logs/{results_file}'):
+            if os.path.exists(path):
+                os.remove(path)
+        worker_properties = {**(properties or {}), 'jmeterengine.nongui.port': port, 'jmeterengine.nongui.maxport': port}
+        if workers > 1:
+            worker_properties.update({'USER_MIN': first_user, 'USER': last_user, 'START_AT': start_at})
+        process = start_load_test(f'{worker_name}.log', threads, duration, ramp, delay, results_file, jmx, worker_properties)
+        processes.append((process, results_file, port))
+
+    return processes
+
+# Merges JTL (CSV) results files written by several workers into a single
+# file ordered by sample timestamp. Files are streamed, never fully loaded.
+def merge_results(results_files, output_file):
+    files = [open(f'logs/{results_file}', newline='') for results_file in results_files]
+    try:
+        readers = [csv.reader(f) for f in files]
+        header = None
+        for reader in readers:
+            header = next(reader, None) or header
+        if header is None:
+            return
+
+        timestamp = header.index('timeStamp')
+        rows = heapq.merge(*readers, key=lambda row: int(row[timestamp]))
+        with open(f'logs/{output_file}', 'w', newline='') as output:
+            writer = csv.writer(output)
+            writer.writerow(header)
+            writer.writerows(rows)
+    finally:
+        for f in files:
+            f.close()
+
+# Feeds the Summariser lines of every worker to its guard while the workers
+# run. As soon as a guard reaches a verdict every worker is shut down.
+# Returns that verdict, None when the run ended on its own.
+def guard_workers(processes, guards, poll_interval = 1, shutdown_timeout = 30):
+    verdicts = []
+    ended = lambda: len(verdicts) > 0 or all(process.poll() is not None for process, _, _ in processes)
+
+    def watch(log_path, guard):
+        for line in jmeter_stream.follow(log_path, poll_interval, ended):
+            summary = jmeter_stream.parse_summary(line)
+            if summary and guard.update(summary):
+                verdicts.append(guard.verdict)
+                return
+
+    threads = [
+        threading.Thread(target=watch, args=(f"logs/{results_file[:-len('.jtl')]}.log", guard), daemon=True)
+        for (_, results_file, _), guard in zip(processes, guards)
+    ]
+    for thread in threads:
+        thread.start()
+    while not ended():
+        time.sleep(poll_interval)
+
+    if len(verdicts) > 0:
+        for _, _, port in processes:
+            stop_test(port=port)
+        for process, _, _ in processes:
+            try:
+                process.wait(timeout=shutdown_timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+    for thread in threads:
+        thread.join()
+
+    return verdicts[0] if len(verdicts) > 0 else None
+
+# Runs a scenario of run_parameters and waits for all its workers to end.
+# Returns the (start, end) epoch timestamps of the run.
+#
+# `guard` optionally makes a run_guard.RunGuard-like object per worker,
+# called with the ramp of the scenario: the run is then stopped early once
+# one of them gives up on it.
+#
+# Scenarios setting 'workers_file' are spread over the load generators it
+# lists by load_coordinator, which does not guard them.
+def run_scenario(name, parameters, jmx = JMX_PLAN, properties = None, guard = None):
+    if 'workers_file' in parameters:
+        import load_coordinator
+        workers = load_coordinator.read_workers(parameters['workers_file'])
+        return load_coordinator.run_scenario(name, parameters, workers, jmx, properties)
+
+    workers = parameters.get('workers', 1)
+    if guard:
+        properties = {**(properties or {}), 'summariser.interval': GUARD_SUMMARY_INTERVAL}
+
+    start = int(time.time())
+    processes = start_workers(
+        name, parameters['thread_count'], parameters['duration'], parameters['ramp'], parameters['delay'],
+        workers, jmx, properties,
+    )
+    if guard:
+        verdict = guard_workers(processes, [guard(ramp = parameters['ramp']) for _ in processes])
+        if verdict:
+            print(f"Scenario {name} stopped early: {verdict}")
+    for process, _, _ in processes:
+        process.wait()
+    end = int(time.time())
+
+    if workers > 1:
+        merge_results([results_file for _, results_file, _ in processes], f'{name}.jtl')
+
+    return start, end
+
+# Collects the metrics of a finished scenario once Sysdig had time to ingest them
+def collect_after_delay(collect, name, parameters, start, end, delay):
+    remaining = end + delay - time.time()
+    if remaining > 0:
+        time.sleep(remaining)
+
+    collect(name, parameters, start, end)
+
+# Runs every scenario of run_parameters one after the other.
+#
+# Scenarios are started as soon as the previous one ends: metrics of a finished
+# scenario are pulled in the background by `collect(name, parameters, start, end)`
+# (absolute epoch timestamps) while the next one warms up.
+# Each scenario may set 'workers' to spread its threads across several JMeter
+# processes, or 'workers_file' to spread them across several hosts, in which
+# case their results are merged in logs/<name>.jtl.
+# With a `guard`, scenarios are stopped early (see run_scenario).
+def run_scenarios(run_parameters, collect = None, jmx = JMX_PLAN, properties = None, metrics_delay = METRICS_DELAY, guard = None):
+    with ThreadPoolExecutor(max_workers=1) as collector:
+        collections = []
+        for name, parameters in run_parameters.items():
+            print(f"Starting scenario {name}")
+            start, end = run_scenario(name, parameters, jmx, properties, guard)
+            print(f"Scenario {name} completed")
+
+            if collect:
+                collections.append(collector.submit(collect_after_delay, collect, name, parameters, start, end, metrics_delay))
+
+        for collection in collections:
+            collection.result()
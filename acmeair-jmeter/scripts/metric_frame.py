@@ -0,0 +1,171 @@
+import csv
+
+import numpy as np
+
+# Columnar view of a Sysdig get_data result.
+#
+# A result is a list of {'t': timestamp, 'd': [workload, m1, m2, ...]} samples.
+# It is turned in a single pass into a timestamp x service x metric array so
+# every metric reads from the same buffer instead of walking the samples again.
+# Missing samples are stored as NaN.
+class MetricFrame:
+    def __init__(self, timestamps, services, metrics, values):
+        self.timestamps = timestamps
+        self.services = services
+        self.metrics = metrics
+        self.values = values
+        self.service_index = {service: i for i, service in enumerate(services)}
+        self.metric_index = {metric: i for i, metric in enumerate(metrics)}
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    # timestamp x service matrix of the given metric
+    def metric(self, metric):
+        return self.values[:, :, self.metric_index[metric]]
+
+    # Values of the given metric for a single service, in timestamp order
+    def series(self, metric, service):
+        if metric not in self.metric_index or service not in self.service_index:
+            return np.empty(0)
+        return self.values[:, self.service_index[service], self.metric_index[metric]]
+
+    # Mean of the given metric for every service, ignoring missing samples.
+    # Services without any sample get a mean of 0.
+    def means(self, metric, services = None):
+        services = self.services if services is None else services
+        if metric not in self.metric_index or len(self.timestamps) == 0:
+            return {service: 0 for service in services}
+
+        matrix = self.metric(metric)
+        counts = np.count_nonzero(~np.isnan(matrix), axis=0)
+        sums = np.nansum(matrix, axis=0)
+        means = np.divide(sums, counts, out=np.zeros_like(sums), where=counts > 0)
+
+        return {
+            service: float(means[self.service_index[service]]) if service in self.service_index else 0
+            for service in services
+        }
+
+# Separates the keys of a service grouped by several keys, e.g. 'acmeair-g1/acmeair-authservice'
+KEY_SEPARATOR = '/'
+
+def empty_frame(metrics = ()):
+    metrics = list(metrics)
+    return MetricFrame(np.empty(0, dtype=np.int64), [], metrics, np.empty((0, 0, len(metrics))))
+
+# Builds a MetricFrame out of a get_data result. `metrics` are the names of
+# the values following the workload name in every sample. Results grouped by
+# several keys (e.g. namespace and workload) set `key_count`: the services of
+# the frame are then the keys joined with KEY_SEPARATOR.
+def from_result(res, metrics, key_count = 1):
+    metrics = list(metrics)
+    samples = res.get('data', []) if res else []
+    if len(samples) == 0:
+        return empty_frame(metrics)
+
+    timestamps = np.fromiter((sample['t'] for sample in samples), dtype=np.int64, count=len(samples))
+    if key_count == 1:
+        keys = np.array([sample['d'][0] for sample in samples], dtype=object)
+    else:
+        keys = np.array([KEY_SEPARATOR.join(str(key) for key in sample['d'][:key_count]) for sample in samples], dtype=object)
+    # None values (no data for the sample) become NaN
+    values = np.array([sample['d'][key_count:key_count + len(metrics)] for sample in samples], dtype=float)
+
+    unique_timestamps, timestamp_index = np.unique(timestamps, return_inverse=True)
+
+    # Keep services in order of first appearance, like the original CSV columns
+    unique_keys, first_seen, key_index = np.unique(keys.astype(str), return_index=True, return_inverse=True)
+    order = np.argsort(first_seen)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    services = [str(keys[first_seen[i]]) for i in order]
+
+    frame_values = np.full((len(unique_timestamps), len(services), len(metrics)), np.nan)
+    frame_values[timestamp_index, rank[key_index]] = values
+
+    return MetricFrame(unique_timestamps, services, metrics, frame_values)
+
+# Joins frames holding different metrics (e.g. the results of two filters)
+# on a common timestamp and service axis
+def join(frames):
+    frames = [frame for frame in frames if frame is not None]
+    if len(frames) == 0:
+        return empty_frame()
+
+    timestamps = np.unique(np.concatenate([frame.timestamps for frame in frames]))
+    services = []
+    for frame in frames:
+        services += [service for service in frame.services if service not in services]
+    metrics = []
+    for frame in frames:
+        metrics += [metric for metric in frame.metrics if metric not in metrics]
+
+    values = np.full((len(timestamps), len(services), len(metrics)), np.nan)
+    service_index = {service: i for i, service in enumerate(services)}
+    metric_index = {metric: i for i, metric in enumerate(metrics)}
+    for frame in frames:
+        if len(frame.timestamps) == 0:
+            continue
+        rows = np.searchsorted(timestamps, frame.timestamps)
+        columns = [service_index[service] for service in frame.services]
+        for i, metric in enumerate(frame.metrics):
+            values[np.ix_(rows, columns, [metric_index[metric]])] = frame.values[:, :, i:i + 1]
+
+    return MetricFrame(timestamps, services, metrics, values)
+
+# Splits a frame whose services are grouped by 'prefix/service' keys (e.g.
+# namespace and workload) into a dict of prefix -> frame of its services.
+# The sub-frames are views on the values of `frame`.
+def split_keys(frame):
+    columns = {}
+    for i, key in enumerate(frame.services):
+        prefix, _, service = key.partition(KEY_SEPARATOR)
+        columns.setdefault(prefix, ([], []))
+        columns[prefix][0].append(i)
+        columns[prefix][1].append(service)
+
+    return {
+        prefix: MetricFrame(frame.timestamps, services, frame.metrics, frame.values[:, indexes, :])
+        for prefix, (indexes, services) in columns.items()
+    }
+
+# Formats a value the way it was returned by Sysdig: integers without
+# a decimal part and missing values as an empty cell
+def format_value(value):
+    if np.isnan(value):
+        return ''
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+# Header and rows of the CSV file of a single metric: one column per
+# service followed by the timestamp
+def to_rows(frame, metric):
+    header = list(frame.services) + ['timestamp']
+    if len(frame.timestamps) == 0:
+        return header, []
+
+    matrix = frame.metric(metric).tolist()
+    rows = [
+        [format_value(value) for value in values] + [str(timestamp)]
+        for values, timestamp in zip(matrix, frame.timestamps.tolist())
+    ]
+
+    return header, rows
+
+# Reads back a CSV file written from to_rows as a single-metric frame
+def read_csv(path, metric):
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        rows = list(reader)
+    if header is None or len(rows) == 0:
+        return empty_frame([metric])
+
+    services = header[:-1]
+    values = np.array([[float(value) if value != '' else np.nan for value in row[:-1]] for row in rows], dtype=float)
+    timestamps = np.array([int(row[-1]) for row in rows], dtype=np.int64)
+    order = np.argsort(timestamps, kind='stable')
+
+    return MetricFrame(timestamps[order], services, [metric], values[order].reshape(len(rows), len(services), 1))
@@ -1,16 +1,10 @@
-# Reference the Python client
-from sdcclient import IbmAuthHelper, SdMonitorClient
 import sys
-import os
 import json
-# Add the monitoring instance information that is required for authentication
-URL = "https://ca-tor.monitoring.cloud.ibm.com"
-APIKEY = os.environ['IBMCLOUD_API_KEY']
-GUID = "b92c514a-ca21-4548-b3f0-4d6391bab407"
-ibm_headers = IbmAuthHelper.get_headers(URL, APIKEY, GUID)
+import sysdig_client
+from sysdig_cache import CachedClient
+from sysdig_filters import namespace_filter
 
-# Instantiate the Python client
-sdclient = SdMonitorClient(sdc_url=URL, custom_headers=ibm_headers)
+sdclient = CachedClient(sysdig_client.get_client())
 
 # Specify the ID for keys, and ID with aggregation for values
 metrics = [
@@ -19,7 +13,7 @@ metrics = [
 ]
 
 # Add a data filter or set to None if you want to see "everything"
-filter = "kube_namespace_name = 'acmeair-g2'"
+filter = namespace_filter(['acmeair-g2'])
 
 # Time window:
 #  - for "from A to B": start is equal to A, end is equal to B (expressed in seconds)
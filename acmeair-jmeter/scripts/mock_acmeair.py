@@ -0,0 +1,394 @@
+import asyncio
+import copy
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote
+
+from acmeair_model import BASE_MEMORY, MILLICORES_PER_REQUEST, SERVICES
+from quantities import parse_cpu, parse_memory
+
+# Local stand-in for the AcmeAir deployment, its Sysdig monitoring and the
+# OpenShift deployments API, so the driver, adapter and fetcher paths can run
+# (and be benchmarked) on a single machine:
+#
+#  - an asyncio HTTP server answering the REST endpoints hit by the JMX plan,
+#    with a configurable service time and injected errors per service,
+#  - get_data() computing Sysdig-like series from the requests it served,
+#    in process (FakeMonitorClient) or over HTTP (POST /api/data/),
+#  - selector() returning deployments whose apply() changes the capacity of
+#    a service once its rollout is over (FakeOpenShift).
+#
+# python mock_acmeair.py 8080, then e.g.
+# ./apache-jmeter-5.6.2/bin/jmeter -n -t AcmeAir-microservices-mpJwt.jmx -JHOST=localhost -JPORT=8080 ...
+
+NAMESPACE = 'acmeair-g2'
+
+# Workload serving every path prefix of the JMX plan
+ROUTES = {
+    '/auth': 'acmeair-authservice',
+    '/customer': 'acmeair-customerservice',
+    '/flight': 'acmeair-flightservice',
+    '/booking': 'acmeair-bookingservice',
+}
+
+# Mean service time of a request, in seconds
+DEFAULT_LATENCY = 0.02
+
+# Seconds between the apply() of a deployment and the end of its rollout
+ROLLOUT_DELAY = 5
+
+# Statuses of the injected errors
+ERROR_STATUSES = (500, 503)
+
+DEFAULT_CONFIGURATION = {'cpu': '250m', 'memory': '250Mi', 'pod_count': 1}
+
+# A service of the mock deployment. `latency` is its mean service time in
+# seconds and `error_rate` the fraction of its requests answered with an error.
+class MockService:
+    def __init__(self, name, latency = DEFAULT_LATENCY, error_rate = 0, configuration = DEFAULT_CONFIGURATION):
+        self.name = name
+        self.latency = latency
+        self.error_rate = error_rate
+        self.configure(configuration)
+        self.semaphore = None
+        self.semaphore_capacity = None
+
+    def configure(self, configuration):
+        self.cpu = parse_cpu(configuration['cpu'])
+        self.memory = parse_memory(configuration['memory'])
+        self.pod_count = int(configuration['pod_count'])
+        self.capacity = max(1, int(self.cpu / MILLICORES_PER_REQUEST) * self.pod_count)
+
+    # Serves a request: waits for a free slot, then for the service time.
+    # Returns (seconds spent, whether the request failed, busy fraction of
+    # the capacity used by the request).
+    async def serve(self):
+        if self.semaphore_capacity != self.capacity:
+            # Requests in flight release the slots of the previous semaphore
+            self.semaphore = asyncio.Semaphore(self.capacity)
+            self.semaphore_capacity = self.capacity
+
+        start = time.monotonic()
+        capacity = self.capacity
+        async with self.semaphore:
+            busy_start = time.monotonic()
+            await asyncio.sleep(random.expovariate(1 / self.latency) if self.latency > 0 else 0)
+            busy = time.monotonic() - busy_start
+
+        return time.monotonic() - start, random.random() < self.error_rate, busy / capacity
+
+# The mock deployment: services, their data and what they served
+class MockBackend:
+    def __init__(self, latency = DEFAULT_LATENCY, error_rate = 0, rollout_delay = ROLLOUT_DELAY, namespace = NAMESPACE):
+        self.namespace = namespace
+        self.rollout_delay = rollout_delay
+        self.services = {name: MockService(name, latency, error_rate) for name in SERVICES}
+        self.bookings = {}
+        # (second, service) -> [requests, seconds spent, errors, busy fraction]
+        self.samples = {}
+        self.deployments = {name: self.deployment_model(name, DEFAULT_CONFIGURATION) for name in SERVICES}
+        self.lock = threading.Lock()
+
+    def record(self, service, seconds, status, busy):
+        key = (int(time.time()), service)
+        with self.lock:
+            sample = self.samples.setdefault(key, [0, 0.0, 0, 0.0])
+            sample[0] += 1
+            sample[1] += seconds
+            sample[2] += status >= 400
+            sample[3] += busy
+
+    # Handles an AcmeAir request. Returns (status, content type, body, extra headers).
+    async def handle(self, method, path, form):
+        prefix = '/' + path.split('/')[1] if path.count('/') > 1 else path
+        service = self.services[ROUTES.get(prefix, 'acmeair-mainservice')]
+        seconds, failed, busy = await service.serve()
+
+        if failed:
+            status, content_type, body, headers = random.choice(ERROR_STATUSES), 'text/plain', 'injected error', {}
+        else:
+            status, content_type, body, headers = self.respond(method, path, form)
+
+        self.record(service.name, seconds, status, busy)
+        return status, content_type, body, headers
+
+    def respond(self, method, path, form):
+        if path == '/auth/login' and method == 'POST':
+            return 200, 'text/plain', 'logged in', {'Set-Cookie': f'Authorization="Bearer {uuid.uuid4()}"; Path=/'}
+
+        if path.startswith('/customer/byid/'):
+            customer = unquote(path[len('/customer/byid/'):])
+            return 200, 'application/json', json.dumps(self.customer(customer)), {}
+
+        if path == '/flight/queryflights' and method == 'POST':
+            one_way = form.get('oneWay', ['false'])[0] == 'true'
+            legs = [self.flight_options(form.get('fromAirport', ['CDG'])[0], form.get('toAirport', ['JFK'])[0])]
+            if not one_way:
+                legs.append(self.flight_options(form.get('toAirport', ['JFK'])[0], form.get('fromAirport', ['CDG'])[0]))
+            return 200, 'application/json', json.dumps({'tripFlights': legs, 'tripLegs': len(legs)}), {}
+
+        if path == '/booking/bookflights' and method == 'POST':
+            customer = form.get('userid', [''])[0]
+            depart = self.book(customer, form.get('toFlightId', [''])[0], form.get('toFlightSegId', [''])[0])
+            one_way = form.get('oneWayFlight', ['true'])[0] == 'true'
+            ret = '' if one_way else self.book(customer, form.get('retFlightId', [''])[0], form.get('retFlightSegId', [''])[0])
+            return 200, 'application/json', json.dumps({'oneWay': one_way, 'departBookingId': depart, 'returnBookingId': ret}), {}
+
+        if path.startswith('/booking/byuser/'):
+            customer = unquote(path[len('/booking/byuser/'):])
+            return 200, 'application/json', json.dumps(list(self.bookings.get(customer, {}).values())), {}
+
+        if path == '/booking/cancelbooking' and method == 'POST':
+            number = form.get('number', [''])[0]
+            self.bookings.get(form.get('userid', [''])[0], {}).pop(number, None)
+            return 200, 'text/plain', f'booking {number} deleted.', {}
+
+        if path == '/':
+            return 200, 'text/plain', 'AcmeAir', {}
+
+        return 404, 'text/plain', 'not found', {}
+
+    def customer(self, customer):
+        return {
+            '_id': customer, 'password': 'password', 'status': 'GOLD', 'total_miles': 1000000, 'miles_ytd': 1000,
+            'address': {'streetAddress1': '123 Main St.', 'city': 'Anytown', 'stateProvince': 'NC', 'country': 'USA', 'postalCode': '27617'},
+            'phoneNumber': '919-123-4567', 'phoneNumberType': 'BUSINESS',
+        }
+
+    def flight_options(self, origin, destination):
+        options = [
+            {'_id': str(uuid.uuid4()), 'flightSegmentId': f'AA{random.randint(0, 999)}', 'originPort': origin, 'destPort': destination, 'firstClassBaseCost': 500, 'economyClassBaseCost': 200}
+            for _ in range(random.randint(1, 3))
+        ]
+        return {'numPages': 1, 'flightsOptions': options, 'currentPage': 0, 'hasMoreOptions': False, 'pageSize': 10}
+
+    def book(self, customer, flight, segment):
+        booking = {'_id': str(uuid.uuid4()), 'customerId': customer, 'flightId': flight, 'flightSegmentId': segment, 'dateOfBooking': int(time.time() * 1000)}
+        self.bookings.setdefault(customer, {})[booking['_id']] = booking
+        return booking['_id']
+
+    # Sysdig value of a metric for the (requests, seconds, errors, busy)
+    # totals of a service over `sampling` seconds
+    def metric_value(self, metric, service, totals, sampling, status_filter):
+        requests, seconds, errors, busy = totals
+        if metric == 'kube_workload_name':
+            return service
+        if metric == 'kube_namespace_name':
+            return self.namespace
+        if metric == 'sysdig_container_net_http_request_time':
+            return seconds / requests * 10 ** 9 if requests else None
+        if metric == 'sysdig_container_net_http_request_count':
+            return requests / sampling
+        if metric == 'sysdig_container_net_http_statuscode_request_count':
+            return (errors if status_filter else requests) / sampling
+        if metric == 'sysdig_container_cpu_used_percent':
+            return busy / sampling * 100
+        if metric == 'sysdig_container_memory_used_percent':
+            return BASE_MEMORY / self.services[service].memory * 100
+        return None
+
+    # Sysdig get_data over the requests served so far. Supports relative
+    # windows, time series (sampling > 0) and aggregated data (sampling 0),
+    # and the namespace and status code conditions of the driver filters.
+    def get_data(self, metrics, start, end = 0, sampling = 0, filter = ''):
+        now = int(time.time())
+        if start <= 0:
+            start, end = now + start, now + end
+        namespaces = re.search(r"kube_namespace_name\s*(?:=\s*('[^']*')|in\s*\(([^)]*)\))", filter or '')
+        if namespaces and f"'{self.namespace}'" not in (namespaces.group(1) or namespaces.group(2)):
+            return True, {'data': [], 'start': start, 'end': end}
+        status_filter = 'net_http_statuscode' in (filter or '')
+
+        width = sampling if sampling > 0 else max(end - start, 1)
+        first = start - start % width if sampling > 0 else start
+        buckets = {}
+        with self.lock:
+            for (second, service), sample in self.samples.items():
+                if start <= second < end:
+                    totals = buckets.setdefault((first + (second - first) // width * width, service), [0, 0.0, 0, 0.0])
+                    for i, value in enumerate(sample):
+                        totals[i] += value
+
+        data = []
+        for (t, service), totals in sorted(buckets.items()):
+            data.append({
+                't': t if sampling > 0 else end,
+                'd': [self.metric_value(metric['id'], service, totals, width, status_filter) for metric in metrics],
+            })
+
+        return True, {'data': data, 'start': start, 'end': end}
+
+    def deployment_model(self, service, configuration):
+        resources = {'cpu': configuration['cpu'], 'memory': configuration['memory']}
+        replicas = configuration['pod_count']
+        return {
+            'metadata': {'name': service, 'namespace': self.namespace, 'generation': 1},
+            'spec': {
+                'replicas': replicas,
+                'template': {'spec': {'containers': [{'name': service, 'resources': {'requests': dict(resources), 'limits': dict(resources)}}]}},
+            },
+            'status': {'observedGeneration': 1, 'replicas': replicas, 'updatedReplicas': replicas, 'readyReplicas': replicas, 'availableReplicas': replicas},
+        }
+
+    # Current model of a deployment. A rollout in progress reports no updated
+    # replica until ROLLOUT_DELAY has passed, then the new configuration
+    # starts serving.
+    def read_deployment(self, service):
+        with self.lock:
+            model = self.deployments[service]
+            rollout_at = model.get('rollout_at')
+            if rollout_at is not None and time.time() >= rollout_at:
+                del model['rollout_at']
+                limits = model['spec']['template']['spec']['containers'][0]['resources']['limits']
+                replicas = model['spec']['replicas']
+                self.services[service].configure({'cpu': limits['cpu'], 'memory': limits['memory'], 'pod_count': replicas})
+                model['status'] = {
+                    'observedGeneration': model['metadata']['generation'], 'replicas': replicas,
+                    'updatedReplicas': replicas, 'readyReplicas': replicas, 'availableReplicas': replicas,
+                }
+            return {key: copy.deepcopy(value) for key, value in model.items() if key != 'rollout_at'}
+
+    def apply_deployment(self, service, model):
+        with self.lock:
+            current = self.deployments[service]
+            generation = current['metadata']['generation'] + 1
+            self.deployments[service] = {
+                'metadata': {**copy.deepcopy(model['metadata']), 'generation': generation},
+                'spec': copy.deepcopy(model['spec']),
+                'status': {**current['status'], 'updatedReplicas': 0, 'unavailableReplicas': model['spec']['replicas']},
+                'rollout_at': time.time() + self.rollout_delay,
+            }
+
+    # Parses and serves one HTTP/1.1 connection, keeping it alive between requests
+    async def serve_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                path, _, query = target.partition('?')
+                if path.rstrip('/') in ('/api/data', '/api/data/batch'):
+                    status, content_type, response, extra = self.handle_data(body)
+                else:
+                    form = parse_qs(query)
+                    if headers.get('content-type', '').startswith('application/x-www-form-urlencoded'):
+                        form.update(parse_qs(body.decode('utf-8')))
+                    status, content_type, response, extra = await self.handle(method, path, form)
+
+                response = response.encode('utf-8')
+                head = [f'HTTP/1.1 {status} {HTTPStatus(status).phrase}', f'Content-Type: {content_type}', f'Content-Length: {len(response)}']
+                head += [f'{name}: {value}' for name, value in extra.items()]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + response)
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    # POST /api/data/ with the body sdcclient sends for get_data: absolute
+    # windows as start and end, relative ones as the `last` seconds until now
+    def handle_data(self, body):
+        request = json.loads(body or b'{}')
+        if 'last' in request:
+            start, end = -request['last'], 0
+        else:
+            start, end = request.get('start', -600), request.get('end', 0)
+        ok, res = self.get_data(request.get('metrics', []), start, end, request.get('sampling', 0), request.get('filter', ''))
+        return 200, 'application/json', json.dumps(res), {}
+
+# In-process stand-in for SdMonitorClient
+class FakeMonitorClient:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def get_data(self, metrics, start_ts, end_ts = 0, sampling_s = 0, filter = '', datasource_type = 'host', paging = None):
+        return self.backend.get_data(metrics, start_ts, end_ts, sampling_s, filter)
+
+# Stand-in for the openshift APIObject of a deployment
+class FakeDeployment:
+    def __init__(self, backend, service, model):
+        self.backend = backend
+        self.service = service
+        self.model = model
+
+    def name(self):
+        return self.service
+
+    def apply(self):
+        self.backend.apply_deployment(self.service, self.model)
+
+class FakeSelector:
+    def __init__(self, backend, services):
+        self.backend = backend
+        self.services = services
+
+    def objects(self):
+        return [FakeDeployment(self.backend, service, self.backend.read_deployment(service)) for service in self.services if service in self.backend.deployments]
+
+    def object(self):
+        return self.objects()[0]
+
+# In-process stand-in for the openshift module, for the selectors used by
+# the adapter ('deployment.apps/<service>' or a list of them)
+class FakeOpenShift:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def selector(self, names):
+        names = [names] if isinstance(names, str) else names
+        return FakeSelector(self.backend, [name.split('/', 1)[-1] for name in names])
+
+# Serves the backend on host:port from a background thread.
+# Returns the event loop and the server.
+def start(backend, host = '127.0.0.1', port = 8080):
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    server = {}
+
+    def run():
+        asyncio.set_event_loop(loop)
+        server['server'] = loop.run_until_complete(asyncio.start_server(backend.serve_connection, host, port, backlog=1024))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return loop, server['server']
+
+def stop(loop, server):
+    loop.call_soon_threadsafe(server.close)
+    loop.call_soon_threadsafe(loop.stop)
+
+# python mock_acmeair.py [port] [mean service time in s] [error rate]
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8080
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_LATENCY
+    error_rate = float(sys.argv[3]) if len(sys.argv) > 3 else 0
+
+    backend = MockBackend(latency, error_rate)
+    start(backend, '0.0.0.0', port)
+    print(f"Mock AcmeAir listening on port {port}")
+    while True:
+        time.sleep(3600)
+
+if __name__ == '__main__':
+    main()
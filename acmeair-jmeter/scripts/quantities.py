@@ -0,0 +1,19 @@
+# Converts a Kubernetes cpu quantity ('250m', '1') to millicores
+def parse_cpu(cpu):
+    cpu = str(cpu)
+    if cpu.endswith('m'):
+        return float(cpu[:-1])
+    return float(cpu) * 1000
+
+# Converts a Kubernetes memory quantity ('500Mi', '1Gi') to MiB
+def parse_memory(memory):
+    units = {'Ki': 1 / 1024, 'Mi': 1, 'Gi': 1024, 'K': 1000 / 1024 ** 2, 'M': 1000 ** 2 / 1024 ** 2, 'G': 1000 ** 3 / 1024 ** 2}
+    memory = str(memory)
+    for unit in sorted(units, key=len, reverse=True):
+        if memory.endswith(unit):
+            return float(memory[:-len(unit)]) * units[unit]
+    return float(memory) / 1024 ** 2
+
+# Cost of a configuration in resource units: cores + GiB, times the replicas
+def configuration_cost(configuration):
+    return configuration['pod_count'] * (parse_cpu(configuration['cpu']) / 1000 + parse_memory(configuration['memory']) / 1024)
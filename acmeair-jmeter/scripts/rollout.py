@@ -0,0 +1,77 @@
+import statistics
+import time
+
+import executor
+
+POLL_INTERVAL = 5
+
+# Metric windows whose coefficient of variation (stdev / mean) is below this
+# value are considered settled
+MAX_VARIATION = 0.25
+
+# Minimum number of samples needed to tell whether a metric has settled
+MIN_SAMPLES = 3
+
+# Reads a nested field of a deployment model, 0 when it is not set yet
+def get_field(model, *keys):
+    for key in keys:
+        try:
+            model = model[key]
+        except (KeyError, TypeError):
+            return 0
+    return model or 0
+
+# A deployment is rolled out once the controller has observed its latest spec
+# and all desired replicas are updated, ready and available
+def is_rolled_out(obj):
+    model = obj.model
+    replicas = get_field(model, 'spec', 'replicas')
+
+    return (
+        get_field(model, 'status', 'observedGeneration') >= get_field(model, 'metadata', 'generation')
+        and get_field(model, 'status', 'updatedReplicas') == replicas
+        and get_field(model, 'status', 'readyReplicas') == replicas
+        and get_field(model, 'status', 'availableReplicas') == replicas
+        and get_field(model, 'status', 'unavailableReplicas') == 0
+    )
+
+# Polls the deployments of the given services until all of them are rolled
+# out, or `timeout` seconds have passed. Returns True when they rolled out.
+def wait_for_rollout(services, client, timeout, poll_interval = POLL_INTERVAL):
+    deadline = time.time() + timeout
+    while True:
+        objects = executor.snapshot(services, client)
+        pending = [service for service in services if service not in objects or not is_rolled_out(objects[service])]
+        if len(pending) == 0:
+            return True
+        if time.time() + poll_interval > deadline:
+            print(f"Rollout timed out for services {pending}")
+            return False
+        time.sleep(poll_interval)
+
+# A series has settled when its latest samples vary less than max_variation
+def is_settled(values, max_variation = MAX_VARIATION, min_samples = MIN_SAMPLES):
+    values = values[-min_samples:]
+    if len(values) < min_samples:
+        return False
+
+    mean = statistics.mean(values)
+    if mean == 0:
+        return True
+
+    return statistics.pstdev(values) / abs(mean) <= max_variation
+
+# Calls refresh() (which must return an up to date WindowStore) until the
+# given metric has settled for all services, or `timeout` seconds have passed.
+# Returns True when the metric settled.
+def wait_for_settle(refresh, services, metric, timeout, poll_interval = POLL_INTERVAL, max_variation = MAX_VARIATION):
+    deadline = time.time() + timeout
+    while True:
+        store = refresh()
+        pending = [service for service in services if not is_settled(store.values(metric, service), max_variation)]
+        if len(pending) == 0:
+            return True
+        if time.time() + poll_interval > deadline:
+            print(f"Metrics did not settle for services {pending}")
+            return False
+        time.sleep(poll_interval)
@@ -0,0 +1,64 @@
+import math
+import time
+
+# Two-sided 95% quantile of the normal distribution
+Z_95 = 1.96
+
+# Decides from the Summariser stream of a JMeter run when the run is not worth
+# continuing:
+#  - 'breach' once the error rate or the average latency of breach_intervals
+#    consecutive intervals is over its threshold, e.g. a broken deployment
+#    answering 66% errors from the first seconds on,
+#  - 'steady' once, after the ramp, the throughput and average latency of the
+#    last steady_intervals intervals are known within `confidence` (relative
+#    half-width of their 95% confidence interval), so running longer would
+#    not change the result.
+# update() returns None as long as the run should go on.
+class RunGuard:
+    def __init__(self, ramp = 0, max_error_rate = 0.5, max_latency = 10000, breach_intervals = 3,
+                 steady_intervals = 6, confidence = 0.05, min_duration = 120):
+        self.max_error_rate = max_error_rate
+        self.max_latency = max_latency
+        self.breach_intervals = breach_intervals
+        self.steady_intervals = steady_intervals
+        self.confidence = confidence
+        self.steady_from = time.time() + ramp
+        self.stop_before = time.time() + max(ramp, min_duration)
+        self.breaches = 0
+        self.intervals = []
+        self.verdict = None
+
+    # Relative half-width of the 95% confidence interval of the mean of values
+    @staticmethod
+    def relative_half_width(values):
+        mean = sum(values) / len(values)
+        if mean == 0:
+            return math.inf
+        variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+        return Z_95 * math.sqrt(variance / len(values)) / mean
+
+    # Feeds a parsed Summariser line (jmeter_stream.parse_summary)
+    def update(self, summary, now = None):
+        if summary['kind'] != '+' or self.verdict:
+            return self.verdict
+        now = now or time.time()
+
+        if summary['error_rate'] > self.max_error_rate or summary['avg'] > self.max_latency:
+            self.breaches += 1
+        else:
+            self.breaches = 0
+        if self.breaches >= self.breach_intervals:
+            self.verdict = 'breach'
+            return self.verdict
+
+        if now < self.steady_from:
+            return None
+        self.intervals.append(summary)
+        self.intervals = self.intervals[-self.steady_intervals:]
+        if len(self.intervals) == self.steady_intervals and now >= self.stop_before:
+            throughput = [interval['throughput'] for interval in self.intervals]
+            latency = [interval['avg'] for interval in self.intervals]
+            if max(self.relative_half_width(throughput), self.relative_half_width(latency)) <= self.confidence:
+                self.verdict = 'steady'
+
+        return self.verdict
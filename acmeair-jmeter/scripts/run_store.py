@@ -0,0 +1,144 @@
+import csv
+import os
+import shutil
+
+import numpy as np
+
+import metric_frame
+
+STORE_DIR = 'output/store'
+
+# Time series of experiment runs stored as raw binary columns:
+#
+#   <root>/<run>/<scenario>/<metric>/<service>.ts   int64 timestamps
+#   <root>/<run>/<scenario>/<metric>/<service>.val  float64 values
+#
+# Columns are only ever appended to, in timestamp order, and read back through
+# memory maps so a time range is a zero-copy slice. A finished run can be
+# archived in a single compressed .npz file.
+
+def series_path(run, scenario, metric, service, root = STORE_DIR):
+    return os.path.join(root, run, scenario, metric, service)
+
+# Last timestamp stored in a column, None when it is empty
+def last_timestamp(path):
+    if not os.path.exists(path + '.ts') or os.path.getsize(path + '.ts') == 0:
+        return None
+    with open(path + '.ts', 'rb') as f:
+        f.seek(-8, os.SEEK_END)
+        return int(np.frombuffer(f.read(8), dtype=np.int64)[0])
+
+# Appends samples to the series of a service. Missing (NaN) values and
+# samples that are not newer than the last stored one, or than an earlier
+# sample of the same call, are skipped so the columns stay sorted.
+def append(run, scenario, metric, service, timestamps, values, root = STORE_DIR):
+    path = series_path(run, scenario, metric, service, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    keep = ~np.isnan(values)
+    timestamps, values = timestamps[keep], values[keep]
+
+    last = last_timestamp(path)
+    last = np.iinfo(np.int64).min if last is None else last
+    previous = np.maximum.accumulate(np.concatenate(([last], timestamps[:-1])))
+    newer = timestamps > previous
+
+    with open(path + '.ts', 'ab') as f:
+        f.write(timestamps[newer].tobytes())
+    with open(path + '.val', 'ab') as f:
+        f.write(values[newer].tobytes())
+
+# Appends every metric and service of a MetricFrame
+def append_frame(run, scenario, frame, root = STORE_DIR):
+    for m, metric in enumerate(frame.metrics):
+        for s, service in enumerate(frame.services):
+            append(run, scenario, metric, service, frame.timestamps, frame.values[:, s, m], root)
+
+def memmap(path, dtype):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r')
+
+# (timestamps, values) of a service between start and end (inclusive, epoch
+# seconds). Both are read-only views on the memory-mapped columns.
+def read(run, scenario, metric, service, start = None, end = None, root = STORE_DIR):
+    path = series_path(run, scenario, metric, service, root)
+    timestamps = memmap(path + '.ts', np.int64)
+    values = memmap(path + '.val', np.float64)
+    # Ignore a sample whose value was not written yet
+    count = min(len(timestamps), len(values))
+    timestamps, values = timestamps[:count], values[:count]
+
+    first = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+    last = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='right')
+
+    return timestamps[first:last], values[first:last]
+
+# Runs that are not archived
+def runs(root = STORE_DIR):
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+def scenarios(run, root = STORE_DIR):
+    return sorted(os.listdir(os.path.join(root, run)))
+
+def metrics(run, scenario, root = STORE_DIR):
+    return sorted(os.listdir(os.path.join(root, run, scenario)))
+
+def services(run, scenario, metric, root = STORE_DIR):
+    folder = os.path.join(root, run, scenario, metric)
+    return sorted(name[:-len('.ts')] for name in os.listdir(folder) if name.endswith('.ts'))
+
+# Reads a metric of every service of a scenario into a MetricFrame
+def read_frame(run, scenario, metric, start = None, end = None, root = STORE_DIR):
+    series = {service: read(run, scenario, metric, service, start, end, root) for service in services(run, scenario, metric, root)}
+    frames = []
+    for service, (timestamps, values) in series.items():
+        frames.append(metric_frame.MetricFrame(np.asarray(timestamps), [service], [metric], np.asarray(values).reshape(-1, 1, 1)))
+
+    return metric_frame.join(frames)
+
+# Frame of a metric of a scenario, from a driver CSV output of the metric or
+# from the run store, `source` being then the id of the run
+def load_frame(source, metric, scenario = None):
+    if source.endswith('.csv'):
+        return metric_frame.read_csv(source, metric)
+    return read_frame(source, scenario, metric)
+
+# Exports a metric of a scenario to CSV, in the same format as the driver outputs
+def export_csv(run, scenario, metric, path, root = STORE_DIR):
+    header, rows = metric_frame.to_rows(read_frame(run, scenario, metric, root=root), metric)
+    with open(path, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+# Packs a finished run in a single compressed <root>/<run>.npz file and removes
+# its raw columns. Archived runs can be read back with read_archive.
+def archive(run, root = STORE_DIR):
+    arrays = {}
+    for scenario in scenarios(run, root):
+        for metric in metrics(run, scenario, root):
+            for service in services(run, scenario, metric, root):
+                timestamps, values = read(run, scenario, metric, service, root=root)
+                key = '/'.join((scenario, metric, service))
+                arrays[key + '.ts'] = np.array(timestamps)
+                arrays[key + '.val'] = np.array(values)
+
+    np.savez_compressed(os.path.join(root, run + '.npz'), **arrays)
+    shutil.rmtree(os.path.join(root, run))
+
+# Reads an archived run back as a dict of (scenario, metric, service) -> (timestamps, values)
+def read_archive(run, root = STORE_DIR):
+    series = {}
+    with np.load(os.path.join(root, run + '.npz')) as archived:
+        for key in archived.files:
+            if not key.endswith('.ts'):
+                continue
+            scenario, metric, service = key[:-len('.ts')].split('/')
+            series[(scenario, metric, service)] = (archived[key], archived[key[:-len('.ts')] + '.val'])
+
+    return series
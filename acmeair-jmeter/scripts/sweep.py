@@ -0,0 +1,138 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jmeter_stream
+import load_runner
+import run_guard
+
+SWEEP_DIR = 'output/sweeps'
+
+# Every combination of these values is one cell of the sweep.
+# 'configuration' is a key of a3/policy.py configurations applied to all
+# services before the cell runs; remove it to run against the cluster as is.
+sweep_matrix = {
+    'thread_count': [150, 300, 600],
+    'ramp': [25],
+    'duration': [900],
+    'jmx': [load_runner.JMX_PLAN],
+    'configuration': ['c1', 'c2', 'c3'],
+}
+
+# Cells of a matrix, as (cell id, parameters) in a stable order. Cells of
+# the same configuration follow each other, so that it is only applied once.
+def cells(matrix):
+    keys = sorted(matrix, key=lambda key: key != 'configuration')
+    for values in itertools.product(*(matrix[key] for key in keys)):
+        parameters = dict(zip(keys, values))
+        parameters.setdefault('delay', 0)
+        tags = [
+            f"T{parameters['thread_count']}", f"R{parameters['ramp']}", f"D{parameters['duration']}",
+            os.path.splitext(os.path.basename(parameters.get('jmx', load_runner.JMX_PLAN)))[0],
+        ]
+        if 'configuration' in parameters:
+            tags.append(parameters['configuration'])
+        yield 'SWEEP_' + '_'.join(tags), parameters
+
+# Cells already recorded in a checkpoint file
+def completed_cells(checkpoint):
+    if not os.path.exists(checkpoint):
+        return {}
+    completed = {}
+    with open(checkpoint) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                completed[record['cell']] = record
+    return completed
+
+# Client-side summary of a finished cell from its JTL results file
+def summarize(results_path):
+    if not os.path.exists(results_path):
+        return None
+    stats = jmeter_stream.LiveStats()
+    with open(results_path, newline='') as f:
+        for timestamp, label, elapsed, success in jmeter_stream.parse_results(f):
+            stats.add_sample(timestamp, label, elapsed, success)
+    return stats.snapshot()['TOTAL']
+
+# Applies a configuration of a3/policy.py to every service and waits for it
+# to roll out, in a separate adapter process
+def apply_configuration(name):
+    subprocess.run([sys.executable, os.path.join('a3', 'adapter.py'), 'configure', name], check=True)
+
+# Pulls the Sysdig metrics of a finished cell into the run store, under the
+# sweep name as run and the cell id as scenario
+def collect_metrics(sweep_name, cell, start, end):
+    import a2_driver
+
+    a2_driver.get_all_metrics(cell, start, end, run=sweep_name, csv_output=False)
+
+# Runs every cell of the matrix that is not in the checkpoint of the sweep yet.
+#
+# A cell is recorded in output/sweeps/<sweep_name>.jsonl, with its parameters,
+# time range and client-side summary, once its metrics are collected. Running
+# the same sweep again after a crash resumes at the first missing cell.
+# Metrics of a cell are collected in the background while the next one runs.
+# Cells are stopped early when `guard` gives up on them (see load_runner.run_scenario).
+def run_sweep(sweep_name, matrix = sweep_matrix, collect = True, metrics_delay = load_runner.METRICS_DELAY, guard = run_guard.RunGuard):
+    os.makedirs(SWEEP_DIR, exist_ok=True)
+    checkpoint = os.path.join(SWEEP_DIR, f'{sweep_name}.jsonl')
+    completed = completed_cells(checkpoint)
+    lock = threading.Lock()
+
+    def finish(cell, parameters, start, end):
+        if collect:
+            remaining = end + metrics_delay - time.time()
+            if remaining > 0:
+                time.sleep(remaining)
+            collect_metrics(sweep_name, cell, start, end)
+
+        record = {
+            'cell': cell, 'parameters': parameters, 'start': start, 'end': end,
+            'summary': summarize(f'logs/{cell}.jtl'),
+        }
+        with lock:
+            with open(checkpoint, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        print(f"Cell {cell} recorded")
+
+    with ThreadPoolExecutor(max_workers=1) as collector:
+        pending = []
+        configuration = None
+        for cell, parameters in cells(matrix):
+            if cell in completed:
+                print(f"Skipping completed cell {cell}")
+                continue
+
+            if parameters.get('configuration', configuration) != configuration:
+                configuration = parameters['configuration']
+                apply_configuration(configuration)
+
+            # A cell interrupted by a crash runs again from an empty results
+            # file, so its summary only counts the rerun
+            results_path = f'logs/{cell}.jtl'
+            if os.path.exists(results_path):
+                os.remove(results_path)
+
+            print(f"Running cell {cell}")
+            start, end = load_runner.run_scenario(cell, parameters, parameters.get('jmx', load_runner.JMX_PLAN), guard=guard)
+            pending.append(collector.submit(finish, cell, parameters, start, end))
+
+        for future in pending:
+            future.result()
+
+    return completed_cells(checkpoint)
+
+# python sweep.py <sweep name>
+def main():
+    sweep_name = sys.argv[1] if len(sys.argv) > 1 else time.strftime('sweep-%Y%m%d')
+    run_sweep(sweep_name)
+
+if __name__ == '__main__':
+    main()
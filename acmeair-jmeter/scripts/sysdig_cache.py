@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+CACHE_DIR = 'cache/sysdig'
+
+# Total size of the cache folder, least recently used entries are evicted past it
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+# Samples more recent than this many seconds may still be updated by Sysdig
+# and are always fetched again
+SETTLE_DELAY = 30
+
+# Adds [start, end) to a sorted list of disjoint intervals
+def add_interval(intervals, start, end):
+    merged = []
+    for interval_start, interval_end in intervals:
+        if interval_end < start or interval_start > end:
+            merged.append([interval_start, interval_end])
+        else:
+            start, end = min(start, interval_start), max(end, interval_end)
+    merged.append([start, end])
+    merged.sort()
+
+    return merged
+
+# Parts of [start, end) not covered by a sorted list of disjoint intervals
+def missing_intervals(intervals, start, end):
+    missing = []
+    for interval_start, interval_end in intervals:
+        if interval_end < start or interval_start > end:
+            continue
+        if interval_start > start:
+            missing.append((start, interval_start))
+        start = max(start, interval_end)
+    if start < end:
+        missing.append((start, end))
+
+    return missing
+
+# Number of samples (per key) covered by a single cache file. Small enough
+# for the sliding window of an adaptation tick to rewrite little data, large
+# enough for a day of 10s samples to fit in a few hundred files.
+SEGMENT_SAMPLES = 60
+
+# Wraps a SdMonitorClient with an on-disk cache of its get_data results.
+#
+# Every (metrics, filter, sampling) query has its own cache folder, split in
+# segment files of SEGMENT_SAMPLES samples each holding the samples fetched so
+# far and the time intervals they cover. A request only reads and writes the
+# segments of its window, so its cost does not grow with the history of the
+# query, and only fetches the parts of its window that are not covered yet:
+# closed historical windows are answered from disk, and sliding windows like
+# start=-60, end=0 only fetch the last few samples. Samples younger than
+# SETTLE_DELAY are never considered cached. Windows are [start, end) like
+# Sysdig's, so an answer does not depend on what else is in the cache.
+#
+# Can be used anywhere a SdMonitorClient is expected. Nothing is written
+# before the first cached request.
+class CachedClient:
+    def __init__(self, client, cache_dir = CACHE_DIR, max_bytes = MAX_CACHE_BYTES, settle_delay = SETTLE_DELAY):
+        self.client = client
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.settle_delay = settle_delay
+        self.lock = threading.Lock()
+        # Size of the cache folder, scanned on the first write
+        self.size = None
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def folder(self, metrics, filter, sampling):
+        key = json.dumps([metrics, filter, sampling], sort_keys=True)
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest())
+
+    # Start of the segments overlapping [start, end)
+    def segments(self, start, end, sampling):
+        length = SEGMENT_SAMPLES * sampling
+        return range(start - start % length, end, length)
+
+    def load(self, path):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except (OSError, ValueError):
+            return {'intervals': [], 'samples': {}}
+
+    def save(self, path, entry):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.size is None:
+            self.size = self.scan()[1]
+        previous = os.path.getsize(path) if os.path.exists(path) else 0
+
+        with open(path + '.tmp', 'w') as f:
+            f.write(json.dumps(entry))
+        os.replace(path + '.tmp', path)
+
+        self.size += os.path.getsize(path) - previous
+        if self.size > self.max_bytes:
+            self.evict()
+
+    # Cache files and their total size
+    def scan(self):
+        files = []
+        for folder, _, names in os.walk(self.cache_dir):
+            files += [os.path.join(folder, name) for name in names if name.endswith('.json')]
+        sizes = {path: os.path.getsize(path) for path in files}
+        return sizes, sum(sizes.values())
+
+    # Removes least recently used segments until the cache fits in max_bytes
+    def evict(self):
+        sizes, self.size = self.scan()
+        for path in sorted(sizes, key=os.path.getmtime):
+            if self.size <= self.max_bytes:
+                break
+            self.size -= sizes[path]
+            os.remove(path)
+
+    def get_data(self, metrics, start = 0, end = 0, sampling = 0, filter = '', **kwargs):
+        # Aggregated (sampling 0) and paged queries are not cached
+        if sampling <= 0 or kwargs:
+            return self.client.get_data(metrics, start, end, sampling, filter=filter, **kwargs)
+
+        now = int(time.time())
+        if start <= 0:
+            start, end = now + start, now + end
+        start -= start % sampling
+        settled = min(end, now - self.settle_delay)
+        settled -= settled % sampling
+
+        # Samples are keyed by timestamp and by the key columns (e.g. workload)
+        key_count = sum(1 for metric in metrics if 'aggregations' not in metric)
+        folder = self.folder(metrics, filter, sampling)
+        segment_length = SEGMENT_SAMPLES * sampling
+        path = lambda segment: os.path.join(folder, f'{segment}.json')
+
+        with self.lock:
+            entries = {segment: self.load(path(segment)) for segment in self.segments(start, end, sampling)}
+
+        intervals = []
+        for entry in entries.values():
+            for interval_start, interval_end in entry['intervals']:
+                intervals = add_interval(intervals, interval_start, interval_end)
+
+        fetched = []
+        for fetch_start, fetch_end in missing_intervals(intervals, start, end):
+            if fetch_end > settled:
+                # The tail of the window is still moving: keep it relative to now
+                ok, res = self.client.get_data(metrics, fetch_start - now, 0, sampling, filter=filter)
+            else:
+                ok, res = self.client.get_data(metrics, fetch_start, fetch_end, sampling, filter=filter)
+            if not ok:
+                return ok, res
+            fetched.append((fetch_start, min(fetch_end, settled), res.get('data', [])))
+
+        unsettled = []
+        with self.lock:
+            # Reload in case another thread updated the same segments meanwhile
+            changed = set()
+            if fetched:
+                entries = {segment: self.load(path(segment)) for segment in entries}
+            for fetch_start, fetch_end, data in fetched:
+                for sample in data:
+                    if sample['t'] >= settled:
+                        if start <= sample['t'] < end:
+                            unsettled.append(sample)
+                        continue
+                    segment = sample['t'] - sample['t'] % segment_length
+                    if segment not in entries:
+                        continue
+                    entries[segment]['samples'][json.dumps([sample['t']] + sample['d'][:key_count])] = [sample['t'], sample['d']]
+                    changed.add(segment)
+                for segment in self.segments(fetch_start, fetch_end, sampling):
+                    interval_start, interval_end = max(fetch_start, segment), min(fetch_end, segment + segment_length)
+                    if segment in entries and interval_start < interval_end:
+                        entries[segment]['intervals'] = add_interval(entries[segment]['intervals'], interval_start, interval_end)
+                        changed.add(segment)
+            for segment in sorted(changed):
+                self.save(path(segment), entries[segment])
+
+        data = [{'t': t, 'd': d} for entry in entries.values() for t, d in entry['samples'].values() if start <= t < end] + unsettled
+        data.sort(key=lambda sample: sample['t'])
+
+        return True, {'data': data, 'start': start, 'end': end}
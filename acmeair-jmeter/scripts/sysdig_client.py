@@ -0,0 +1,80 @@
+import base64
+import json
+import os
+import threading
+import time
+
+# Add the monitoring instance information that is required for authentication
+URL = "https://ca-tor.monitoring.cloud.ibm.com"
+GUID = "b92c514a-ca21-4548-b3f0-4d6391bab407"
+
+# IAM tokens are refreshed that many seconds before they expire
+REFRESH_MARGIN = 300
+
+# Lifetime assumed for a token whose expiry cannot be read
+TOKEN_LIFETIME = 3600
+
+# Expiry (epoch seconds) of an IAM bearer token, read from its JWT payload
+def token_expiry(authorization):
+    try:
+        payload = authorization.split(' ', 1)[1].split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return claims['exp']
+    except (IndexError, KeyError, ValueError):
+        return time.time() + TOKEN_LIFETIME
+
+# Sysdig client authenticated with IBM Cloud IAM on first use.
+#
+# Creating it costs nothing: sdcclient is imported and the IAM token fetched
+# the first time an attribute of the client (get_data, ...) is looked up. The
+# token is refreshed in place REFRESH_MARGIN seconds before it expires, so a
+# long-running adapter keeps working past the token lifetime.
+#
+# Setting SDC_URL (e.g. to the local mock) without IBMCLOUD_API_KEY creates a
+# client without IAM authentication.
+class SysdigClient:
+    def __init__(self, url = URL, guid = GUID):
+        self.url = url
+        self.guid = guid
+        self.client = None
+        self.expires_at = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        from sdcclient import IbmAuthHelper, SdMonitorClient
+
+        if 'SDC_URL' in os.environ and 'IBMCLOUD_API_KEY' not in os.environ:
+            self.client = SdMonitorClient(token=os.environ.get('SDC_TOKEN', ''), sdc_url=os.environ['SDC_URL'])
+        else:
+            headers = IbmAuthHelper.get_headers(self.url, os.environ['IBMCLOUD_API_KEY'], self.guid)
+            self.client = SdMonitorClient(sdc_url=self.url, custom_headers=headers)
+            self.expires_at = token_expiry(headers['Authorization'])
+
+    def refresh(self):
+        from sdcclient import IbmAuthHelper
+
+        headers = IbmAuthHelper.get_headers(self.url, os.environ['IBMCLOUD_API_KEY'], self.guid)
+        self.client.hdrs.update(headers)
+        self.expires_at = token_expiry(headers['Authorization'])
+
+    def __getattr__(self, name):
+        with self.lock:
+            if self.client is None:
+                self.connect()
+            elif self.expires_at is not None and time.time() >= self.expires_at - REFRESH_MARGIN:
+                self.refresh()
+
+        return getattr(self.client, name)
+
+client = None
+client_lock = threading.Lock()
+
+# The client shared by every script of the process, authenticated on first
+# use. Scripts wrap it in sysdig_cache.CachedClient to serve already fetched
+# samples from disk.
+def get_client():
+    global client
+    with client_lock:
+        if client is None:
+            client = SysdigClient()
+        return client
@@ -0,0 +1,126 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Sysdig refuses to return more than 600 samples for a single request
+MAX_SAMPLES_PER_REQUEST = 600
+
+# Number of requests that can be in flight against the Sysdig API at once
+MAX_WORKERS = 8
+
+# Number of attempts for a single request and the initial delay (in seconds)
+# between two attempts, doubled after every failure
+RETRIES = 3
+BACKOFF = 1
+
+# Keys of the queries of a single namespace, and of several namespaces at once
+WORKLOAD_KEYS = [{"id": "kube_workload_name"}]
+NAMESPACE_WORKLOAD_KEYS = [{"id": "kube_namespace_name"}, {"id": "kube_workload_name"}]
+
+# get_data metrics list of the given metric -> aggregations group: the `keys`
+# first, then the values with their aggregation
+def build_metrics_query(metrics_group, keys = WORKLOAD_KEYS):
+    return keys + [{"id": metric, "aggregations": aggregations} for metric, aggregations in metrics_group.items()]
+
+# Splits the [start, end] window in sub-windows of at most
+# MAX_SAMPLES_PER_REQUEST samples each.
+#
+# Windows that fit in a single request are returned as-is, so relative
+# windows like start=-60, end=0 keep being resolved by Sysdig. Longer
+# windows are converted to absolute timestamps first so that every chunk
+# refers to the same point in time, and aligned on the sampling so two
+# chunks never share a sample.
+def split_window(start, end, sampling, now = None):
+    if sampling <= 0:
+        return [(start, end)]
+
+    chunk = MAX_SAMPLES_PER_REQUEST * sampling
+    if end - start <= chunk:
+        return [(start, end)]
+
+    if start <= 0:
+        now = int(time.time()) if now is None else now
+        start, end = now + start, now + end
+
+    start = start - (start % sampling)
+    windows = []
+    while start < end:
+        windows.append((start, min(start + chunk, end)))
+        start += chunk
+
+    return windows
+
+# Performs a single get_data call, retrying with an exponential backoff
+# when Sysdig reports an error or the request raises
+def get_data_with_retry(client, metrics, start, end, sampling, filter = None, retries = RETRIES, backoff = BACKOFF):
+    res = None
+    for attempt in range(retries):
+        try:
+            ok, res = client.get_data(metrics, start, end, sampling, filter=filter)
+            if ok:
+                return True, res
+        except Exception as e:
+            res = str(e)
+
+        if attempt < retries - 1:
+            time.sleep(backoff * (2 ** attempt))
+
+    return False, res
+
+# Stitches the chunk results of a single query back together.
+# Samples are ordered by timestamp and samples of the same timestamp and
+# keys (the first `key_count` values, e.g. namespace and workload) returned
+# by two chunks are only kept once.
+def merge_results(results, key_count = 1):
+    data = []
+    seen = set()
+    for res in results:
+        for sample in res.get('data', []):
+            key = (sample['t'], tuple(sample['d'][:key_count]))
+            if key in seen:
+                continue
+            seen.add(key)
+            data.append(sample)
+
+    data.sort(key=lambda sample: sample['t'])
+
+    merged = {'data': data}
+    if results:
+        merged['start'] = min(res.get('start', 0) for res in results)
+        merged['end'] = max(res.get('end', 0) for res in results)
+
+    return merged
+
+# Pulls the given metrics for every filter of `queries` (a dict of
+# filter -> metrics list in the get_data format) over the [start, end] window.
+#
+# Every (chunk, filter) pair is requested concurrently with a bounded thread
+# pool, so a multi-hour window costs roughly the time of a single request.
+# Returns a dict of filter -> (ok, res) where res has the same shape as a
+# get_data result, or the error message of the first failed chunk.
+def fetch_all(client, queries, start, end, sampling = 10, max_workers = MAX_WORKERS):
+    windows = split_window(start, end, sampling)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            filter: [
+                executor.submit(get_data_with_retry, client, metrics, chunk_start, chunk_end, sampling, filter)
+                for chunk_start, chunk_end in windows
+            ]
+            for filter, metrics in queries.items()
+        }
+
+        results = {}
+        for filter, chunk_futures in futures.items():
+            chunk_results = [future.result() for future in chunk_futures]
+            failures = [res for ok, res in chunk_results if not ok]
+            if failures:
+                results[filter] = (False, failures[0])
+            else:
+                key_count = sum(1 for metric in queries[filter] if 'aggregations' not in metric)
+                results[filter] = (True, merge_results([res for _, res in chunk_results], key_count))
+
+    return results
+
+# Same as fetch_all for a single filter
+def fetch(client, metrics, filter, start, end, sampling = 10, max_workers = MAX_WORKERS):
+    return fetch_all(client, {filter: metrics}, start, end, sampling, max_workers)[filter]
@@ -0,0 +1,12 @@
+# HTTP status codes counted by the error rate queries
+ERROR_STATUS_CODES = ('503', '502', '500', '400', '401', '403')
+
+# Sysdig filter selecting the workloads of the given namespaces
+def namespace_filter(namespaces):
+    if len(namespaces) == 1:
+        return f"kube_namespace_name = '{namespaces[0]}'"
+    return f"kube_namespace_name in ({', '.join(repr(namespace) for namespace in namespaces)})"
+
+# Sysdig filter selecting the error responses of the given namespaces
+def status_code_filter(namespaces, status_codes = ERROR_STATUS_CODES):
+    return f"{namespace_filter(namespaces)} and net_http_statuscode in ({', '.join(repr(code) for code in status_codes)})"
@@ -0,0 +1,56 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Tests import the scripts, and the adapter modules of a3/, by module name
+# like the scripts do when run from their folder
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.normpath(os.path.join(TESTS_DIR, '..')), os.path.normpath(os.path.join(TESTS_DIR, '..', 'a3'))]
+
+# Time of the tests, on a sampling boundary
+NOW = 1_000_000
+
+# Stand-in for SdMonitorClient over a fixed series: one sample per workload
+# per `sampling` bucket, buckets aligned on the sampling like mock_acmeair.py
+# does. Windows are [start, end), relative to now when start <= 0, and no
+# request may return more than 600 samples per workload.
+class FakeSysdig:
+    def __init__(self, workloads = ('acmeair-bookingservice', 'acmeair-flightservice'), failures = 0):
+        self.workloads = workloads
+        self.failures = failures
+        self.calls = []
+
+    def value(self, workload, t):
+        return t * 2 + self.workloads.index(workload)
+
+    def get_data(self, metrics, start, end = 0, sampling = 0, filter = '', **kwargs):
+        self.calls.append((start, end, sampling, filter))
+        if self.failures > 0:
+            self.failures -= 1
+            return False, 'fake failure'
+
+        if start <= 0:
+            now = int(time.time())
+            start, end = now + start, now + end
+        if sampling <= 0:
+            return True, {'data': [{'t': end, 'd': [workload, 0.0]} for workload in self.workloads], 'start': start, 'end': end}
+        first = start - start % sampling
+        if (end - first) / sampling > 600:
+            return False, 'too many samples'
+
+        data = [
+            {'t': t, 'd': [workload, float(self.value(workload, t))]}
+            for t in range(first, end, sampling) for workload in self.workloads
+        ]
+        return True, {'data': data, 'start': start, 'end': end}
+
+@pytest.fixture
+def now(monkeypatch):
+    monkeypatch.setattr(time, 'time', lambda: float(NOW))
+    return NOW
+
+@pytest.fixture
+def fake_sysdig():
+    return FakeSysdig()
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import capacity_search
+from capacity_search import judge
+
+SLO = {'p95': 3000, 'error_rate': 0.05}
+
+def snapshot(p95, error_rate, count = 1000):
+    return {'count': count, 'p95': p95, 'error_rate': error_rate, 'throughput': 100.0}
+
+@pytest.mark.parametrize('p95, error_rate, verdict', [
+    (3000, 0.05, None),
+    (3001, 0.0, 'over'),
+    (100, 0.0501, 'over'),
+    # Within the margin of the SLO: not clear yet
+    (2401, 0.0, None),
+    (100, 0.041, None),
+    (2400, 0.04, 'under'),
+    (100, 0.0, 'under'),
+])
+def test_judge_boundaries(p95, error_rate, verdict):
+    assert judge(snapshot(p95, error_rate), SLO, margin=0.2) == verdict
+
+def test_too_few_samples_are_not_judged():
+    assert judge(snapshot(100000, 1.0, count=199), SLO, min_samples=200) is None
+    assert judge(snapshot(100000, 1.0, count=200), SLO, min_samples=200) == 'over'
+
+def test_a_finished_probe_is_judged_without_margin():
+    assert judge(snapshot(3000, 0.05, count=1), SLO, margin=0, min_samples=1) == 'under'
+
+# Probes of a system whose latency breaks the SLO past `knee` threads
+@pytest.fixture
+def capacity(monkeypatch):
+    probes = []
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+
+    def fake(knee):
+        def probe(name, thread_count):
+            probes.append(thread_count)
+            verdict = 'under' if thread_count <= knee else 'over'
+            return verdict, snapshot(1000 if verdict == 'under' else 5000, 0.0)
+        monkeypatch.setattr(capacity_search, 'probe', probe)
+        return probes
+    return fake
+
+@pytest.mark.parametrize('knee', [60, 437, 1234])
+def test_search_converges_on_the_knee(capacity, knee):
+    probes = capacity(knee)
+
+    thread_count, _ = capacity_search.search('c1')
+
+    assert knee - capacity_search.resolution < thread_count <= knee
+    assert len(probes) == len(set(probes))
+
+def test_search_stops_at_max_threads(capacity):
+    capacity(10 ** 6)
+
+    assert capacity_search.search('c1')[0] == capacity_search.max_threads
+
+def test_search_gives_up_when_the_first_probe_fails(capacity):
+    capacity(10)
+
+    assert capacity_search.search('c1') == (None, None)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+import compute_utility_function
+import policy
+
+CPU_SPEC = {
+    'latency': {'weight': 0.5, 'curve': 'step', 'thresholds': [1000], 'preferences': [1, 0]},
+    'cpu_used': {'weight': 0.5, 'curve': 'piecewise_linear', 'points': [50, 100], 'preferences': [1, 0]},
+}
+
+def test_curves_on_any_metric_are_scored():
+    utility = compute_utility_function.from_spec(CPU_SPEC, policy.metric_types)
+
+    utilities = utility.score({'latency': [500, 500, 2000], 'cpu_used': [10, 75, 10], 'error_rate': [0, 0, 0]})
+
+    assert np.allclose(utilities, [1, 0.75, 0.5])
+
+def test_specs_on_metrics_nobody_supplies_are_rejected_when_loaded():
+    with pytest.raises(ValueError, match='disk_used'):
+        compute_utility_function.from_spec({'disk_used': {'weight': 1, 'curve': 'sigmoid', 'midpoint': 50, 'steepness': 0.1}}, policy.metric_types)
+
+def test_missing_values_are_reported_by_name():
+    utility = compute_utility_function.from_spec(CPU_SPEC)
+
+    with pytest.raises(ValueError, match='cpu_used'):
+        utility.score({'latency': [500]})
+
+def test_rank_picks_the_cheapest_candidate_reaching_the_threshold():
+    utility = compute_utility_function.from_spec(CPU_SPEC)
+    values = {'latency': [[2000, 500, 500]], 'cpu_used': [[10, 90, 10]]}
+
+    utilities, chosen = compute_utility_function.rank(utility, values, 0.7, costs=[1, 2, 3])
+
+    assert np.allclose(utilities, [[0.5, 0.6, 1]])
+    assert chosen.tolist() == [2]
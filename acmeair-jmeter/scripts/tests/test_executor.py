@@ -0,0 +1,54 @@
+import executor
+import mock_acmeair
+
+SERVICES = ['acmeair-bookingservice', 'acmeair-customerservice', 'acmeair-flightservice']
+PLAN = {'cpu': '500m', 'memory': '500Mi', 'pod_count': 2}
+
+class FailingDeployment(mock_acmeair.FakeDeployment):
+    def apply(self):
+        raise RuntimeError('apply refused')
+
+# Counts selector calls of an openshift stand-in
+class CountingOpenShift(mock_acmeair.FakeOpenShift):
+    selector_calls = 0
+
+    def selector(self, names):
+        self.selector_calls += 1
+        return super().selector(names)
+
+def test_snapshot_reads_every_deployment_at_once():
+    openshift = CountingOpenShift(mock_acmeair.MockBackend())
+
+    objects = executor.snapshot(SERVICES, openshift)
+
+    assert sorted(objects) == sorted(SERVICES)
+    assert openshift.selector_calls == 1
+    assert executor.current_configuration(objects['acmeair-flightservice']) == ('250m', '250Mi', 1)
+
+def test_a_failed_apply_does_not_stop_the_others():
+    backend = mock_acmeair.MockBackend(rollout_delay=0)
+    objects = executor.snapshot(SERVICES, mock_acmeair.FakeOpenShift(backend))
+    failing = objects['acmeair-customerservice']
+    objects['acmeair-customerservice'] = FailingDeployment(backend, failing.service, failing.model)
+
+    latencies = executor.execute_plans({service: PLAN for service in SERVICES}, objects, executor.apply_resources)
+
+    assert isinstance(latencies['acmeair-customerservice'], RuntimeError)
+    for service in ('acmeair-bookingservice', 'acmeair-flightservice'):
+        assert latencies[service] >= 0
+        assert executor.current_configuration(mock_acmeair.FakeOpenShift(backend).selector(f'deployment.apps/{service}').object()) == ('500m', '500Mi', 2)
+    assert backend.read_deployment('acmeair-customerservice')['spec']['replicas'] == 1
+
+def test_plans_set_requests_limits_and_replicas():
+    backend = mock_acmeair.MockBackend(rollout_delay=0)
+    obj = executor.snapshot(['acmeair-authservice'], mock_acmeair.FakeOpenShift(backend))['acmeair-authservice']
+
+    executor.apply_resources(obj, PLAN)
+
+    deployment = backend.read_deployment('acmeair-authservice')
+    resources = deployment['spec']['template']['spec']['containers'][0]['resources']
+    assert resources['requests'] == resources['limits'] == {'cpu': '500m', 'memory': '500Mi'}
+    assert deployment['spec']['replicas'] == 2
+
+def test_no_plans_apply_nothing():
+    assert executor.execute_plans({}, {}, executor.apply_resources) == {}
@@ -0,0 +1,64 @@
+import importlib
+import sys
+import types
+
+import pytest
+
+import metric_frame
+from instrumentation import Instrumentation
+
+METRIC = 'sysdig_container_net_http_request_time'
+
+# The adapter talks to the cluster on import: fanout is loaded against a
+# stand-in whose single Sysdig fetch returns a batch grouped by namespace
+@pytest.fixture
+def fanout(monkeypatch, tmp_path):
+    adapter = types.ModuleType('adapter')
+    adapter.service_list = ['acmeair-authservice', 'acmeair-flightservice']
+    adapter.forecast_window = 300
+    adapter.mape_metrics = Instrumentation(str(tmp_path / 'mape_metrics.jsonl'), str(tmp_path / 'mape_metrics.prom'))
+    adapter.fetches = []
+
+    def get_all_metrics(start, end, namespaces = None):
+        adapter.fetches.append(namespaces)
+        return metric_frame.from_result({'data': [
+            {'t': 1000, 'd': [namespace, service, float(n * 10 + s)]}
+            for n, namespace in enumerate(namespaces) for s, service in enumerate(adapter.service_list)
+        ]}, [METRIC], key_count=2)
+    adapter.get_all_metrics = get_all_metrics
+
+    monkeypatch.setitem(sys.modules, 'adapter', adapter)
+    monkeypatch.delitem(sys.modules, 'fanout', raising=False)
+    module = importlib.import_module('fanout')
+    monkeypatch.delitem(sys.modules, 'fanout')
+    return module
+
+class State:
+    def __init__(self, namespace):
+        self.namespace = namespace
+        self.window_store = []
+
+    def ingest(self, frame, now):
+        self.window_store.append(frame)
+
+def test_one_fetch_feeds_every_namespace(fanout, now):
+    states = [State('acmeair-g1'), State('acmeair-g2'), State('acmeair-g3')]
+    monitor = fanout.SharedMonitor(states)
+
+    monitor.poll()
+
+    assert fanout.adapter.fetches == [['acmeair-g1', 'acmeair-g2', 'acmeair-g3']]
+    for n, state in enumerate(states):
+        [frame] = state.refresh(-60, 0)
+        assert frame.services == ['acmeair-authservice', 'acmeair-flightservice']
+        assert frame.metric(METRIC).ravel().tolist() == [n * 10, n * 10 + 1]
+
+def test_batches_wait_for_their_loop(fanout, now):
+    state = State('acmeair-g1')
+    monitor = fanout.SharedMonitor([state])
+
+    for _ in range(fanout.max_pending + 2):
+        monitor.poll()
+
+    assert len(state.refresh(-60, 0)) == fanout.max_pending
+    assert len(fanout.adapter.fetches) == fanout.max_pending + 2
@@ -0,0 +1,35 @@
+import random
+
+import pytest
+
+import forecast
+
+TIMESTAMPS = list(range(1000, 1300, 10))
+
+@pytest.mark.parametrize('method', ['holt', 'linear'])
+def test_linear_trends_are_recovered(method):
+    values = [5 + 0.2 * t for t in TIMESTAMPS]
+
+    assert forecast.forecast(TIMESTAMPS, values, 120, method) == pytest.approx(5 + 0.2 * (TIMESTAMPS[-1] + 120))
+
+@pytest.mark.parametrize('method', ['holt', 'linear'])
+def test_noisy_linear_trends_are_recovered(method):
+    rng = random.Random(3)
+    values = [100 + 2 * (t - TIMESTAMPS[0]) + rng.gauss(0, 5) for t in TIMESTAMPS]
+
+    assert forecast.forecast(TIMESTAMPS, values, 60, method) == pytest.approx(100 + 2 * (TIMESTAMPS[-1] + 60 - TIMESTAMPS[0]), rel=0.05)
+
+@pytest.mark.parametrize('length', [0, 1, 2])
+def test_short_histories_have_no_forecast(length):
+    assert forecast.forecast(TIMESTAMPS[:length], [1.0] * length, 60) is None
+    assert forecast.forecast(TIMESTAMPS[:length], [1.0] * length, 60, 'linear') is None
+
+def test_the_shortest_history_is_extrapolated():
+    assert forecast.forecast([0, 10, 20], [10, 20, 30], 10) == pytest.approx(40)
+
+def test_forecasts_never_go_below_zero():
+    assert forecast.forecast(TIMESTAMPS, [100 - 0.5 * (t - TIMESTAMPS[0]) for t in TIMESTAMPS], 600) == 0
+    assert forecast.forecast(TIMESTAMPS, [100 - 0.5 * (t - TIMESTAMPS[0]) for t in TIMESTAMPS], 600, 'linear') == 0
+
+def test_samples_at_a_single_timestamp_forecast_their_level():
+    assert forecast.forecast([1000, 1000, 1000], [4, 4, 4], 60) == 4
@@ -0,0 +1,96 @@
+import json
+import time
+
+import pytest
+
+import instrumentation
+from instrumentation import Instrumentation, InstrumentedClient
+
+# perf_counter advanced by hand, so phases take exact durations
+@pytest.fixture
+def clock(monkeypatch, now):
+    elapsed = [0.0]
+    monkeypatch.setattr(time, 'perf_counter', lambda: elapsed[0])
+    return elapsed
+
+@pytest.fixture
+def metrics(tmp_path, clock):
+    return Instrumentation(path=str(tmp_path / 'mape_metrics.jsonl'), prometheus_path=str(tmp_path / 'mape_metrics.prom'))
+
+# Runs a tick made of the phases (name, seconds)
+def run_tick(metrics, clock, phases, counters = {}):
+    metrics.start_tick()
+    for name, seconds in phases:
+        metrics.phase(name)
+        clock[0] += seconds
+    for name, value in counters.items():
+        metrics.count(name, value)
+    return metrics.end_tick()
+
+def test_phases_are_timed_until_the_next_one(metrics, clock):
+    tick = run_tick(metrics, clock, [('monitor', 0.5), ('analyze', 0.25), ('plan', 0.125), ('monitor', 1)])
+
+    assert tick['phases'] == {'monitor': 1.5, 'analyze': 0.25, 'plan': 0.125}
+    assert tick['duration'] == 1.875
+
+def test_every_tick_is_a_json_line(metrics, clock, now):
+    run_tick(metrics, clock, [('monitor', 1), ('wait', 2)], {'sysdig_get_data_calls': 3})
+    run_tick(metrics, clock, [('monitor', 0.5)])
+
+    with open(metrics.path) as f:
+        records = [json.loads(line) for line in f]
+
+    assert records == [
+        {'timestamp': now, 'phases': {'monitor': 1, 'wait': 2}, 'counters': {'sysdig_get_data_calls': 3}, 'duration': 3},
+        {'timestamp': now, 'phases': {'monitor': 0.5}, 'counters': {}, 'duration': 0.5},
+    ]
+
+def test_the_textfile_holds_the_totals(metrics, clock):
+    run_tick(metrics, clock, [('monitor', 1), ('plan', 2)], {'sysdig_get_data_calls': 3})
+    run_tick(metrics, clock, [('monitor', 0.5)], {'sysdig_get_data_calls': 1, 'openshift_apply_calls': 2})
+
+    with open(metrics.prometheus_path) as f:
+        samples = dict(line.rsplit(' ', 1) for line in f.read().splitlines() if not line.startswith('#'))
+
+    assert samples == {
+        'adapter_ticks_total': '2',
+        'adapter_phase_seconds_sum{phase="monitor"}': '1.5',
+        'adapter_phase_seconds_count{phase="monitor"}': '2',
+        'adapter_phase_seconds_sum{phase="plan"}': '2.0',
+        'adapter_phase_seconds_count{phase="plan"}': '1',
+        'adapter_last_phase_seconds{phase="monitor"}': '0.5',
+        'adapter_last_phase_seconds{phase="plan"}': '2.0',
+        'adapter_events_total{event="sysdig_get_data_calls"}': '4.0',
+        'adapter_events_total{event="openshift_apply_calls"}': '2.0',
+    }
+
+def test_counts_outside_a_tick_only_go_to_the_totals(metrics, clock):
+    metrics.count('sysdig_get_data_calls')
+    metrics.phase('monitor')
+
+    assert metrics.end_tick() is None
+    assert metrics.counter_totals['sysdig_get_data_calls'] == 1
+
+def test_report_of_a_metrics_file(metrics, clock):
+    for seconds in (1, 3):
+        run_tick(metrics, clock, [('monitor', seconds), ('wait', 4)], {'sysdig_get_data_calls': seconds})
+
+    summary = instrumentation.report(metrics.path)
+
+    assert summary['ticks'] == 2
+    assert summary['phases']['monitor']['p50'] == 2
+    assert summary['phases']['monitor']['share'] == pytest.approx(4 / 12)
+    assert summary['counters_per_tick'] == {'sysdig_get_data_calls': 2}
+
+class Client:
+    def get_data(self, *args, **kwargs):
+        return True, {}
+
+def test_only_get_data_calls_are_counted(metrics, clock):
+    client = InstrumentedClient(Client(), metrics)
+    metrics.start_tick()
+
+    client.get_data('metrics', -60)
+    client.get_data('metrics', -60)
+
+    assert metrics.end_tick()['counters'] == {'sysdig_get_data_calls': 2}
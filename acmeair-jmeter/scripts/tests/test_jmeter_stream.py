@@ -0,0 +1,67 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+import jmeter_stream
+from jmeter_stream import QuantileSketch, parse_results, parse_summary
+
+SCRIPTS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+HEADER = 'timeStamp,elapsed,label,responseCode,responseMessage,threadName,dataType,success,failureMessage,bytes\n'
+
+def test_summaries_of_a_jmeter_log():
+    with open(os.path.join(SCRIPTS_DIR, 'logs', 'output_logs.txt')) as f:
+        summaries = [summary for summary in map(parse_summary, f) if summary]
+
+    intervals = [summary for summary in summaries if summary['kind'] == '+']
+    assert len(intervals) == 5
+    assert intervals[0] == {
+        'kind': '+', 'count': 646, 'elapsed': 34, 'throughput': 19.2, 'avg': 3626, 'min': 34, 'max': 19545,
+        'errors': 427, 'error_rate': pytest.approx(0.661), 'active': 150,
+    }
+    total = [summary for summary in summaries if summary['kind'] == '='][-1]
+    assert (total['count'], total['elapsed'], total['errors']) == (16057, 154, 11893)
+    assert 'active' not in total
+
+def test_other_log_lines_are_not_summaries():
+    assert parse_summary('2023-10-20 12:22:56,324 INFO o.a.j.JMeter: Creating summariser <summary>\n') is None
+
+@pytest.mark.parametrize('relative_accuracy', [0.01, 0.05])
+def test_sketch_quantiles_are_within_the_relative_accuracy(relative_accuracy):
+    rng = random.Random(7)
+    values = [rng.lognormvariate(5, 1.5) for _ in range(20_000)] + [0] * 50
+    sketch = QuantileSketch(relative_accuracy)
+    for value in values:
+        sketch.add(value)
+
+    for q in (0.001, 0.5, 0.9, 0.95, 0.99, 0.999):
+        expected = np.percentile(values, q * 100, method='lower')
+        assert sketch.quantile(q) == pytest.approx(expected, rel=relative_accuracy)
+
+def test_empty_sketches_have_no_quantile():
+    assert QuantileSketch().quantile(0.5) is None
+
+def test_partial_and_malformed_rows_are_skipped():
+    lines = [
+        HEADER,
+        '1000,12,Login,200,OK,Thread 1-1,text,true,,512\n',
+        '1010,abc,Login,200,OK,Thread 1-2,text,true,,512\n',
+        '1020,15,QueryFlight,500,Internal Server Error,Thread 1-3,text,false,,128\n',
+        '1030,9,Log',
+    ]
+
+    assert list(parse_results(lines)) == [(1000, 'Login', 12, True), (1020, 'QueryFlight', 15, False)]
+
+def test_results_without_a_required_column_end_the_watcher(tmp_path, capsys):
+    path = tmp_path / 'results.jtl'
+    path.write_text('timeStamp,label,success\n1000,Login,true\n')
+
+    stats, threads = jmeter_stream.watch(results_path=str(path), stop=lambda: True, poll_interval=0)
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert not any(thread.is_alive() for thread in threads)
+    assert stats.snapshot()['TOTAL']['count'] == 0
+    assert 'elapsed' in capsys.readouterr().err
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+import load_coordinator
+from load_coordinator import split_weighted
+
+@pytest.mark.parametrize('total, weights, shares', [
+    (9, [1, 1, 1], [3, 3, 3]),
+    (10, [1, 1, 1], [4, 3, 3]),
+    (10, [2, 1], [7, 3]),
+    (7, [0.5, 0.25, 0.25], [3, 2, 2]),
+    # Fewer threads than workers: the heaviest get one each
+    (2, [1, 3, 2], [0, 1, 1]),
+    (0, [1, 1], [0, 0]),
+])
+def test_shares_follow_the_weights(total, weights, shares):
+    assert split_weighted(total, weights) == shares
+
+@pytest.mark.parametrize('total, weights, shares', [
+    (6, [3, 0, 1], [5, 0, 1]),
+    (5, [0, 1, 0], [0, 5, 0]),
+    (3, [0, 1, 1, 1], [0, 1, 1, 1]),
+])
+def test_zero_weight_workers_get_nothing(total, weights, shares):
+    assert split_weighted(total, weights) == shares
+
+def test_shares_always_sum_to_the_total():
+    rng = random.Random(3)
+    for _ in range(1000):
+        weights = [rng.choice([0, 0.1, 0.3, 1, 2.5, 7]) for _ in range(rng.randint(1, 6))]
+        if sum(weights) == 0:
+            continue
+        total = rng.randint(0, 500)
+
+        shares = split_weighted(total, weights)
+
+        assert sum(shares) == total
+        assert all(share == 0 for share, weight in zip(shares, weights) if weight == 0)
+        assert all(abs(share - total * weight / sum(weights)) < 1 for share, weight in zip(shares, weights))
+
+def test_workers_read_with_their_defaults(tmp_path):
+    path = tmp_path / 'workers.csv'
+    path.write_text('host,weight,directory\nlocalhost,,\ngen1,0,/opt/scripts\ngen2,2.5,.\n')
+
+    workers = load_coordinator.read_workers(str(path))
+
+    assert [worker['weight'] for worker in workers] == [1, 0, 2.5]
+    assert [worker['directory'] for worker in workers] == ['.', '/opt/scripts', '.']
+    assert [load_coordinator.is_local(worker) for worker in workers] == [True, False, False]
@@ -0,0 +1,38 @@
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+import load_profile
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PLANS = ['AcmeAir-microservices.jmx', 'AcmeAir-microservices-mpJwt.jmx', 'AcmeAir-microservices-mpJwt-mp3.3.jmx']
+
+# Children of the hashTree following the first thread group of a plan
+def thread_group_children(path):
+    for tree in ET.parse(path).getroot().iter('hashTree'):
+        children = list(tree)
+        for i, child in enumerate(children):
+            if child.tag == 'ThreadGroup':
+                return list(children[i + 1])
+    return []
+
+@pytest.mark.parametrize('plan', PLANS)
+def test_every_plan_gets_a_throughput_timer(plan, tmp_path):
+    path = str(tmp_path / 'profile.jmx')
+    load_profile.derive_plan(np.array([0.0, 60.0]), np.array([1.0, 2.0]), path, os.path.join(SCRIPTS_DIR, plan))
+
+    children = thread_group_children(path)
+    timers = [child for child in children if child.tag == 'ConstantThroughputTimer']
+    assert len(timers) == 1
+    assert timers[0].find("intProp[@name='calcMode']").text == '4'
+    assert timers[0].find("stringProp[@name='throughput']").text.startswith('${__jexl3(var e = ')
+    assert len(children) == len(thread_group_children(os.path.join(SCRIPTS_DIR, plan))) + 2
+
+def test_plans_without_a_thread_group_are_refused(tmp_path):
+    jmx = tmp_path / 'empty.jmx'
+    jmx.write_text('<jmeterTestPlan><hashTree/></jmeterTestPlan>\n')
+
+    with pytest.raises(ValueError):
+        load_profile.derive_plan(np.array([0.0, 60.0]), np.array([1.0, 2.0]), str(tmp_path / 'profile.jmx'), str(jmx))
@@ -0,0 +1,121 @@
+import csv
+import socket
+
+import pytest
+
+import load_runner
+
+HEADER = ['timeStamp', 'elapsed', 'label', 'responseCode', 'success']
+
+class FinishedProcess:
+    def poll(self):
+        return 0
+
+    def wait(self, timeout = None):
+        return 0
+
+# Stands in for a JMeter process: appends `samples` rows tagged with the run to
+# its results file, writing the header only to a new file like JMeter's -l does
+def fake_jmeter(run, samples = 3):
+    def start_load_test(log_file, thread_count, duration, ramp, delay = 0, results_file = None, jmx = None, properties = None):
+        path = f'logs/{results_file}'
+        with open(path, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(HEADER)
+            for i in range(samples):
+                writer.writerow([1000 + i, 10, f'run{run}', 200, 'true'])
+        open(f'logs/{log_file}', 'a').close()
+        return FinishedProcess()
+    return start_load_test
+
+def run_labels(path):
+    with open(path, newline='') as f:
+        return [row['label'] for row in csv.DictReader(f)]
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_a_rerun_under_the_same_name_only_holds_its_own_samples(tmp_path, monkeypatch, workers):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    parameters = {'thread_count': 6, 'duration': 60, 'ramp': 10, 'delay': 0, 'workers': workers}
+
+    for run in (1, 2):
+        monkeypatch.setattr(load_runner, 'start_load_test', fake_jmeter(run))
+        load_runner.run_scenario('TEST', parameters)
+
+    assert run_labels(tmp_path / 'logs' / 'TEST.jtl') == ['run2'] * 3 * workers
+
+def test_merged_results_are_ordered_by_timestamp(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    for name, timestamps in (('a.jtl', [1, 4, 5]), ('b.jtl', [2, 3, 6])):
+        with open(tmp_path / 'logs' / name, 'w', newline='') as f:
+            csv.writer(f).writerows([HEADER] + [[t, 10, name, 200, 'true'] for t in timestamps])
+
+    load_runner.merge_results(['a.jtl', 'b.jtl'], 'merged.jtl')
+
+    with open(tmp_path / 'logs' / 'merged.jtl', newline='') as f:
+        assert [int(row['timeStamp']) for row in csv.DictReader(f)] == [1, 2, 3, 4, 5, 6]
+
+def test_threads_and_users_are_split_without_overlap():
+    assert load_runner.split_threads(10, 3) == [4, 3, 3]
+    assert load_runner.user_slices([4, 3, 3]) == [(0, 3), (4, 6), (7, 9)]
+
+# JMeter process ended by a Shutdown command on its port
+class ShutdownProcess:
+    def __init__(self, port, stopped):
+        self.port = port
+        self.stopped = stopped
+
+    def poll(self):
+        return 0 if self.port in self.stopped else None
+
+    def wait(self, timeout = None):
+        return 0
+
+# Gives up on the run at its first Summariser interval
+class AbortingGuard:
+    verdict = None
+
+    def update(self, summary):
+        self.verdict = 'breach'
+        return self.verdict
+
+def test_a_verdict_stops_every_worker_on_its_own_port(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    stopped = []
+    monkeypatch.setattr(load_runner, 'stop_test', lambda command = 'Shutdown', port = None, host = None: stopped.append(port))
+    ports = [4445, 4447, 4452]
+    processes = [(ShutdownProcess(port, stopped), f'worker{i}.jtl', port) for i, port in enumerate(ports)]
+    (tmp_path / 'logs' / 'worker1.log').write_text(
+        '2023-10-20 12:23:30,036 INFO o.a.j.r.Summariser: summary +    646 in 00:00:34 =   19.2/s Avg:  3626 Min:    34 Max: 19545 Err:   427 (66.10%) Active: 150 Started: 150 Finished: 0\n')
+
+    verdict = load_runner.guard_workers(processes, [AbortingGuard() for _ in processes], poll_interval=0.01)
+
+    assert verdict == 'breach'
+    assert stopped == ports
+
+def test_workers_listen_on_distinct_shutdown_ports(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    started = []
+
+    def start_load_test(log_file, thread_count, duration, ramp, delay = 0, results_file = None, jmx = None, properties = None):
+        started.append(properties)
+        return FinishedProcess()
+    monkeypatch.setattr(load_runner, 'start_load_test', start_load_test)
+
+    processes = load_runner.start_workers('TEST', 6, 60, 10, workers=3)
+
+    ports = [port for _, _, port in processes]
+    assert len(set(ports)) == 3
+    assert [properties['jmeterengine.nongui.port'] for properties in started] == ports
+    assert [properties['jmeterengine.nongui.maxport'] for properties in started] == ports
+
+def test_busy_ports_are_skipped():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as busy:
+        busy.bind(('', 0))
+        busy_port = busy.getsockname()[1]
+
+        assert busy_port not in load_runner.free_ports(2, busy_port)
@@ -0,0 +1,100 @@
+import csv
+import io
+import math
+from collections import defaultdict
+
+import numpy as np
+
+import driver
+import metric_frame
+
+METRICS = ['sysdig_container_net_http_request_time', 'sysdig_container_net_http_request_count']
+
+# get_data result with integer and decimal values, a None value (no data)
+# and a service missing at a later timestamp
+RESULT = {
+    'data': [
+        {'t': 1000, 'd': ['acmeair-bookingservice', 12.5, 40]},
+        {'t': 1000, 'd': ['acmeair-authservice', 3, None]},
+        {'t': 1010, 'd': ['acmeair-bookingservice', 0.1, 0]},
+        {'t': 1010, 'd': ['acmeair-authservice', None, 7]},
+        {'t': 1020, 'd': ['acmeair-authservice', 1e-05, 8]},
+    ],
+    'start': 1000,
+    'end': 1030,
+}
+
+# The CSV file write_metric_result wrote before results went through
+# MetricFrame: one DictWriter row per timestamp
+def legacy_csv(metric, index, res):
+    processed_samples = defaultdict(dict)
+    processed_samples_with_timestamp = []
+
+    for sample in res['data']:
+        data = sample['d']
+        processed_samples[sample['t']][data[0]] = data[index + 1]
+
+    for timestamp, values in processed_samples.items():
+        values['timestamp'] = timestamp
+        processed_samples_with_timestamp.append(values)
+
+    out = io.StringIO(newline='')
+    writer = csv.DictWriter(out, fieldnames=list(processed_samples_with_timestamp[0].keys()))
+    writer.writeheader()
+    for sample in processed_samples_with_timestamp:
+        writer.writerow(sample)
+
+    return out.getvalue()
+
+def test_csv_files_are_unchanged(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'output').mkdir()
+    frame = metric_frame.from_result(RESULT, METRICS)
+
+    for index, metric in enumerate(METRICS):
+        driver.write_metric_result('TEST', metric, frame)
+
+        with open(tmp_path / 'output' / f'{metric}_TEST_.csv', newline='') as f:
+            assert f.read() == legacy_csv(metric, index, RESULT)
+
+def test_csv_files_read_back_as_the_frame(tmp_path):
+    frame = metric_frame.from_result(RESULT, METRICS)
+    path = tmp_path / 'latency.csv'
+    header, rows = metric_frame.to_rows(frame, METRICS[0])
+    with open(path, 'w', newline='') as f:
+        csv.writer(f).writerows([header] + rows)
+
+    read = metric_frame.read_csv(str(path), METRICS[0])
+
+    assert read.services == frame.services
+    assert np.array_equal(read.timestamps, frame.timestamps)
+    assert np.array_equal(read.metric(METRICS[0]), frame.metric(METRICS[0]), equal_nan=True)
+
+def test_means_skip_missing_samples():
+    means = metric_frame.from_result(RESULT, METRICS).means(METRICS[0], ['acmeair-authservice', 'acmeair-mainservice'])
+
+    assert math.isclose(means['acmeair-authservice'], (3 + 1e-05) / 2)
+    assert means['acmeair-mainservice'] == 0
+
+def test_empty_results_write_a_header_only():
+    header, rows = metric_frame.to_rows(metric_frame.from_result({'data': []}, METRICS), METRICS[0])
+
+    assert header == ['timestamp']
+    assert rows == []
+
+def test_namespaced_keys_split_into_one_frame_per_namespace():
+    frame = metric_frame.from_result({'data': [
+        {'t': 1000, 'd': ['acmeair-g1', 'acmeair-authservice', 1, 10]},
+        {'t': 1000, 'd': ['acmeair-g2', 'acmeair-authservice', 2, 20]},
+        {'t': 1000, 'd': ['acmeair-g1', 'acmeair-flightservice', 3, 30]},
+        {'t': 1010, 'd': ['acmeair-g2', 'acmeair-authservice', 4, 40]},
+    ]}, METRICS, key_count=2)
+
+    frames = metric_frame.split_keys(frame)
+
+    assert sorted(frames) == ['acmeair-g1', 'acmeair-g2']
+    assert sorted(frames['acmeair-g1'].services) == ['acmeair-authservice', 'acmeair-flightservice']
+    assert frames['acmeair-g2'].services == ['acmeair-authservice']
+    # Every namespace keeps the timestamps of the batch, NaN where it has no sample
+    assert np.array_equal(frames['acmeair-g1'].series(METRICS[1], 'acmeair-authservice'), [10, np.nan], equal_nan=True)
+    assert frames['acmeair-g2'].series(METRICS[0], 'acmeair-authservice').tolist() == [2, 4]
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+import mock_acmeair
+
+sdcclient = pytest.importorskip('sdcclient')
+
+SERVICE = 'acmeair-flightservice'
+METRICS = [{'id': 'kube_workload_name'}, {'id': 'sysdig_container_net_http_request_count', 'aggregations': {'time': 'avg', 'group': 'sum'}}]
+
+# A mock backend that served one request per second over the last 10 minutes,
+# behind a real SdMonitorClient
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.delenv('SDC_URL', raising=False)
+    backend = mock_acmeair.MockBackend()
+    now = int(time.time())
+    for second in range(now - 600, now + 5):
+        backend.samples[(second, SERVICE)] = [1, 0.02, 0, 0.1]
+
+    loop, server = mock_acmeair.start(backend, port=0)
+    port = server.sockets[0].getsockname()[1]
+    client = sdcclient.SdMonitorClient(token='', sdc_url=f'http://127.0.0.1:{port}')
+    yield client
+    client.http.close()
+    mock_acmeair.stop(loop, server)
+
+def test_relative_windows_cover_the_last_seconds(client):
+    start = int(time.time()) - 60
+    ok, res = client.get_data(METRICS, -60, 0, 10)
+
+    assert ok
+    timestamps = [sample['t'] for sample in res['data']]
+    assert 6 <= len(timestamps) <= 8
+    assert min(timestamps) >= start - start % 10
+
+def test_absolute_windows_are_start_inclusive_and_end_exclusive(client):
+    end = int(time.time()) // 10 * 10 - 100
+    ok, res = client.get_data(METRICS, end - 200, end, 10)
+
+    assert ok
+    assert [sample['t'] for sample in res['data']] == list(range(end - 200, end, 10))
+    assert all(sample['d'] == [SERVICE, 1.0] for sample in res['data'])
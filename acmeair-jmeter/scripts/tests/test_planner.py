@@ -0,0 +1,50 @@
+import compute_utility_function
+import planner
+from quantities import parse_cpu
+
+CONFIGURATIONS = {
+    'c1': {'cpu': '250m', 'memory': '250Mi', 'pod_count': 1},
+    'c2': {'cpu': '250m', 'memory': '500Mi', 'pod_count': 1},
+    'c3': {'cpu': '250m', 'memory': '500Mi', 'pod_count': 2},
+}
+UTILITY_SPEC = {
+    'latency': {'weight': 0.65, 'curve': 'step', 'thresholds': [1000, 3000, 5000], 'preferences': [1, 0.5, 0.2, 0]},
+    'error_rate': {'weight': 0.35, 'curve': 'step', 'thresholds': [1, 3], 'preferences': [1, 0.5, 0]},
+}
+UTILITY = compute_utility_function.from_spec(UTILITY_SPEC)
+
+def observe(model, name, request_rate):
+    configuration = CONFIGURATIONS[name]
+    load = request_rate / parse_cpu(configuration['cpu']) / configuration['pod_count']
+    model.add('acmeair-bookingservice', configuration['cpu'], configuration['memory'], configuration['pod_count'], request_rate, 100 + 4000 * load, 0.0)
+
+def test_a_single_configuration_is_not_enough():
+    model = planner.PerformanceModel()
+    for request_rate in range(10, 10 + 10 * planner.MIN_OBSERVATIONS, 10):
+        observe(model, 'c1', request_rate)
+
+    assert not model.ready('acmeair-bookingservice')
+    assert planner.choose_configurations(model, UTILITY, {'acmeair-bookingservice': 100}, CONFIGURATIONS, 0.7) == {}
+
+def test_two_configurations_make_the_model_ready():
+    model = planner.PerformanceModel()
+    for request_rate in range(10, 10 + 10 * planner.MIN_OBSERVATIONS, 10):
+        observe(model, 'c1' if request_rate % 20 else 'c3', request_rate)
+
+    assert model.ready('acmeair-bookingservice')
+    assert planner.choose_configurations(model, UTILITY, {'acmeair-bookingservice': 10}, CONFIGURATIONS, 0.7) == {'acmeair-bookingservice': 'c1'}
+
+def test_metrics_the_model_does_not_predict_are_scored_at_their_current_value():
+    model = planner.PerformanceModel()
+    for request_rate in range(10, 10 + 10 * planner.MIN_OBSERVATIONS, 10):
+        observe(model, 'c1' if request_rate % 20 else 'c3', request_rate)
+    utility = compute_utility_function.from_spec({
+        **UTILITY_SPEC,
+        'memory_used': {'weight': 0.2, 'curve': 'step', 'thresholds': [90], 'preferences': [1, 0]},
+        'request_rate': {'weight': 0.1, 'curve': 'step', 'thresholds': [1000], 'preferences': [1, 0]},
+    })
+    means = {'acmeair-bookingservice': {'memory_used': 50.0, 'cpu_used': 10.0}}
+
+    choices = planner.choose_configurations(model, utility, {'acmeair-bookingservice': 10}, CONFIGURATIONS, 0.7, means)
+
+    assert choices == {'acmeair-bookingservice': 'c1'}
@@ -0,0 +1,21 @@
+import os
+import xml.etree.ElementTree as ET
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+PLANS = ['AcmeAir-microservices.jmx', 'AcmeAir-microservices-mpJwt.jmx', 'AcmeAir-microservices-mpJwt-mp3.3.jmx']
+
+def string_props(path, name):
+    return [prop.text or '' for prop in ET.parse(os.path.join(SCRIPTS_DIR, path)).getroot().iter('stringProp') if prop.get('name') == name]
+
+# -JHOST and -JPORT (see the README) point every plan at another backend,
+# e.g. mock_acmeair.py: the HTTP defaults read them, and no sampler
+# overrides them
+@pytest.mark.parametrize('plan', PLANS)
+def test_plans_take_the_host_and_port_from_properties(plan):
+    domains = [domain for domain in string_props(plan, 'HTTPSampler.domain') if domain]
+    ports = [port for port in string_props(plan, 'HTTPSampler.port') if port]
+
+    assert len(domains) == 1 and domains[0].startswith('${__P(HOST,')
+    assert len(ports) == 1 and ports[0].startswith('${__P(PORT,')
@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+import rollout
+
+class Deployment:
+    def __init__(self, model):
+        self.model = model
+
+def deployment(replicas = 2, generation = 3, observed = 3, updated = 2, ready = 2, available = 2, unavailable = None):
+    status = {'observedGeneration': observed, 'updatedReplicas': updated, 'readyReplicas': ready, 'availableReplicas': available}
+    if unavailable is not None:
+        status['unavailableReplicas'] = unavailable
+    return Deployment({'metadata': {'generation': generation}, 'spec': {'replicas': replicas}, 'status': status})
+
+@pytest.mark.parametrize('obj, rolled_out', [
+    (deployment(), True),
+    (deployment(observed=4), True),
+    # The controller has not seen the latest spec yet
+    (deployment(generation=4), False),
+    (deployment(updated=1), False),
+    (deployment(ready=1), False),
+    (deployment(available=1), False),
+    (deployment(unavailable=1), False),
+    (deployment(unavailable=0), True),
+    # Scaled to zero: the status fields are not set at all
+    (Deployment({'metadata': {'generation': 1}, 'spec': {'replicas': 0}, 'status': {'observedGeneration': 1}}), True),
+    (Deployment({'metadata': {'generation': 1}, 'spec': {'replicas': 1}, 'status': None}), False),
+])
+def test_is_rolled_out(obj, rolled_out):
+    assert rollout.is_rolled_out(obj) == rolled_out
+
+@pytest.mark.parametrize('values, settled', [
+    ([], False),
+    ([100, 100], False),
+    ([100, 100, 100], True),
+    ([100, 110, 90], True),
+    ([10, 100, 200], False),
+    # Only the latest samples count
+    ([10, 1000, 100, 105, 95], True),
+    ([0, 0, 0], True),
+])
+def test_is_settled(values, settled):
+    assert rollout.is_settled(values) == settled
+
+# Clock advanced by time.sleep, so waits take no real time
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    monkeypatch.setattr(time, 'sleep', lambda seconds: now.__setitem__(0, now[0] + seconds))
+    return now
+
+class Store:
+    def __init__(self, series):
+        self.series = series
+
+    def values(self, metric, service):
+        return self.series[service]
+
+def test_waiting_for_a_metric_that_never_settles_times_out(clock):
+    store = Store({'a': [100, 100, 100], 'b': [10, 100, 200]})
+    refreshes = []
+
+    settled = rollout.wait_for_settle(lambda: refreshes.append(clock[0]) or store, ['a', 'b'], 'latency', timeout=60, poll_interval=5)
+
+    assert not settled
+    # Polled until the deadline, never past it
+    assert refreshes == [1000 + 5 * i for i in range(13)]
+
+def test_waiting_stops_once_every_service_settled(clock):
+    series = {'a': [100, 100, 100], 'b': [10, 100]}
+    store = Store(series)
+
+    def refresh():
+        series['b'].append(100)
+        return store
+
+    assert rollout.wait_for_settle(refresh, ['a', 'b'], 'latency', timeout=60, poll_interval=5)
+    assert clock[0] == 1005
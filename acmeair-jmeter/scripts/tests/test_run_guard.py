@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from run_guard import RunGuard
+
+NOW = 1_000_000
+
+def interval(avg = 500, error_rate = 0.0, throughput = 100.0, kind = '+'):
+    return {'kind': kind, 'count': int(throughput * 10), 'elapsed': 10, 'throughput': throughput, 'avg': avg,
+            'min': 10, 'max': avg * 3, 'errors': 0, 'error_rate': error_rate}
+
+# Feeds a Summariser interval every 10s from NOW on. Returns the verdict and
+# the time (seconds from NOW) it was given at.
+def feed(guard, intervals):
+    for i, summary in enumerate(intervals):
+        verdict = guard.update(summary, now=NOW + 10 * (i + 1))
+        if verdict:
+            return verdict, 10 * (i + 1)
+    return None, None
+
+@pytest.fixture
+def guard(monkeypatch):
+    monkeypatch.setattr('time.time', lambda: float(NOW))
+    return lambda **kwargs: RunGuard(**kwargs)
+
+def test_consecutive_error_intervals_abort_the_run(guard):
+    assert feed(guard(ramp=60), [interval(error_rate=0.66)] * 5) == ('breach', 30)
+
+def test_consecutive_slow_intervals_abort_the_run(guard):
+    assert feed(guard(max_latency=10000), [interval()] * 2 + [interval(avg=20000)] * 3) == ('breach', 50)
+
+def test_isolated_breaches_do_not_abort_the_run(guard):
+    stream = [interval(error_rate=0.9), interval(error_rate=0.9), interval()] * 10
+
+    assert feed(guard(), stream)[0] != 'breach'
+
+def test_steady_runs_stop_once_known_within_the_confidence(guard):
+    rng = random.Random(1)
+    stream = [interval(avg=rng.gauss(500, 5), throughput=rng.gauss(100, 1)) for _ in range(60)]
+
+    verdict, at = feed(guard(ramp=60, min_duration=120, steady_intervals=6), stream)
+
+    assert verdict == 'steady'
+    # Not before the ramp is over and the run lasted min_duration
+    assert at == 120
+
+def test_noisy_runs_go_on(guard):
+    rng = random.Random(2)
+    stream = [interval(avg=rng.uniform(100, 2000), throughput=rng.uniform(20, 200)) for _ in range(60)]
+
+    assert feed(guard(ramp=60), stream) == (None, None)
+
+def test_ramp_intervals_do_not_count(guard):
+    stream = [interval(avg=5000, throughput=10)] * 6 + [interval()] * 6
+    g = guard(ramp=60, min_duration=0)
+
+    assert feed(g, stream) == ('steady', 120)
+    assert [summary['avg'] for summary in g.intervals] == [500] * 6
+
+def test_total_lines_are_ignored(guard):
+    assert feed(guard(), [interval(error_rate=1.0, kind='=')] * 5) == (None, None)
@@ -0,0 +1,83 @@
+import numpy as np
+
+import metric_frame
+import run_store
+
+SERVICE = 'acmeair-bookingservice'
+METRIC = 'sysdig_container_net_http_request_time'
+
+def test_missing_values_are_not_stored(tmp_path):
+    run_store.append('run', 'TEST', METRIC, SERVICE, [10, 20, 30], [1.0, np.nan, 3.0], root=str(tmp_path))
+
+    timestamps, values = run_store.read('run', 'TEST', METRIC, SERVICE, root=str(tmp_path))
+
+    assert timestamps.tolist() == [10, 30]
+    assert values.tolist() == [1.0, 3.0]
+
+def test_samples_that_do_not_move_forward_are_skipped(tmp_path):
+    root = str(tmp_path)
+    run_store.append('run', 'TEST', METRIC, SERVICE, [10, 20, 30], [1.0, 2.0, 3.0], root=root)
+    # Overlaps the stored samples, then goes back in time within the call
+    run_store.append('run', 'TEST', METRIC, SERVICE, [20, 30, 40, 35, 40, 50], [9.0, 9.0, 4.0, 9.0, 9.0, 5.0], root=root)
+
+    timestamps, values = run_store.read('run', 'TEST', METRIC, SERVICE, root=root)
+
+    assert timestamps.tolist() == [10, 20, 30, 40, 50]
+    assert values.tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+def test_ranges_are_read_from_the_memory_map(tmp_path):
+    root = str(tmp_path)
+    run_store.append('run', 'TEST', METRIC, SERVICE, np.arange(0, 1000, 10), np.arange(100, dtype=float), root=root)
+
+    timestamps, values = run_store.read('run', 'TEST', METRIC, SERVICE, 95, 200, root=root)
+
+    assert timestamps.tolist() == list(range(100, 210, 10))
+    assert values.tolist() == list(range(10, 21))
+    assert isinstance(timestamps, np.memmap)
+    assert run_store.read('run', 'TEST', METRIC, SERVICE, 2000, 3000, root=root)[0].tolist() == []
+
+def test_unknown_series_read_empty(tmp_path):
+    timestamps, values = run_store.read('run', 'TEST', METRIC, SERVICE, root=str(tmp_path))
+
+    assert len(timestamps) == len(values) == 0
+
+def test_frames_round_trip(tmp_path):
+    root = str(tmp_path)
+    frame = metric_frame.from_result({'data': [
+        {'t': 10, 'd': [SERVICE, 1.0]}, {'t': 10, 'd': ['acmeair-authservice', 2.0]}, {'t': 20, 'd': [SERVICE, 3.0]},
+    ]}, [METRIC])
+
+    run_store.append_frame('run', 'TEST', frame, root)
+    read = run_store.read_frame('run', 'TEST', METRIC, root=root)
+
+    assert sorted(read.services) == sorted(frame.services)
+    assert read.means(METRIC) == frame.means(METRIC)
+
+def test_archived_runs_are_read_back(tmp_path):
+    root = str(tmp_path)
+    run_store.append('run', 'TEST', METRIC, SERVICE, [10, 20], [1.0, 2.0], root=root)
+    run_store.append('run', 'TEST', METRIC, 'acmeair-authservice', [10], [5.0], root=root)
+
+    run_store.archive('run', root)
+
+    assert run_store.runs(root) == []
+    series = run_store.read_archive('run', root)
+    assert sorted(series) == [('TEST', METRIC, 'acmeair-authservice'), ('TEST', METRIC, SERVICE)]
+    timestamps, values = series[('TEST', METRIC, SERVICE)]
+    assert timestamps.tolist() == [10, 20]
+    assert values.tolist() == [1.0, 2.0]
+
+def test_a_scenario_loads_the_same_from_the_store_or_its_csv(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    frame = metric_frame.from_result({'data': [
+        {'t': 10, 'd': [SERVICE, 1.0]}, {'t': 10, 'd': ['acmeair-authservice', 2.0]}, {'t': 20, 'd': [SERVICE, 3.0]},
+    ]}, [METRIC])
+    run_store.append_frame('run', 'TEST', frame)
+    run_store.export_csv('run', 'TEST', METRIC, 'latency.csv')
+
+    stored = run_store.load_frame('run', METRIC, 'TEST')
+    exported = run_store.load_frame('latency.csv', METRIC)
+
+    assert stored.services == exported.services
+    assert np.array_equal(stored.timestamps, exported.timestamps)
+    assert np.array_equal(stored.metric(METRIC), exported.metric(METRIC), equal_nan=True)
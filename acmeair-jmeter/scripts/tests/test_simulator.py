@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+import metric_frame
+import policy
+import simulator
+
+A3_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'a3'))
+
+# Imported in a fresh interpreter, as other tests load the cluster and
+# Sysdig modules in this one
+def test_the_simulator_needs_no_cluster_nor_sysdig():
+    check = "import sys, simulator; print(sorted({'adapter', 'mock_acmeair', 'openshift', 'sdcclient', 'sysdig_client'} & set(sys.modules)))"
+
+    result = subprocess.run([sys.executable, '-c', check], cwd=A3_DIR, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == '[]'
+
+def test_service_times_are_calibrated_from_recorded_latencies():
+    latencies = np.array([[100e6], [120e6], [np.nan], [900e6]] * 5).reshape(-1, 1, 1)
+    frame = metric_frame.MetricFrame(np.arange(20) * 10, ['acmeair-flightservice'], [simulator.REQUEST_TIME], latencies)
+
+    assert simulator.calibrate(frame) == {'acmeair-flightservice': 0.1}
+
+def test_overloaded_services_are_scaled_up():
+    timestamps = np.arange(0, 2 * 3600, 10, dtype=float)
+    rates = np.where(timestamps < 3600, 20.0, 400.0)
+    trace = simulator.trace_from_profile(timestamps, rates, {'acmeair-flightservice': 1})
+    threshold = policy.upscale_utility_threshold
+
+    result = simulator.simulate(trace, {'upscale_utility_threshold': 0.9}, {'acmeair-flightservice': 0.2})
+
+    assert result['adaptations'] > 0
+    assert 0 < result['utility'] < 1
+    assert policy.upscale_utility_threshold == threshold
+
+def test_policies_may_score_every_simulated_metric():
+    timestamps = np.arange(0, 3600, 10, dtype=float)
+    trace = simulator.trace_from_profile(timestamps, np.full(len(timestamps), 50.0), {'acmeair-flightservice': 1})
+    spec = {
+        'latency': {'weight': 0.4, 'curve': 'step', 'thresholds': [1000], 'preferences': [1, 0]},
+        'cpu_used': {'weight': 0.2, 'curve': 'piecewise_linear', 'points': [50, 100], 'preferences': [1, 0]},
+        'memory_used': {'weight': 0.2, 'curve': 'piecewise_linear', 'points': [50, 100], 'preferences': [1, 0]},
+        'request_rate': {'weight': 0.2, 'curve': 'step', 'thresholds': [1000], 'preferences': [1, 0]},
+    }
+
+    result = simulator.simulate(trace, {'utility_spec': spec}, {'acmeair-flightservice': 0.05})
+
+    assert 0 < result['utility'] <= 1
+
+def test_a_driver_csv_replays_without_its_latencies(tmp_path, capsys):
+    path = tmp_path / f'{simulator.REQUEST_COUNT}_TEST_.csv'
+    path.write_text('acmeair-flightservice,timestamp\n5,1000\n7,1010\n')
+
+    (timestamps, rates), service_times = simulator.load_source(str(path))
+
+    assert timestamps.tolist() == [1000, 1010]
+    assert rates['acmeair-flightservice'].tolist() == [5, 7]
+    assert service_times == {}
+    assert 'No latencies recorded' in capsys.readouterr().out
+
+def test_a_profile_needs_its_file(capsys):
+    with pytest.raises(SystemExit):
+        simulator.main(['profile'])
+
+    assert 'profile needs the path of a load profile CSV file' in capsys.readouterr().err
+    with pytest.raises(ValueError):
+        simulator.load_source('profile')
@@ -0,0 +1,56 @@
+import csv
+
+import pytest
+
+import sweep
+
+MATRIX = {'thread_count': [150, 300, 600], 'ramp': [25], 'duration': [900], 'configuration': ['c1', 'c2', 'c3']}
+
+def test_cells_of_a_configuration_follow_each_other():
+    configurations = [parameters['configuration'] for _, parameters in sweep.cells(MATRIX)]
+
+    assert configurations == ['c1'] * 3 + ['c2'] * 3 + ['c3'] * 3
+
+def test_configurations_are_applied_once(tmp_path, monkeypatch):
+    applied, ran = [], []
+    monkeypatch.setattr(sweep, 'SWEEP_DIR', str(tmp_path))
+    monkeypatch.setattr(sweep, 'apply_configuration', applied.append)
+    monkeypatch.setattr(sweep.load_runner, 'run_scenario', lambda cell, parameters, jmx, guard: ran.append(cell) or (0, 1))
+
+    sweep.run_sweep('test', MATRIX, collect=False)
+    assert applied == ['c1', 'c2', 'c3']
+    assert len(ran) == 9
+
+    # A resumed sweep skips the completed cells and applies nothing
+    sweep.run_sweep('test', MATRIX, collect=False)
+    assert applied == ['c1', 'c2', 'c3']
+
+# Stands in for load_runner.run_scenario: appends `samples` results to the
+# JTL of the cell like JMeter does, then crashes on the cell `crash_at`
+def fake_scenario(samples, crash_at = None):
+    def run_scenario(cell, parameters, jmx, guard):
+        with open(f'logs/{cell}.jtl', 'a', newline='') as f:
+            writer = csv.writer(f)
+            if f.tell() == 0:
+                writer.writerow(['timeStamp', 'elapsed', 'label', 'success'])
+            writer.writerows([[1000 + i, 10, 'Login', 'true'] for i in range(samples)])
+        if cell == crash_at:
+            raise RuntimeError('crashed')
+        return 0, 1
+    return run_scenario
+
+def test_a_resumed_cell_only_counts_its_rerun(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'logs').mkdir()
+    monkeypatch.setattr(sweep, 'SWEEP_DIR', str(tmp_path / 'sweeps'))
+    monkeypatch.setattr(sweep, 'apply_configuration', lambda name: None)
+    interrupted = list(sweep.cells(MATRIX))[4][0]
+
+    monkeypatch.setattr(sweep.load_runner, 'run_scenario', fake_scenario(7, crash_at=interrupted))
+    with pytest.raises(RuntimeError):
+        sweep.run_sweep('test', MATRIX, collect=False)
+    monkeypatch.setattr(sweep.load_runner, 'run_scenario', fake_scenario(5))
+    completed = sweep.run_sweep('test', MATRIX, collect=False)
+
+    assert len(completed) == 9
+    assert completed[interrupted]['summary']['count'] == 5
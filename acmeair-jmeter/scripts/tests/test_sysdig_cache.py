@@ -0,0 +1,74 @@
+import json
+import time
+
+import sysdig_cache
+from sysdig_cache import CachedClient, add_interval, missing_intervals
+
+METRICS = [{'id': 'kube_workload_name'}, {'id': 'sysdig_container_cpu_used_percent', 'aggregations': {'time': 'avg', 'group': 'avg'}}]
+
+def samples(res):
+    return [(sample['t'], sample['d'][0], sample['d'][1]) for sample in res['data']]
+
+def test_intervals():
+    intervals = add_interval([], 0, 100)
+    intervals = add_interval(intervals, 200, 300)
+    assert missing_intervals(intervals, 50, 250) == [(100, 200)]
+    assert add_interval(intervals, 100, 200) == [[0, 300]]
+
+def test_cached_answers_equal_direct_answers(now, fake_sysdig, tmp_path):
+    cached = CachedClient(fake_sysdig, str(tmp_path))
+    windows = [(990_000, 995_000), (992_000, 997_000), (990_000, 995_000), (988_000, 993_000), (993_000, 993_500)]
+
+    for start, end in windows:
+        ok, res = cached.get_data(METRICS, start, end, 10)
+        direct_ok, direct = fake_sysdig.get_data(METRICS, start, end, 10)
+        assert ok and direct_ok
+        assert samples(res) == samples(direct)
+        assert all(start <= t < end for t, _, _ in samples(res))
+
+def test_closed_windows_are_served_from_disk(now, fake_sysdig, tmp_path):
+    cached = CachedClient(fake_sysdig, str(tmp_path))
+    cached.get_data(METRICS, 990_000, 995_000, 10)
+    calls = len(fake_sysdig.calls)
+
+    ok, res = CachedClient(fake_sysdig, str(tmp_path)).get_data(METRICS, 991_000, 994_000, 10)
+
+    assert ok
+    assert len(fake_sysdig.calls) == calls
+    assert len(res['data']) == 300 * len(fake_sysdig.workloads)
+
+def test_sliding_windows_only_fetch_their_unsettled_tail(now, fake_sysdig, tmp_path):
+    cached = CachedClient(fake_sysdig, str(tmp_path), settle_delay=30)
+    cached.get_data(METRICS, -600, 0, 10)
+
+    ok, res = cached.get_data(METRICS, -600, 0, 10)
+    _, direct = fake_sysdig.get_data(METRICS, -600, 0, 10)
+
+    assert samples(res) == samples(direct)
+    assert fake_sysdig.calls[-2][:2] == (-30, 0)
+
+def test_creating_a_client_writes_nothing(tmp_path, fake_sysdig):
+    CachedClient(fake_sysdig, str(tmp_path / 'cache'))
+
+    assert not (tmp_path / 'cache').exists()
+
+def test_sliding_windows_only_touch_their_own_segments(now, fake_sysdig, tmp_path, monkeypatch):
+    cached = CachedClient(fake_sysdig, str(tmp_path))
+    clock = [now]
+    monkeypatch.setattr(time, 'time', lambda: float(clock[0]))
+    loads = []
+    load = cached.load
+    cached.load = lambda path: loads.append(path) or load(path)
+
+    for tick in range(1000):
+        clock[0] += 10
+        loads.clear()
+        ok, res = cached.get_data(METRICS, -60, 0, 10)
+        _, direct = fake_sysdig.get_data(METRICS, -60, 0, 10)
+        assert samples(res) == samples(direct)
+        # Read once, then again to merge the fetched samples, at most two segments
+        assert len(loads) <= 4
+
+    segments = [json.loads(path.read_text()) for path in tmp_path.rglob('*.json')]
+    assert len(segments) >= 1000 // sysdig_cache.SEGMENT_SAMPLES
+    assert all(len(segment['samples']) <= sysdig_cache.SEGMENT_SAMPLES * len(fake_sysdig.workloads) for segment in segments)
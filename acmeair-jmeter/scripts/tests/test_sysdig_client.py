@@ -0,0 +1,79 @@
+import base64
+import json
+import sys
+import time
+import types
+
+import pytest
+
+import sysdig_client
+
+# IAM bearer token expiring at `exp`
+def bearer(exp):
+    claims = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+    return f'Bearer header.{claims}.signature'
+
+# Stand-in for the sdcclient module: IAM tokens come from `expiries`, one per
+# get_headers call
+@pytest.fixture
+def sdcclient(monkeypatch):
+    module = types.ModuleType('sdcclient')
+    module.expiries = []
+    module.token_requests = 0
+
+    class IbmAuthHelper:
+        @staticmethod
+        def get_headers(url, apikey, guid):
+            module.token_requests += 1
+            return {'Authorization': bearer(module.expiries.pop(0)), 'IBMInstanceID': guid}
+
+    class SdMonitorClient:
+        def __init__(self, token = '', sdc_url = '', custom_headers = None):
+            self.hdrs = dict(custom_headers or {})
+
+        def get_data(self, *args, **kwargs):
+            return True, self.hdrs['Authorization']
+
+    module.IbmAuthHelper = IbmAuthHelper
+    module.SdMonitorClient = SdMonitorClient
+    monkeypatch.setitem(sys.modules, 'sdcclient', module)
+    monkeypatch.setenv('IBMCLOUD_API_KEY', 'key')
+    monkeypatch.delenv('SDC_URL', raising=False)
+    return module
+
+def test_the_token_is_fetched_on_first_use(sdcclient, now):
+    sdcclient.expiries = [now + 3600]
+    client = sysdig_client.SysdigClient()
+
+    assert sdcclient.token_requests == 0
+
+    assert client.get_data() == (True, bearer(now + 3600))
+    client.get_data()
+    assert sdcclient.token_requests == 1
+
+def test_the_token_is_refreshed_before_it_expires(sdcclient, monkeypatch):
+    sdcclient.expiries = [1000 + 3600, 1000 + 7200]
+    client = sysdig_client.SysdigClient()
+
+    monkeypatch.setattr(time, 'time', lambda: 1000.0)
+    client.get_data()
+    monkeypatch.setattr(time, 'time', lambda: 1000.0 + 3600 - sysdig_client.REFRESH_MARGIN - 1)
+    assert client.get_data() == (True, bearer(1000 + 3600))
+    assert sdcclient.token_requests == 1
+
+    monkeypatch.setattr(time, 'time', lambda: 1000.0 + 3600 - sysdig_client.REFRESH_MARGIN)
+    assert client.get_data() == (True, bearer(1000 + 7200))
+    assert sdcclient.token_requests == 2
+    assert client.expires_at == 1000 + 7200
+
+def test_unreadable_tokens_last_the_assumed_lifetime(now):
+    assert sysdig_client.token_expiry('Bearer opaque') == now + sysdig_client.TOKEN_LIFETIME
+
+def test_the_local_mock_needs_no_token(sdcclient, monkeypatch):
+    monkeypatch.delenv('IBMCLOUD_API_KEY')
+    monkeypatch.setenv('SDC_URL', 'http://localhost:8080')
+    client = sysdig_client.SysdigClient()
+
+    client.hdrs
+    assert sdcclient.token_requests == 0
+    assert client.expires_at is None
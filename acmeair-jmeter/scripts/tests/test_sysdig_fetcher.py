@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import sysdig_fetcher
+from sysdig_fetcher import MAX_SAMPLES_PER_REQUEST, NAMESPACE_WORKLOAD_KEYS, build_metrics_query, fetch, merge_results, split_window
+
+METRICS = [{'id': 'kube_workload_name'}, {'id': 'sysdig_container_cpu_used_percent', 'aggregations': {'time': 'avg', 'group': 'avg'}}]
+FILTER = "kube_namespace_name = 'acmeair-g2'"
+
+def test_queries_list_the_keys_then_the_aggregated_values():
+    assert build_metrics_query({'sysdig_container_cpu_used_percent': {'time': 'avg', 'group': 'avg'}}) == METRICS
+    assert build_metrics_query({'m': {'group': 'sum'}}, NAMESPACE_WORKLOAD_KEYS) == [
+        {'id': 'kube_namespace_name'}, {'id': 'kube_workload_name'}, {'id': 'm', 'aggregations': {'group': 'sum'}},
+    ]
+
+def test_short_windows_are_kept_as_is():
+    assert split_window(-60, 0, 10) == [(-60, 0)]
+    assert split_window(1000, 1000 + MAX_SAMPLES_PER_REQUEST * 10, 10) == [(1000, 1000 + MAX_SAMPLES_PER_REQUEST * 10)]
+    assert split_window(0, 10 ** 6, 0) == [(0, 10 ** 6)]
+
+def test_chunks_are_aligned_contiguous_and_bounded():
+    start, end, sampling = 100_005, 100_005 + 1500 * 10, 10
+    windows = split_window(start, end, sampling)
+
+    assert windows[0][0] == 100_000
+    assert windows[-1][1] == end
+    for (_, chunk_end), (next_start, _) in zip(windows, windows[1:]):
+        assert chunk_end == next_start
+    for chunk_start, chunk_end in windows:
+        assert chunk_start % sampling == 0
+        assert chunk_end - chunk_start <= MAX_SAMPLES_PER_REQUEST * sampling
+
+def test_long_relative_windows_become_absolute():
+    windows = split_window(-10_000, 0, 10, now=1_000_005)
+
+    assert windows[0][0] == 990_000
+    assert windows[-1][1] == 1_000_005
+    assert all(chunk_start > 0 for chunk_start, _ in windows)
+
+def test_merge_results_drops_samples_returned_by_two_chunks():
+    first = {'data': [{'t': 10, 'd': ['a', 1.0]}, {'t': 20, 'd': ['a', 2.0]}, {'t': 20, 'd': ['b', 3.0]}], 'start': 0, 'end': 20}
+    second = {'data': [{'t': 20, 'd': ['a', 2.0]}, {'t': 30, 'd': ['a', 4.0]}], 'start': 20, 'end': 40}
+
+    merged = merge_results([second, first])
+
+    assert [(sample['t'], sample['d'][0]) for sample in merged['data']] == [(10, 'a'), (20, 'a'), (20, 'b'), (30, 'a')]
+    assert (merged['start'], merged['end']) == (0, 40)
+
+def test_merge_results_keys_on_every_key_column():
+    res = {'data': [{'t': 10, 'd': ['acmeair-g1', 'a', 1.0]}, {'t': 10, 'd': ['acmeair-g1', 'b', 2.0]}]}
+
+    assert len(merge_results([res], key_count=1)['data']) == 1
+    assert len(merge_results([res], key_count=2)['data']) == 2
+
+@pytest.mark.parametrize('start, end', [(990_005, 999_995), (-9_000, 0), (-30, 0)])
+def test_chunked_fetch_matches_a_single_query(now, fake_sysdig, start, end):
+    ok, res = fetch(fake_sysdig, METRICS, FILTER, start, end, sampling=10)
+
+    assert ok
+    absolute_start, absolute_end = (now + start, now + end) if start <= 0 else (start, end)
+    first = absolute_start - absolute_start % 10
+    expected = [(t, workload) for t in range(first, absolute_end, 10) for workload in fake_sysdig.workloads]
+    assert [(sample['t'], sample['d'][0]) for sample in res['data']] == expected
+
+def test_failed_chunks_are_retried(now, fake_sysdig, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    fake_sysdig.failures = sysdig_fetcher.RETRIES - 1
+
+    ok, res = fetch(fake_sysdig, METRICS, FILTER, -60, 0)
+
+    assert ok
+    assert len(fake_sysdig.calls) == sysdig_fetcher.RETRIES
+
+def test_a_chunk_failing_every_attempt_fails_the_query(now, fake_sysdig, monkeypatch):
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    fake_sysdig.failures = sysdig_fetcher.RETRIES
+
+    ok, res = fetch(fake_sysdig, METRICS, FILTER, -60, 0)
+
+    assert not ok
+    assert res == 'fake failure'